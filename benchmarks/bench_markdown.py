@@ -0,0 +1,72 @@
+"""Benchmark Markdown rendering with the shared language table.
+
+    PYTHONPATH=src python benchmarks/bench_markdown.py [--files N] [--lines N]
+
+Renders a synthetic pack with `get_language_from_extension` looking
+extensions up in the module-level LANGUAGE_BY_EXTENSION table, then again
+with a stand-in that rebuilds the table on every call (as it used to),
+checks both outputs are identical and prints the time of each.
+"""
+
+import argparse
+import time
+
+from rcpack import utils
+from rcpack.renderer import markdown
+from rcpack.renderer.markdown import render_markdown
+
+
+def _synthetic_files(count: int, lines: int) -> dict:
+    extensions = ["py", "js", "ts", "go", "rs", "md", "json", "txt"]
+    return {
+        f"src/pkg{i % 50:02}/module{i:05}.{extensions[i % len(extensions)]}":
+            "".join(f"line {n} of file {i}: {'x' * (n % 60)}\n" for n in range(lines))
+        for i in range(count)
+    }
+
+
+def _language_rebuilding_table(file_path_or_ext: str) -> str:
+    table = dict(utils.LANGUAGE_BY_EXTENSION)
+    if '.' in file_path_or_ext and not file_path_or_ext.startswith('.'):
+        ext = file_path_or_ext.split('.')[-1].lower()
+    else:
+        ext = file_path_or_ext.lower().lstrip(".")
+    return table.get(ext, '')
+
+
+def _time(files: dict, repeat: int) -> tuple:
+    best, output = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = render_markdown(
+            "/bench", {"is_repo": False}, "(tree)", files, len(files), 0,
+            file_sizes={path: len(content) for path, content in files.items()},
+        )
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    files = _synthetic_files(args.files, args.lines)
+    shared, expected = _time(files, args.repeat)
+    markdown.get_language_from_extension = _language_rebuilding_table
+    try:
+        rebuilt, output = _time(files, args.repeat)
+    finally:
+        markdown.get_language_from_extension = utils.get_language_from_extension
+    assert output == expected, "output differs between the two lookups"
+
+    print(f"{args.files} files x {args.lines} lines")
+    print(f"{'lookup':>14}  {'seconds':>8}")
+    print(f"{'rebuilt table':>14}  {rebuilt:>8.3f}")
+    print(f"{'shared table':>14}  {shared:>8.3f}  ({rebuilt / shared:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Read source snapshots straight from tar/zip archives, without extracting them.
+
+Members are streamed through `tarfile`/`zipfile`, filtered with the same
+rules as directory discovery, and only the first bytes needed for binary
+sniffing and the byte limit are kept in memory.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+from .generated import GeneratedDetector
+from .ingest import FileRecord, generated_record, record_from_bytes
+from .spill import SpillStore
+
+
+ARCHIVE_SUFFIXES = (
+    ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".zip",
+)
+
+
+def is_archive(path: Path) -> bool:
+    """True if `path` is a file with a supported archive suffix."""
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES) and path.is_file()
+
+
+def archive_info(path: Path) -> Dict[str, Optional[str]]:
+    """Repository info block for an archive input (archives carry no git metadata)."""
+    return {
+        "is_repo": False,
+        "commit": None,
+        "branch": None,
+        "author": None,
+        "date": None,
+        "note": f"Archive: {path.name}",
+    }
+
+
+def _member_path(name: str) -> Optional[str]:
+    """Normalize a member name to the relative path it would extract to,
+    or None for names that would land outside the extraction directory."""
+    normalized = posixpath.normpath(name.replace("\\", "/"))
+    if normalized in (".", "") or normalized.startswith(("/", "../")) or normalized == "..":
+        return None
+    return normalized
+
+
+def iter_archive_records(
+    archive_path: Path,
+    accepts: Callable[[str], bool],
+    max_bytes: int,
+    spill: Optional[SpillStore] = None,
+    detector: Optional[GeneratedDetector] = None,
+) -> Iterator[FileRecord]:
+    """Yield a FileRecord for every accepted regular file, in path order.
+
+    Zip members are read lazily in path order (the central directory allows
+    random access).  Compressed tarballs can only be read front to back, so
+    tar records (each at most `max_bytes` of content) are collected in one
+    streaming pass and then yielded in order, held in `spill` if given.  As
+    with extraction, a later member wins over an earlier one with the same path.
+    With a `detector`, members recognised as generated by name are stubbed
+    without being read, and the rest are checked on their first bytes.
+    """
+    classify = detector.classify_content if detector is not None else None
+    if archive_path.name.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as archive:
+            members = {}
+            for info in archive.infolist():
+                rel_path = _member_path(info.filename)
+                if info.is_dir() or rel_path is None or not accepts(rel_path):
+                    continue
+                members[rel_path] = info
+            for rel_path in sorted(members):
+                info = members[rel_path]
+                reason = detector.classify_path(rel_path) if detector is not None else None
+                if reason is not None:
+                    yield generated_record(rel_path, info.file_size, reason)
+                    continue
+                with archive.open(info) as member:
+                    raw = member.read(max_bytes + 1)
+                yield record_from_bytes(rel_path, raw, info.file_size, max_bytes=max_bytes, classify=classify)
+        return
+
+    records: Dict[str, FileRecord] = {}
+    # "r|*" streams any supported compression without seeking
+    with tarfile.open(archive_path, mode="r|*") as archive:
+        for info in archive:
+            if not info.isfile():
+                continue
+            rel_path = _member_path(info.name)
+            if rel_path is None or not accepts(rel_path):
+                continue
+            reason = detector.classify_path(rel_path) if detector is not None else None
+            if reason is not None:
+                record = generated_record(rel_path, info.size, reason)
+            else:
+                member = archive.extractfile(info)
+                if member is None:
+                    continue
+                raw = member.read(max_bytes + 1)
+                record = record_from_bytes(rel_path, raw, info.size, max_bytes=max_bytes, classify=classify)
+            if spill is not None:
+                if rel_path in records:
+                    spill.release(records[rel_path])
+                spill.admit(record)
+            records[rel_path] = record
+    for rel_path in sorted(records):
+        yield records[rel_path]
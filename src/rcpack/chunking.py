@@ -0,0 +1,165 @@
+"""Split packed files into line-aligned chunks for retrieval pipelines.
+
+Chunk boundaries are content-defined: whether a chunk may end after a line
+depends only on that line's text (a keyed hash compared with the line's
+size), not on its position.  An edit therefore only moves the boundaries of
+the chunk it falls in and, at most, the next one; every other chunk keeps its
+text and so its ID, and downstream caches of embeddings stay valid.
+
+- size is measured in characters, or in tokens with a `count_tokens`
+  callable (`estimate_tokens` is a tokenizer-free approximation);
+- each chunk after the first repeats up to `overlap` lines from before it,
+  as far as they fit within the bound;
+- a chunk ID is a hash of the file path and the chunk text, so it changes
+  exactly when the text the chunk carries changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .ingest import FileRecord
+from .utils import get_language_from_extension
+
+
+DEFAULT_MAX_CHARS = 2000
+DEFAULT_OVERLAP_LINES = 2
+
+# A chunk may end once it holds this fraction of the bound
+_MIN_FILL = 0.25
+# Boundaries are placed so chunks average about this fraction of the bound
+_TARGET_FILL = 0.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) without a tokenizer."""
+    return (len(text) + 3) // 4
+
+
+def chunk_id(path: str, content: str, occurrence: int = 0) -> str:
+    """Stable ID of a chunk: a hash of its file path and text.
+
+    `occurrence` tells apart identical chunks within the same file.
+    """
+    digest = hashlib.sha256(f"{path}\0{occurrence}\0".encode("utf-8"))
+    digest.update(content.encode("utf-8", errors="surrogatepass"))
+    return digest.hexdigest()[:24]
+
+
+def _boundary_hash(line: str) -> int:
+    digest = hashlib.blake2b(line.encode("utf-8", errors="surrogatepass"), digest_size=8, key=b"rcpack-chunks")
+    return int.from_bytes(digest.digest(), "big")
+
+
+class Chunker:
+    """Splits FileRecords into bounded, line-aligned chunks.
+
+    - max_chars: bound on a chunk's size in characters
+    - max_tokens: bound in tokens instead, counted with `count_tokens`
+      (default `estimate_tokens`)
+    - overlap: lines repeated from before each chunk after the first
+
+    A single line longer than the bound is cut into pieces of its own.
+    Binary files and generated-file stubs produce no chunks.
+    """
+
+    def __init__(self, max_chars: Optional[int] = None, max_tokens: Optional[int] = None,
+                 overlap: int = DEFAULT_OVERLAP_LINES,
+                 count_tokens: Optional[Callable[[str], int]] = None):
+        if max_chars is not None and max_tokens is not None:
+            raise ValueError("Bound chunks by characters or by tokens, not both")
+        if max_tokens is not None:
+            self.max_size = max_tokens
+            self.measure = count_tokens or estimate_tokens
+        else:
+            self.max_size = max_chars if max_chars is not None else DEFAULT_MAX_CHARS
+            self.measure = len
+        if self.max_size < 1:
+            raise ValueError("The chunk size bound must be positive")
+        if overlap < 0:
+            raise ValueError("Chunk overlap cannot be negative")
+        self.overlap = overlap
+        self._min_size = self.max_size * _MIN_FILL
+        self._target = max(1, int(self.max_size * _TARGET_FILL))
+
+    def _ends_chunk(self, line: str, size: int) -> bool:
+        # Probability size/target per line, so chunks average `target`
+        return _boundary_hash(line) % self._target < size
+
+    def _split_line(self, line: str, size: int) -> List[str]:
+        """Cut a line longer than the bound into pieces within it."""
+        step = max(1, len(line) * self.max_size // size)
+        pieces = []
+        start = 0
+        while start < len(line):
+            end = start + step
+            while end - start > 1 and self.measure(line[start:end]) > self.max_size:
+                end = start + max(1, (end - start) * 3 // 4)
+            pieces.append(line[start:end])
+            start = end
+        return pieces
+
+    def spans(self, lines: List[str], sizes: List[int]) -> Iterator[Tuple[int, int]]:
+        """(start, end) line index ranges of the chunks, without overlap."""
+        start = 0
+        size = 0
+        for index, (line, line_size) in enumerate(zip(lines, sizes)):
+            if size and size + line_size > self.max_size:
+                yield start, index
+                start, size = index, 0
+            size += line_size
+            if size >= self.max_size or (size >= self._min_size and self._ends_chunk(line, line_size)):
+                yield start, index + 1
+                start, size = index + 1, 0
+        if start < len(lines):
+            yield start, len(lines)
+
+    def _overlap_start(self, sizes: List[int], start: int, end: int) -> int:
+        """First line of the overlap before `start` that still fits the bound."""
+        total = sum(sizes[start:end])
+        first = start
+        while first > 0 and start - first < self.overlap and total + sizes[first - 1] <= self.max_size:
+            first -= 1
+            total += sizes[first]
+        return first
+
+    def chunks(self, record: FileRecord) -> Iterator[Dict[str, Any]]:
+        """Chunks of `record`, in order, as JSON-ready dicts.
+
+        Line numbers are 1-based and inclusive and refer to the packed
+        content (the outline, for outlined files).
+        """
+        if record.binary or record.generated is not None or not record.content:
+            return
+        lines = record.content.splitlines(keepends=True)
+        sizes = [self.measure(line) for line in lines]
+        language = get_language_from_extension(record.path) or None
+        seen: Dict[str, int] = {}
+        index = 0
+        for start, end in self.spans(lines, sizes):
+            if end - start == 1 and sizes[start] > self.max_size:
+                texts = [(start, piece) for piece in self._split_line(lines[start], sizes[start])]
+            else:
+                first = self._overlap_start(sizes, start, end) if index else start
+                texts = [(first, "".join(lines[first:end]))]
+            for first, text in texts:
+                occurrence = seen.get(text, 0)
+                seen[text] = occurrence + 1
+                yield {
+                    "id": chunk_id(record.path, text, occurrence),
+                    "path": record.path,
+                    "chunk": index,
+                    "start_line": first + 1,
+                    "end_line": end,
+                    "language": language,
+                    "content": text,
+                }
+                index += 1
+
+
+def chunk_records(records: Iterable[FileRecord], chunker: Optional[Chunker] = None) -> Iterator[Dict[str, Any]]:
+    """Chunks of every record in `records`, lazily and in order."""
+    chunker = chunker or Chunker()
+    for record in records:
+        yield from chunker.chunks(record)
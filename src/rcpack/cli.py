@@ -5,60 +5,99 @@ from .config_loader import load_config
 
 import argparse
 import sys
+import time
+from contextlib import ExitStack
 from pathlib import Path
-from .gitinfo import get_git_info
-from .discover import discover_files
-from .treeview import create_tree_view
-from .renderer.markdown import render_markdown
-from .renderer.jsonyaml import render_json, render_yaml
-from .io_utils import write_output, is_binary_file, read_text_safely
+from .archive import archive_info, is_archive
+from .chunking import DEFAULT_MAX_CHARS, DEFAULT_OVERLAP_LINES, Chunker
+from .discover import default_index_dir
+from .delta import PackDelta
+from .generated import GeneratedDetector
+from .gitinfo import GitBlobReader, describe_diff, diff_target, get_diff_patches
+from .io_utils import open_output
+from .modules import ModuleScanner
+from .outline import Outliner
+from .renderer.chunks import ChunksWriter
+from .renderer.sqlite import SqliteWriter
+from .pipeline import (
+    TeeWriter, archive_entries, diff_entries, filesystem_entries, get_writer, revision_entries, run_pipeline,
+)
 from .repository_analyzer import RepositoryAnalyzer
+from .spill import SpillStore, parse_size
 from datetime import datetime, timedelta
 
 
+# Exit codes: 2 is taken by argparse for usage errors
+EXIT_COMPLETE = 0
+EXIT_ERROR = 1
+EXIT_TRUNCATED = 3
+
+
+FORMATS = ("text", "json", "yaml", "sqlite", "chunks")
+FORMAT_EXTENSIONS = {"text": "md", "json": "json", "yaml": "yaml", "sqlite": "db", "chunks": "jsonl"}
+
+
+def parse_formats(value: str) -> list:
+    """Parse a comma-separated list of output formats, e.g. "text,json"."""
+    formats = [fmt.strip() for fmt in value.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if not formats or unknown:
+        raise argparse.ArgumentTypeError(
+            f"invalid format {', '.join(unknown) or repr(value)} (choose from {', '.join(FORMATS)})"
+        )
+    if len(set(formats)) != len(formats):
+        raise argparse.ArgumentTypeError(f"format listed twice: {value}")
+    return formats
+
+
+def resolve_outputs(formats: list, outputs: list = None, template: str = None) -> list:
+    """Pair each format with its output path (None for stdout).
+
+    Paths come from the `-o` values, in the same order as the formats, or
+    from a template with {format} and {ext} placeholders.
+    """
+    if outputs and template:
+        raise ValueError("Use either -o or --output-template, not both")
+    if template:
+        paths = [template.format(format=fmt, ext=FORMAT_EXTENSIONS[fmt]) for fmt in formats]
+        if len(set(paths)) != len(paths):
+            raise ValueError("--output-template must contain {format} or {ext} when writing several formats")
+        return paths
+    if not outputs:
+        if len(formats) > 1:
+            raise ValueError("Several formats need one -o per format or --output-template")
+        return [None]
+    if len(outputs) != len(formats):
+        raise ValueError(f"Got {len(outputs)} -o paths for {len(formats)} formats")
+    return list(outputs)
+
+
 def log_verbose(message: str, verbose: bool) -> None:
     """Log a message to stderr if verbose mode is enabled."""
     if verbose:
         print(message, file=sys.stderr)
 
 
-def get_rendered_content(format_type: str, repo_path: str, repo_info: dict, tree_text: str, 
-                        files_data: dict, total_files: int, total_lines: int, 
-                        recent_files_info: dict, file_sizes: dict) -> str:
-    """Get rendered content based on the specified format."""
-    if format_type == "json":
-        return render_json(
-            repo_path, repo_info, tree_text, 
-            files_data, total_files, total_lines,
-            recent_files=recent_files_info,
-            file_sizes=file_sizes
-        )
-    elif format_type == "yaml":
-        return render_yaml(
-            repo_path, repo_info, tree_text, 
-            files_data, total_files, total_lines,
-            recent_files=recent_files_info,
-            file_sizes=file_sizes
-        )
-    else:  # text/markdown
-        return render_markdown(
-            repo_path, repo_info, tree_text, 
-            files_data, total_files, total_lines,
-            recent_files=recent_files_info,
-            file_sizes=file_sizes
-        )
-
-
+def iter_discovered_files(analyzer: RepositoryAnalyzer, recent: bool,
+                          recent_files_info: dict, verbose: bool, index_dir: Path = None,
+                          modules: ModuleScanner = None):
+    """Discover files (optionally only recent ones), recording ages in `recent_files_info`.
 
-def handle_output(content: str, output_path: str = None) -> None:
-    """Handle output to either file or stdout."""
-    if output_path:
-        # Write to file
-        write_output(output_path, content)
-        print(f"Context package created: {output_path}")
-    else:
-        # Output to stdout
-        print(content)
+    Runs as the discovery stage of the pipeline, on top of `analyzer.iter_files`
+    (module by module with a `modules` scanner).
+    """
+    log_verbose(f"Discovering files in: {analyzer.repo_path}", verbose)
+    count = 0
+    for file_path in analyzer.iter_files(recent_days=7 if recent else None, index_dir=index_dir, modules=modules):
+        if recent:
+            try:
+                mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
+                recent_files_info[file_path.relative_to(analyzer.repo_path).as_posix()] = human_readable_age(mtime)
+            except Exception:
+                continue
+        count += 1
+        yield file_path
+    log_verbose(f"Found {count} {'recent ' if recent else ''}files", verbose)
 
 
 def main():
@@ -69,17 +108,27 @@ def main():
         "path", 
         nargs="?", 
         default=".", 
-        help="Repository path (default: current directory)"
+        help="Repository path or .tar/.tar.gz/.zip archive (default: current directory)"
     )
     parser.add_argument(
         "-o", "--output", 
-        help="Output file path (default: stdout)"
+        action="append",
+        help="Output file path (default: stdout); repeat once per format with -f a,b"
     )
     parser.add_argument(
         "-f", "--format", 
-        choices=["text", "json", "yaml"], 
-        default="text",
-        help="Output format (default: text)"
+        type=parse_formats,
+        default=["text"],
+        metavar="FORMAT[,FORMAT...]",
+        help=f"Output format(s): {', '.join(FORMATS)} (default: text); several formats are "
+             "rendered from one pass. sqlite writes a searchable database and needs -o; "
+             "chunks writes JSONL chunks for retrieval pipelines"
+    )
+    parser.add_argument(
+        "--output-template",
+        metavar="TEMPLATE",
+        help="Output path for every format, with {format} and {ext} placeholders "
+             "(e.g. context.{ext})"
     )
 
     """ This will read -r from the console and able to search it with this"""
@@ -88,6 +137,113 @@ def main():
     action="store_true",
     help="Include only files modified in the last 7 days"
     )
+    parser.add_argument(
+        "--outline",
+        action="store_true",
+        help="Reduce source files to signatures (docstrings, classes, functions)"
+    )
+    parser.add_argument(
+        "--outline-cache",
+        metavar="DIR",
+        help="Directory to cache outlines in across runs (used with --outline)"
+    )
+    parser.add_argument(
+        "--diff",
+        metavar="BASE..HEAD",
+        help="Pack only files changed between two revisions (a single BASE compares with the working tree)"
+    )
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="Pack only files with staged changes, as they are in the index"
+    )
+    parser.add_argument(
+        "--diff-hunks",
+        action="store_true",
+        help="Include unified diff hunks for each changed file (with --diff/--staged)"
+    )
+    parser.add_argument(
+        "--rev",
+        metavar="TREE-ISH",
+        help="Pack a commit, tag or tree from the object store instead of the working tree"
+    )
+    parser.add_argument(
+        "--discovery-index",
+        nargs="?",
+        const=str(default_index_dir()),
+        metavar="DIR",
+        help="Keep a discovery index so rescans only list changed directories "
+             f"(default location: {default_index_dir()})"
+    )
+    parser.add_argument(
+        "--modules",
+        action="store_true",
+        help="Treat submodules and nested git repositories as modules: each is scanned in "
+             "parallel and gets its own git information section"
+    )
+    parser.add_argument(
+        "--module-depth",
+        type=int,
+        metavar="N",
+        help="With --modules, pack modules nested deeper than N as plain directories "
+             "(implies --modules)"
+    )
+    parser.add_argument(
+        "--skip-module",
+        action="append",
+        metavar="GLOB",
+        help="Leave out modules whose path matches GLOB; repeatable (implies --modules)"
+    )
+    parser.add_argument(
+        "--since-pack",
+        metavar="PACK",
+        help="Write a delta pack: only files added or modified since an earlier JSON/YAML "
+             "pack, plus the deleted files and the updated tree"
+    )
+    parser.add_argument(
+        "--manifest-only",
+        action="store_true",
+        help="Leave file contents out of JSON/YAML packs; keep sizes and per-file hashes"
+    )
+    parser.add_argument(
+        "--no-skip-generated",
+        dest="skip_generated",
+        action="store_false",
+        help="Pack generated, minified and lock files in full instead of as one-line stubs"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        metavar="CHARS",
+        help=f"Maximum chunk size in characters for -f chunks (default: {DEFAULT_MAX_CHARS})"
+    )
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        metavar="TOKENS",
+        help="Bound chunks by estimated tokens (about 4 characters each) instead of characters"
+    )
+    parser.add_argument(
+        "--chunk-overlap",
+        type=int,
+        default=DEFAULT_OVERLAP_LINES,
+        metavar="LINES",
+        help=f"Lines repeated from the previous chunk of a file (default: {DEFAULT_OVERLAP_LINES})"
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=parse_size,
+        metavar="SIZE",
+        help="Memory budget for file contents read ahead of the output (e.g. 256M); "
+             "contents past it are spilled to a temporary file"
+    )
+    parser.add_argument(
+        "--deadline",
+        type=int,
+        metavar="MS",
+        help="Stop reading new files after MS milliseconds and write a partial pack "
+             f"listing what was omitted (exit code {EXIT_TRUNCATED})"
+    )
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
@@ -95,65 +251,177 @@ def main():
     )
     
     args = parser.parse_args()
+    deadline = time.monotonic() + args.deadline / 1000 if args.deadline is not None else None
     
     try:
         # Initialize repository analyzer
         log_verbose(f"Analyzing repository: {args.path}", args.verbose)
         analyzer = RepositoryAnalyzer(Path(args.path))
         
-        # Get repository information using analyzer
-        repo_info = analyzer.get_git_info()
-        
-        # Discover files using analyzer
-        log_verbose(f"Discovering files in: {analyzer.repo_path}", args.verbose)
-        discovered_files = analyzer.discover_files()
-        log_verbose(f"Found {len(discovered_files)} files", args.verbose)
-        
-        # Filter to recent files if requested
-        recent_files_info = {}
-        if args.recent:
-            recent_files = analyzer.get_recent_files(discovered_files, days=7)
-            for recent_file in recent_files:
-                try:
-                    mtime = datetime.fromtimestamp(recent_file.stat().st_mtime)
-                    recent_files_info[str(recent_file.relative_to(analyzer.repo_path))] = human_readable_age(mtime)     
-                except Exception:
-                    continue
-            discovered_files = recent_files
+        archive_mode = is_archive(analyzer.repo_path)
+        diff_mode = bool(args.diff or args.staged)
+        if diff_mode and args.recent:
+            raise ValueError("--recent cannot be combined with --diff/--staged")
+        if archive_mode and (diff_mode or args.recent or args.rev):
+            raise ValueError("--diff, --staged, --recent and --rev need a directory, not an archive")
+        if args.rev and (diff_mode or args.recent):
+            raise ValueError("--rev cannot be combined with --diff, --staged or --recent")
+        module_aware = bool(args.modules or args.module_depth is not None or args.skip_module)
+        if module_aware and (archive_mode or diff_mode or args.rev):
+            raise ValueError("--modules needs a directory, not an archive, --diff, --staged or --rev")
+        if args.since_pack and (archive_mode or diff_mode or args.recent):
+            raise ValueError("--since-pack cannot be combined with an archive, --diff, --staged or --recent")
+        if args.since_pack and args.deadline is not None:
+            # A partial pass would list undiscovered files as deleted and drop them from the manifest
+            raise ValueError("--since-pack cannot be combined with --deadline")
+        if args.manifest_only and not set(args.format) <= {"json", "yaml"}:
+            raise ValueError("--manifest-only needs -f json or -f yaml")
+        if args.chunk_size is not None and args.chunk_tokens is not None:
+            raise ValueError("Use either --chunk-size or --chunk-tokens, not both")
+        outputs = resolve_outputs(args.format, args.output, args.output_template)
+        if "sqlite" in args.format and outputs[args.format.index("sqlite")] is None:
+            raise ValueError("--format sqlite needs an output file (-o)")
         
-        # Read file contents
-        files_data = {}
-        file_sizes = {}
-        for file_path in discovered_files:
-            try:
-                relative_path_str, content, file_size = analyzer.process_file(file_path, args.verbose)
-                files_data[relative_path_str] = content
-                file_sizes[relative_path_str] = file_size
-            except Exception:
-                continue
-        
-        # Create tree view
-        log_verbose("Generating directory tree", args.verbose)
-        tree_text = create_tree_view(analyzer.repo_path, files_data)
-        
-        # Count totals
-        total_files = len(files_data)
-        total_lines = sum(len(content.splitlines()) for _, content in files_data.items())
+        # Get repository information using analyzer
+        if archive_mode:
+            repo_info = archive_info(analyzer.repo_path)
+        elif diff_mode:
+            # Describe the revision the changed files are read from, not HEAD
+            repo_info = analyzer.get_git_info(rev=diff_target(args.diff, args.staged) or None)
+        else:
+            repo_info = analyzer.get_git_info(rev=args.rev)
         
-        # Render based on format
-        log_verbose(f"Rendering output in {args.format} format", args.verbose)
-        content = get_rendered_content(
-            args.format, str(analyzer.repo_path), repo_info, tree_text,
-            files_data, total_files, total_lines,
-            recent_files_info if args.recent else {},
-            file_sizes
-        )
+        log_verbose(f"Rendering output in {', '.join(args.format)} format", args.verbose)
+        delta = PackDelta.from_pack(Path(args.since_pack)) if args.since_pack else None
+        chunker = None
+        if "chunks" in args.format:
+            chunker = Chunker(max_chars=args.chunk_size, max_tokens=args.chunk_tokens, overlap=args.chunk_overlap)
+        with ExitStack() as stack:
+            writers = []
+            for fmt, output in zip(args.format, outputs):
+                if fmt == "sqlite":
+                    writers.append(stack.enter_context(SqliteWriter(output, delta=delta)))
+                else:
+                    out = stack.enter_context(open_output(output))
+                    writers.append(get_writer(
+                        fmt, out, delta=delta, manifest_only=args.manifest_only, chunker=chunker,
+                    ))
+            # One discovery and ingestion pass feeds every format
+            writer = writers[0] if len(writers) == 1 else TeeWriter(writers)
+            outliner = stack.enter_context(Outliner(cache_dir=args.outline_cache)) if args.outline else None
+            spill = stack.enter_context(SpillStore(args.max_memory)) if args.max_memory is not None else None
+            
+            # Discovery, reading and rendering overlap; see rcpack.pipeline
+            recent_files_info = {}
+            changes = None
+            scanner = None
+            cancel_reads = [outliner.cancel] if outliner is not None else []
+            detector = None
+            if archive_mode:
+                # Members are streamed from the archive; nothing is extracted
+                detector = GeneratedDetector() if args.skip_generated else None
+                entries = archive_entries(
+                    analyzer.repo_path, verbose=args.verbose, outliner=outliner, spill=spill,
+                    detector=detector,
+                )
+            elif args.rev:
+                # Listed with ls-tree and read from the object store; the
+                # working tree is not touched
+                blob_reader = stack.enter_context(GitBlobReader(analyzer.repo_path))
+                cancel_reads.append(blob_reader.cancel)
+                if args.skip_generated:
+                    detector = GeneratedDetector.for_revision(blob_reader, args.rev)
+                entries = revision_entries(
+                    analyzer.repo_path, args.rev, blob_reader,
+                    verbose=args.verbose, outliner=outliner, detector=detector, delta=delta,
+                )
+            elif diff_mode:
+                # Only the changed files are listed and read; no tree walk
+                changed_files = analyzer.get_changed_files(args.diff, args.staged)
+                log_verbose(f"Found {len(changed_files)} changed files", args.verbose)
+                target = diff_target(args.diff, args.staged)
+                blob_reader = stack.enter_context(GitBlobReader(analyzer.repo_path)) if target is not None else None
+                if blob_reader is not None:
+                    cancel_reads.append(blob_reader.cancel)
+                patches = get_diff_patches(analyzer.repo_path, args.diff, args.staged) if args.diff_hunks else None
+                if args.skip_generated:
+                    detector = GeneratedDetector.for_directory(analyzer.repo_path)
+                entries = diff_entries(
+                    changed_files, analyzer.repo_path, target, blob_reader,
+                    patches=patches, verbose=args.verbose, outliner=outliner, detector=detector,
+                )
+                changes = {"range": describe_diff(args.diff, args.staged), "files": changed_files}
+            else:
+                if module_aware:
+                    # Each module is listed by its own worker; see rcpack.modules
+                    scanner = stack.enter_context(ModuleScanner(
+                        analyzer.repo_path, max_depth=args.module_depth, skip=args.skip_module or [],
+                        index_dir=args.discovery_index,
+                    ))
+                    cancel_reads.append(scanner.cancel)
+                discovered_files = iter_discovered_files(
+                    analyzer, args.recent, recent_files_info, args.verbose,
+                    index_dir=args.discovery_index, modules=scanner,
+                )
+                if args.skip_generated:
+                    detector = GeneratedDetector.for_directory(analyzer.repo_path)
+                entries = filesystem_entries(
+                    discovered_files, analyzer.repo_path,
+                    verbose=args.verbose, outliner=outliner, detector=detector, delta=delta,
+                )
+            
+            stats = run_pipeline(
+                entries, writer,
+                root=str(analyzer.repo_path),
+                repo_info=repo_info,
+                recent_files=recent_files_info if args.recent else None,
+                changes=changes,
+                outline=args.outline,
+                spill=spill,
+                deadline=deadline,
+                on_deadline=cancel_reads,
+                modules=scanner,
+            )
+            if scanner is not None:
+                log_verbose(f"Found {len(scanner.info())} modules", args.verbose)
+            if delta is not None:
+                result = delta.result()
+                log_verbose(
+                    f"Delta since {result['since']}: {len(result['added'])} added, "
+                    f"{len(result['modified'])} modified, {len(result['deleted'])} deleted, "
+                    f"{result['unchanged']} unchanged",
+                    args.verbose,
+                )
+            if stats.get("generated"):
+                log_verbose(f"Generated files stubbed: {stats['generated']}", args.verbose)
+            if spill is not None:
+                log_verbose(
+                    f"Spilled {spill.spilled_files} files ({stats['spilled_bytes']} bytes) to disk",
+                    args.verbose,
+                )
+            for fmt_writer in writers:
+                if isinstance(fmt_writer, ChunksWriter):
+                    log_verbose(f"Wrote {fmt_writer.chunk_count} chunks", args.verbose)
+            # JSONL ends with its last record's newline
+            if outputs == [None] and args.format != ["chunks"]:
+                out.write("\n")
         
-        handle_output(content, args.output)
+        for output in outputs:
+            if output is not None:
+                print(f"Context package created: {output}")
         
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
-        sys.exit(1)
+        sys.exit(EXIT_ERROR)
+    
+    if "truncated" in stats:
+        truncated = stats["truncated"]
+        print(
+            f"Pack truncated: {truncated['reason']} after {args.deadline} ms; "
+            f"{len(truncated['omitted'])} files omitted",
+            file=sys.stderr,
+        )
+        sys.exit(EXIT_TRUNCATED)
 
 # this will convert age and give us the difference
 def human_readable_age(mtime: datetime) -> str:
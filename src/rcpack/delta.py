@@ -0,0 +1,134 @@
+"""Delta packs: only what changed since a previous JSON/YAML pack.
+
+Every JSON/YAML pack carries a manifest: for each file, the sha256 of its
+packed content plus what is needed to tell it is unchanged without reading
+it again (size and mtime on disk, or the git blob id).  A delta pack reads the
+previous manifest, skips files whose size+mtime or blob id still match,
+hashes the rest and writes only added and modified files.  Deleted files are
+listed, the tree is the full, updated one, and the new manifest covers every
+file so delta packs can be chained.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from .ingest import FileRecord
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+def content_hash(content: str) -> str:
+    """sha256 of packed content, as recorded in manifests."""
+    return hashlib.sha256(content.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+def manifest_entry(record: FileRecord) -> Dict[str, Any]:
+    """The manifest entry for a packed record."""
+    if record.sha256 is None:
+        record.sha256 = content_hash(record.content)
+    entry: Dict[str, Any] = {"sha256": record.sha256, "size": record.size}
+    if record.blob is not None:
+        entry["blob"] = record.blob
+    if record.mtime_ns is not None:
+        entry["mtime_ns"] = record.mtime_ns
+    return entry
+
+
+def load_manifest(pack_path: Path) -> Dict[str, Any]:
+    """Read a previous JSON or YAML pack and return it without file contents.
+
+    Raises ValueError if the pack has no manifest.
+    """
+    text = Path(pack_path).read_text(encoding="utf-8")
+    try:
+        data = json.loads(text)
+    except ValueError:
+        if yaml is None:
+            raise ValueError(f"{pack_path} is not JSON and PyYAML is not installed")
+        data = yaml.safe_load(text)
+    if not isinstance(data, dict) or not isinstance(data.get("manifest"), dict):
+        raise ValueError(f"{pack_path} has no manifest; regenerate it as a JSON or YAML pack")
+    data.pop("files", None)
+    return data
+
+
+class PackDelta:
+    """Tracks which files changed relative to a previous pack's manifest.
+
+    Entry generators call `mark` for every path they list, `unchanged` before
+    reading a file and `filter` on every record read; all three are safe to
+    call from the pipeline's threads.
+    """
+
+    def __init__(self, previous: Dict[str, Any], since: str):
+        self.since = since
+        self.since_commit = (previous.get("repo_info") or {}).get("commit")
+        self._previous: Dict[str, Dict[str, Any]] = previous["manifest"]
+        self.carried: Dict[str, Dict[str, Any]] = {}
+        self._seen: Set[str] = set()
+        self._added: List[str] = []
+        self._modified: List[str] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_pack(cls, pack_path: Path) -> "PackDelta":
+        return cls(load_manifest(pack_path), since=Path(pack_path).name)
+
+    def mark(self, rel_path: str) -> None:
+        with self._lock:
+            self._seen.add(rel_path)
+
+    def unchanged(self, rel_path: str, size: Optional[int] = None, mtime_ns: Optional[int] = None,
+                  blob: Optional[str] = None) -> bool:
+        """True (and the previous entry is carried over) if `rel_path` is known
+        unchanged from its blob id, or from its size and mtime."""
+        previous = self._previous.get(rel_path)
+        if previous is None:
+            return False
+        if blob is not None:
+            same = previous.get("blob") == blob
+        else:
+            same = (mtime_ns is not None and previous.get("mtime_ns") == mtime_ns
+                    and previous.get("size") == size)
+        if same:
+            with self._lock:
+                self.carried[rel_path] = previous
+        return same
+
+    def filter(self, record: FileRecord) -> Optional[FileRecord]:
+        """Return `record` if its content changed, else None (its refreshed
+        manifest entry is carried over)."""
+        entry = manifest_entry(record)
+        previous = self._previous.get(record.path)
+        with self._lock:
+            if previous is not None and previous.get("sha256") == entry["sha256"]:
+                self.carried[record.path] = entry
+                return None
+            (self._added if previous is None else self._modified).append(record.path)
+        return record
+
+    def manifest(self, packed: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """The full manifest: entries of the `packed` files plus carried ones."""
+        merged = {**self.carried, **packed}
+        return {path: merged[path] for path in sorted(merged)}
+
+    def result(self) -> Dict[str, Any]:
+        """Summary of the delta, for the pack's "delta" section."""
+        with self._lock:
+            return {
+                "since": self.since,
+                "since_commit": self.since_commit,
+                "added": sorted(self._added),
+                "modified": sorted(self._modified),
+                "deleted": sorted(set(self._previous) - self._seen),
+                "unchanged": len(self.carried),
+            }
+
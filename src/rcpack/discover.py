@@ -1,62 +1,263 @@
 """File discovery module for repository analysis."""
 
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import fnmatch
+import hashlib
+import heapq
+import json
+import os
+import time
+from operator import itemgetter
 from .utils import DEFAULT_INCLUDE_EXTENSIONS, ALWAYS_INCLUDE_FILE_NAMES, SKIP_DIRECTORY_NAMES
 
 
-def discover_files(
-    inputs: List[Path],
-    root: Path,
-    include_patterns: List[str],
-    exclude_patterns: List[str],
-) -> List[Path]:
-    """Discover relevant files.
+# Bump when the index layout or walk semantics change
+_INDEX_VERSION = 1
 
-    - inputs: list of files/dirs to scan
-    - root: common project root; patterns are matched against POSIX paths relative to root
-    - include_patterns: glob patterns to include (if empty, use sensible defaults)
-    - exclude_patterns: glob patterns to exclude
-    Returns a list of absolute Paths to files.
+# Directories modified this close to an index save are listed again next run
+_MTIME_SLACK_NS = 2_000_000_000
+
+
+def make_path_filter(include_patterns: List[str], exclude_patterns: List[str]) -> Callable[[str], bool]:
+    """Return a predicate applying the discovery rules to a relative POSIX path.
+
+    Used for file lists that do not come from a directory walk (git diffs,
+    revisions, archives): skipped directories, then exclude/include patterns,
+    then the default extension and file name sets.
     """
 
     def matches_any(patterns: List[str], rel_posix: str) -> bool:
         return any(fnmatch.fnmatch(rel_posix, pat) for pat in patterns)
 
-    def should_take(file_path: Path) -> bool:
-        rel_posix = file_path.relative_to(root).as_posix()
+    def accepts(rel_posix: str) -> bool:
+        parts = rel_posix.split("/")
+        if any(part in SKIP_DIRECTORY_NAMES for part in parts[:-1]):
+            return False
         if exclude_patterns and matches_any(exclude_patterns, rel_posix):
             return False
         if include_patterns:
             return matches_any(include_patterns, rel_posix)
         # default include logic
-        return file_path.name in ALWAYS_INCLUDE_FILE_NAMES or file_path.suffix.lower() in DEFAULT_INCLUDE_EXTENSIONS
+        name = parts[-1]
+        return name in ALWAYS_INCLUDE_FILE_NAMES or Path(name).suffix.lower() in DEFAULT_INCLUDE_EXTENSIONS
+
+    return accepts
+
+
+def default_index_dir() -> Path:
+    """Default location for discovery indexes ($XDG_CACHE_HOME/rcpack/discovery)."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(cache_home) / "rcpack" / "discovery"
+
+
+def _index_key(root: Path, include_patterns: List[str], exclude_patterns: List[str]) -> str:
+    """Fingerprint of everything that decides which files a directory contributes."""
+    material = json.dumps([
+        _INDEX_VERSION,
+        root.as_posix(),
+        sorted(SKIP_DIRECTORY_NAMES),
+        sorted(DEFAULT_INCLUDE_EXTENSIONS),
+        sorted(ALWAYS_INCLUDE_FILE_NAMES),
+        list(include_patterns),
+        list(exclude_patterns),
+    ])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _index_file(index_dir: Path, directory: Path) -> Path:
+    return index_dir / (hashlib.sha256(directory.as_posix().encode("utf-8")).hexdigest() + ".json")
+
+
+def _load_index(index_file: Path, key: str) -> Tuple[Dict[str, dict], int]:
+    """Return (directory entries, trusted_before_ns) or empty entries if stale/missing."""
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("key") != key:
+            return {}, 0
+        # A directory modified in the same timestamp tick as the save may
+        # have changed again without its mtime moving; do not trust those.
+        return data["dirs"], data["saved_at_ns"] - _MTIME_SLACK_NS
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}, 0
+
+
+def _save_index(index_file: Path, key: str, dirs: Dict[str, dict], saved_at_ns: int) -> None:
+    try:
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = index_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "saved_at_ns": saved_at_ns, "dirs": dirs}, f)
+        os.replace(tmp_file, index_file)
+    except OSError:
+        # The index is only an optimization
+        pass
+
+
+def _walk_directory(
+    directory: Path,
+    root: Path,
+    accepts: Callable[[str], bool],
+    cached_dirs: Dict[str, dict],
+    trusted_before_ns: int,
+    new_dirs: Dict[str, dict],
+    boundary: Optional[Callable[[str, Path], bool]] = None,
+) -> Iterator[Tuple[str, Optional[Path]]]:
+    """Yield (relative POSIX path, path) for accepted files below `directory`,
+    in sorted path order, pruning skipped directories.
+
+    Each directory's entries are sorted on their own, a subdirectory keyed
+    as "name/" so that it sorts where its files will in the full path list;
+    the walk is depth-first, so the output is globally sorted without ever
+    holding more than the open directories' listings.
+
+    Directories whose mtime matches `cached_dirs` are not listed again; their
+    accepted files and subdirectories come from the index.  Every visited
+    directory is recorded in `new_dirs`.
+
+    A subdirectory for which `boundary(relative POSIX path, path)` is true
+    is not entered; ("path/", None) is yielded in its place.
+    """
+    # One iterator of sorted (key, is_dir) entries per open directory
+    stack: List[Tuple[str, Path, str, Iterator[Tuple[str, bool]]]] = []
 
-    discovered: list[Path] = []
-    seen = set()
+    def open_directory(rel_dir: str, current: Path) -> None:
+        try:
+            mtime_ns = os.stat(current).st_mtime_ns
+        except OSError:
+            return
+        rel_prefix = current.relative_to(root).as_posix()
+        rel_prefix = "" if rel_prefix == "." else rel_prefix + "/"
+        cached = cached_dirs.get(rel_dir)
+        if cached is not None and cached["mtime_ns"] == mtime_ns and mtime_ns < trusted_before_ns:
+            file_names, dir_names = cached["files"], cached["dirs"]
+        else:
+            file_names, dir_names = [], []
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRECTORY_NAMES:
+                                dir_names.append(entry.name)
+                        elif entry.is_file():
+                            if accepts(rel_prefix + entry.name):
+                                file_names.append(entry.name)
+            except OSError:
+                return
+        new_dirs[rel_dir] = {"mtime_ns": mtime_ns, "files": file_names, "dirs": dir_names}
+        listing = [(name, False) for name in file_names] + [(name + "/", True) for name in dir_names]
+        listing.sort()
+        stack.append((rel_dir, current, rel_prefix, iter(listing)))
 
-    for input_item in inputs:
-        resolved_path = input_item.resolve()
+    open_directory(".", directory)
+    while stack:
+        rel_dir, current, rel_prefix, listing = stack[-1]
+        entry = next(listing, None)
+        if entry is None:
+            stack.pop()
+            continue
+        key, is_dir = entry
+        if is_dir:
+            name = key[:-1]
+            if boundary is not None and boundary(rel_prefix + name, current / name):
+                yield rel_prefix + key, None
+            else:
+                open_directory(name if rel_dir == "." else f"{rel_dir}/{name}", current / name)
+        else:
+            yield rel_prefix + key, current / key
+
+
+def walk_directory(
+    directory: Path,
+    root: Path,
+    include_patterns: List[str],
+    exclude_patterns: List[str],
+    index_dir: Optional[Path] = None,
+    boundary: Optional[Callable[[str, Path], bool]] = None,
+) -> Iterator[Tuple[str, Optional[Path]]]:
+    """Yield (relative POSIX path, path) for the relevant files below
+    `directory`, in sorted path order.
+
+    Paths are relative to `root`, which patterns are matched against.  With
+    `index_dir`, the directory's discovery index is used and saved when the
+    walk completes.  Subdirectories for which `boundary` returns true are
+    yielded as ("path/", None) instead of being walked.
+    """
+    accepts = make_path_filter(include_patterns, exclude_patterns)
+    cached_dirs: Dict[str, dict] = {}
+    trusted_before_ns = 0
+    if index_dir:
+        index_key = _index_key(root, include_patterns, exclude_patterns)
+        index_file = _index_file(Path(index_dir), directory)
+        cached_dirs, trusted_before_ns = _load_index(index_file, index_key)
+    started_ns = time.time_ns()
+    new_dirs: Dict[str, dict] = {}
+    yield from _walk_directory(directory, root, accepts, cached_dirs, trusted_before_ns, new_dirs, boundary)
+    if index_dir:
+        _save_index(index_file, index_key, new_dirs, started_ns)
+
+
+def iter_files(
+    inputs: List[Path],
+    root: Path,
+    include_patterns: List[str],
+    exclude_patterns: List[str],
+    index_dir: Optional[Path] = None,
+) -> Iterator[Path]:
+    """Yield relevant files lazily, in sorted POSIX path order.
+
+    Takes the same arguments as `discover_files`.  Each input is walked in
+    sorted order and the inputs' streams are merged, so the first file is
+    produced as soon as the first directory is listed.  Files reached through
+    several overlapping inputs come out of the merge next to each other and
+    are yielded once; no set of seen paths is kept.  A directory input's
+    discovery index is saved when its walk completes.
+    """
+    accepts = make_path_filter(include_patterns, exclude_patterns)
+
+    def walk_input(resolved_path: Path) -> Iterator[Tuple[str, Path]]:
         if resolved_path.is_file():
+            rel_posix = resolved_path.relative_to(root).as_posix()
             # Skip if excluded or in skipped directory
-            if any(part in SKIP_DIRECTORY_NAMES for part in resolved_path.parts):
-                continue
-            if should_take(resolved_path):
-                path_key = resolved_path.as_posix()
-                if path_key not in seen:
-                    seen.add(path_key)
-                    discovered.append(resolved_path)
+            if accepts(rel_posix):
+                yield rel_posix, resolved_path
         elif resolved_path.is_dir():
-            for child in resolved_path.rglob('*'):
-                if not child.is_file():
-                    continue
-                if any(part in SKIP_DIRECTORY_NAMES for part in child.parts):
-                    continue
-                if should_take(child):
-                    child_key = child.resolve().as_posix()
-                    if child_key not in seen:
-                        seen.add(child_key)
-                        discovered.append(child.resolve())
-
-    return sorted(discovered)
\ No newline at end of file
+            if resolved_path != root and any(
+                part in SKIP_DIRECTORY_NAMES for part in resolved_path.relative_to(root).parts
+            ):
+                return
+            yield from walk_directory(resolved_path, root, include_patterns, exclude_patterns, index_dir)
+
+    streams = [walk_input(input_item.resolve()) for input_item in inputs]
+    if not streams:
+        return
+    # Comparing the POSIX strings matches the order the renderers have
+    # always used for file sections and is much cheaper than comparing Paths
+    merged = streams[0] if len(streams) == 1 else heapq.merge(*streams, key=itemgetter(0))
+    previous = None
+    for rel_posix, path in merged:
+        if rel_posix != previous:
+            previous = rel_posix
+            yield path
+
+
+def discover_files(
+    inputs: List[Path],
+    root: Path,
+    include_patterns: List[str],
+    exclude_patterns: List[str],
+    index_dir: Optional[Path] = None,
+) -> List[Path]:
+    """Discover relevant files.
+
+    - inputs: list of files/dirs to scan
+    - root: common project root; patterns are matched against POSIX paths relative to root
+    - include_patterns: glob patterns to include (if empty, use sensible defaults)
+    - exclude_patterns: glob patterns to exclude
+    - index_dir: optional directory for persistent discovery indexes; rescans
+      then only list directories whose mtime changed since the last run
+    Returns a list of absolute Paths to files, sorted by POSIX path; see
+    `iter_files` to consume them as they are found.
+    """
+    return list(iter_files(inputs, root, include_patterns, exclude_patterns, index_dir=index_dir))
@@ -0,0 +1,207 @@
+"""Detect generated, minified and lock files before they are read in full.
+
+Such files pass the default extension filters but rarely help a reader of the
+pack.  Detection is cheap and happens in two stages:
+
+- by path, before any read: well-known lockfile names, minified and source
+  map suffixes, generated-code naming conventions and `linguist-generated`
+  in the root `.gitattributes`;
+- by content, on the sniff buffer (the first `SNIFF_BYTES` already read for
+  binary detection): a canonical "generated, do not edit" marker in the
+  comment block that opens the file and, for code and data formats that get
+  minified (JavaScript, CSS, JSON, ...), very long lines or high byte entropy
+  combined with long lines.
+
+Flagged files are packed as a one-line stub (see `ingest.generated_record`).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+SNIFF_BYTES = 4096
+
+LOCKFILE_NAMES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+    "bun.lockb", "poetry.lock", "Pipfile.lock", "pdm.lock", "uv.lock",
+    "Cargo.lock", "composer.lock", "Gemfile.lock", "go.sum", "mix.lock",
+    "pubspec.lock", "Podfile.lock", "packages.lock.json", "flake.lock",
+}
+
+# (suffix, reason); matched against the lower-cased file name
+_NAME_SUFFIXES = (
+    (".min.js", "minified"), (".min.css", "minified"), (".min.mjs", "minified"),
+    ("-min.js", "minified"), (".bundle.js", "minified"),
+    (".js.map", "source-map"), (".css.map", "source-map"), (".map", "source-map"),
+    ("_pb2.py", "generated-code"), ("_pb2_grpc.py", "generated-code"), ("_pb2.pyi", "generated-code"),
+    (".pb.go", "generated-code"), (".pb.cc", "generated-code"), (".pb.h", "generated-code"),
+    ("_pb.js", "generated-code"), ("_pb.d.ts", "generated-code"), (".pb.swift", "generated-code"),
+    (".g.dart", "generated-code"), (".freezed.dart", "generated-code"),
+    (".designer.cs", "generated-code"), (".g.cs", "generated-code"),
+)
+
+# Canonical markers of generated code, looked for in the file's leading
+# comment block only: @generated (Phabricator/Meta), Go's "Code generated ...
+# DO NOT EDIT.", protoc's "Generated by ... DO NOT EDIT!" and "This file was
+# (automatically) generated"
+_GENERATED_MARKER = re.compile(
+    rb"@generated\b|\b(?:code )?generated by\b.*\bdo not edit\b|"
+    rb"\bthis file (?:was|is|has been) (?:automatically |auto-?)?generated\b",
+    re.IGNORECASE,
+)
+# Comments that may open the leading block, at column 0, and the ends of the
+# block comments among them
+_LINE_COMMENTS = (b"#", b"//", b"--", b";", b"%")
+_BLOCK_COMMENTS = ((b"/*", b"*/"), (b"<!--", b"-->"))
+_HEADER_LINES = 10
+_HEADER_BYTES = 1024
+
+
+def _leading_comments(sniff: bytes) -> List[bytes]:
+    """The comment lines that open the file, up to its first line of code."""
+    comments = []
+    block_end = None
+    for line in sniff[:_HEADER_BYTES].split(b"\n")[:_HEADER_LINES]:
+        line = line.rstrip(b"\r")
+        if block_end is not None:
+            comments.append(line)
+            if block_end in line:
+                block_end = None
+            continue
+        if not line.strip():
+            continue
+        opener = next(((start, end) for start, end in _BLOCK_COMMENTS if line.startswith(start)), None)
+        if opener is not None:
+            comments.append(line)
+            if opener[1] not in line[len(opener[0]):]:
+                block_end = opener[1]
+        elif line.startswith(_LINE_COMMENTS):
+            comments.append(line)
+        else:
+            break
+    return comments
+
+
+# Line-length and entropy thresholds for the sniff buffer
+_MIN_SNIFF_FOR_STATS = 1024
+_MINIFIED_MAX_LINE = 1000
+_MINIFIED_MEAN_LINE = 300
+_ENTROPY_BITS = 5.5
+_ENTROPY_MEAN_LINE = 100
+# Only code and data formats that get minified or inlined are judged by those
+# thresholds; prose (.md, .rst, .txt, ...) often has unwrapped paragraphs
+_STATS_EXTENSIONS = {
+    ".js", ".mjs", ".cjs", ".jsx", ".ts", ".tsx", ".css", ".scss", ".less",
+    ".json", ".map", ".svg", ".xml", ".html", ".htm",
+}
+
+
+def _parse_gitattributes(text: str) -> List[Tuple[str, bool]]:
+    """(pattern, generated) rules for `linguist-generated`, in file order."""
+    rules = []
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts or parts[0].startswith("#"):
+            continue
+        pattern, attributes = parts[0], parts[1:]
+        for attribute in attributes:
+            if attribute in ("linguist-generated", "linguist-generated=true"):
+                rules.append((pattern, True))
+            elif attribute in ("-linguist-generated", "!linguist-generated", "linguist-generated=false"):
+                rules.append((pattern, False))
+    return rules
+
+
+def _attribute_matches(pattern: str, rel_path: str) -> bool:
+    if pattern.endswith("/**"):
+        return rel_path.startswith(pattern[:-3].lstrip("/") + "/")
+    if "/" not in pattern.rstrip("/"):
+        return fnmatch(rel_path.rsplit("/", 1)[-1], pattern)
+    return fnmatch(rel_path, pattern.lstrip("/").replace("**/", "*"))
+
+
+def byte_entropy(data: bytes) -> float:
+    """Shannon entropy of `data` in bits per byte (0.0 for empty data)."""
+    if not data:
+        return 0.0
+    total = len(data)
+    return -sum(count / total * math.log2(count / total) for count in Counter(data).values())
+
+
+class GeneratedDetector:
+    """Classifies files as generated/minified/lockfile, returning a reason.
+
+    - gitattributes: text of the `.gitattributes` at the pack root, if any
+
+    Explicit `-linguist-generated` (or `=false`) in `.gitattributes`
+    overrides every other rule for the matching files.
+    """
+
+    def __init__(self, gitattributes: str = ""):
+        self._rules = _parse_gitattributes(gitattributes)
+
+    @classmethod
+    def for_directory(cls, root: Path) -> "GeneratedDetector":
+        """A detector using `root/.gitattributes` when present."""
+        try:
+            text = (root / ".gitattributes").read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            text = ""
+        return cls(text)
+
+    @classmethod
+    def for_revision(cls, blob_reader, rev: str) -> "GeneratedDetector":
+        """A detector using the `.gitattributes` of tree-ish `rev` (read
+        through a `GitBlobReader` opened at the pack root) when present."""
+        try:
+            raw, _ = blob_reader.read(f"{rev}:./.gitattributes")
+        except KeyError:
+            raw = b""
+        return cls(raw.decode("utf-8", errors="replace"))
+
+    def _linguist_generated(self, rel_path: str) -> Optional[bool]:
+        verdict = None
+        for pattern, generated in self._rules:
+            if _attribute_matches(pattern, rel_path):
+                verdict = generated
+        return verdict
+
+    def classify_path(self, rel_path: str) -> Optional[str]:
+        """Reason `rel_path` is generated judging by its name alone, or None."""
+        verdict = self._linguist_generated(rel_path)
+        if verdict is not None:
+            return "linguist-generated" if verdict else None
+        name = rel_path.rsplit("/", 1)[-1]
+        if name in LOCKFILE_NAMES:
+            return "lockfile"
+        lower = name.lower()
+        for suffix, reason in _NAME_SUFFIXES:
+            if lower.endswith(suffix):
+                return reason
+        return None
+
+    def classify_content(self, rel_path: str, sniff: bytes) -> Optional[str]:
+        """Reason a file is generated judging by its first bytes, or None."""
+        if self._linguist_generated(rel_path) is False:
+            return None
+        sniff = sniff[:SNIFF_BYTES]
+        if any(_GENERATED_MARKER.search(line) for line in _leading_comments(sniff)):
+            return "generated-header"
+        if len(sniff) < _MIN_SNIFF_FOR_STATS or Path(rel_path).suffix.lower() not in _STATS_EXTENSIONS:
+            return None
+        lines = sniff.split(b"\n")
+        # The last line may be cut off by the sniff buffer; it still counts
+        longest = max(len(line) for line in lines)
+        mean = len(sniff) / len(lines)
+        if longest >= _MINIFIED_MAX_LINE or mean >= _MINIFIED_MEAN_LINE:
+            return "minified-content"
+        if mean >= _ENTROPY_MEAN_LINE and byte_entropy(sniff) >= _ENTROPY_BITS:
+            return "high-entropy"
+        return None
+
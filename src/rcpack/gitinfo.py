@@ -1,19 +1,33 @@
 from __future__ import annotations
 
 import subprocess
+import threading
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
 
-def _git(cmd: list[str], cwd: Path) -> str:
+def _check_git_command(cmd: list[str]) -> None:
     # Validate git commands to prevent injection
     allowed_commands = {
-        "rev-parse", "show", "log", "status", "branch", "config"
+        "rev-parse", "show", "log", "status", "branch", "config",
+        "diff", "cat-file", "ls-tree",
     }
     if not cmd or cmd[0] not in allowed_commands:
         raise ValueError(f"Git command not allowed: {cmd[0] if cmd else 'empty'}")
-    
-    out = subprocess.check_output(["git", *cmd], cwd=str(cwd), timeout=30)
+
+
+def _git_bytes(cmd: list[str], cwd: Path, quiet: bool = False) -> bytes:
+    """Run an allowed git command and return its raw output (for -z formats).
+
+    With `quiet`, git's error messages are discarded instead of reaching stderr.
+    """
+    _check_git_command(cmd)
+    stderr = subprocess.DEVNULL if quiet else None
+    return subprocess.check_output(["git", *cmd], cwd=str(cwd), timeout=30, stderr=stderr)
+
+
+def _git(cmd: list[str], cwd: Path, quiet: bool = False) -> str:
+    out = _git_bytes(cmd, cwd, quiet=quiet)
     return out.decode("utf-8", errors="replace").strip()
 
 
@@ -25,15 +39,38 @@ def is_git_repo(path: Path) -> bool:
         return False
 
 
-def get_git_info(path: Path) -> Dict[str, Any]:
+def get_git_info(path: Path, rev: Optional[str] = None) -> Dict[str, Any]:
     """
-    Return info for the current HEAD of a repo rooted at `path`.
+    Return info for the current HEAD of a repo rooted at `path`, or for the
+    commit `rev` points to (the branch is then reported as `rev` itself).
+
+    A `rev` naming a tree rather than a commit (e.g. "HEAD:src" or a tree
+    id) has no commit, author or date; its tree id is given in the note.
     """
     try:
-        commit = _git(["rev-parse", "HEAD"], cwd=path)
-        branch = _git(["rev-parse", "--abbrev-ref", "HEAD"], cwd=path)
-        author = _git(["show", "-s", "--format=%an <%ae>"], cwd=path)
-        date = _git(["show", "-s", "--date=local", "--format=%ad"], cwd=path)
+        if rev is None:
+            commit = _git(["rev-parse", "HEAD"], cwd=path)
+            branch = _git(["rev-parse", "--abbrev-ref", "HEAD"], cwd=path)
+        else:
+            try:
+                # Fails for trees; that is expected and not worth a message
+                commit = _git(["rev-parse", "-q", "--verify", "--end-of-options", f"{rev}^{{commit}}"], cwd=path,
+                              quiet=True)
+            except subprocess.CalledProcessError:
+                # Peel the resolved id: in "HEAD:src^{tree}" the suffix would be read as part of the path
+                object_id = _git(["rev-parse", "--verify", "--end-of-options", rev], cwd=path)
+                tree = _git(["rev-parse", "--verify", "--end-of-options", f"{object_id}^{{tree}}"], cwd=path)
+                return {
+                    "is_repo": True,
+                    "commit": None,
+                    "branch": rev,
+                    "author": None,
+                    "date": None,
+                    "note": f"Tree {tree}",
+                }
+            branch = rev
+        author = _git(["show", "-s", "--format=%an <%ae>", commit], cwd=path)
+        date = _git(["show", "-s", "--date=local", "--format=%ad", commit], cwd=path)
         return {
             "is_repo": True,
             "commit": commit,
@@ -52,3 +89,181 @@ def get_git_info(path: Path) -> Dict[str, Any]:
             "date": None,
             "note": "Not a git repository",
         }
+
+
+_CHANGE_STATUS = {
+    "A": "added", "M": "modified", "D": "deleted", "R": "renamed",
+    "C": "copied", "T": "type-changed", "U": "unmerged",
+}
+
+
+def parse_diff_range(diff_range: Optional[str]) -> Tuple[List[str], Optional[str]]:
+    """Split a `--diff` argument into git diff revision args and the target revision.
+
+    "A..B" and "A...B" read contents at B (HEAD if omitted); a single
+    revision "A" compares against the working tree, so the target is None.
+    """
+    if not diff_range:
+        return [], None
+    for separator in ("...", ".."):
+        if separator in diff_range:
+            _, head = diff_range.split(separator, 1)
+            return [diff_range], head or "HEAD"
+    return [diff_range], None
+
+
+def diff_target(diff_range: Optional[str] = None, staged: bool = False) -> Optional[str]:
+    """Return where changed file contents are read from for a diff.
+
+    A revision name for "A..B", "" for the index when `staged`, or None for
+    the working tree.
+    """
+    _, head = parse_diff_range(diff_range)
+    if staged:
+        if head is not None:
+            raise ValueError("--staged compares the index with a single base revision, not a range")
+        return ""
+    return head
+
+
+def describe_diff(diff_range: Optional[str] = None, staged: bool = False) -> str:
+    """Human-readable description of what a diff compares, e.g. "main..index"."""
+    target = diff_target(diff_range, staged)
+    if target is not None and target != "":
+        return diff_range
+    base = diff_range or "HEAD"
+    return f"{base}..index" if staged else f"{base}..working tree"
+
+
+def get_changed_files(path: Path, diff_range: Optional[str] = None, staged: bool = False) -> List[Dict[str, Any]]:
+    """
+    Return the files changed by `diff_range` (and/or in the index when `staged`)
+    with one `git diff --name-status -z` call.
+
+    Paths are relative to `path`; changes outside it are ignored.  Each entry
+    has "status" (added, modified, deleted, renamed, ...), "path" and, for
+    renames and copies, "old_path".
+    """
+    revision_args, _ = parse_diff_range(diff_range)
+    cmd = ["diff", "--name-status", "-z", "--relative", "--no-ext-diff"]
+    if staged:
+        cmd.append("--cached")
+    raw = _git_bytes([*cmd, *revision_args, "--"], cwd=path)
+
+    fields = raw.decode("utf-8", errors="surrogateescape").split("\0")
+    changes: List[Dict[str, Any]] = []
+    index = 0
+    while index < len(fields) and fields[index]:
+        code = fields[index][0]
+        if code in ("R", "C"):
+            old_path, new_path = fields[index + 1], fields[index + 2]
+            index += 3
+        else:
+            old_path, new_path = None, fields[index + 1]
+            index += 2
+        changes.append({
+            "status": _CHANGE_STATUS.get(code, "changed"),
+            "path": new_path,
+            "old_path": old_path,
+        })
+    return changes
+
+
+def get_diff_patches(path: Path, diff_range: Optional[str] = None, staged: bool = False) -> Dict[str, str]:
+    """Return unified diff hunks per (new) path, from a single `git diff` call."""
+    revision_args, _ = parse_diff_range(diff_range)
+    cmd = ["diff", "--relative", "--no-color", "--no-ext-diff"]
+    if staged:
+        cmd.append("--cached")
+    patch = _git_bytes([*cmd, *revision_args, "--"], cwd=path).decode("utf-8", errors="replace")
+
+    patches: Dict[str, str] = {}
+    for block in ("\n" + patch).split("\ndiff --git ")[1:]:
+        header, _, body = block.partition("\n")
+        # Header is "a/<old> b/<new>"; unusual paths are quoted and skipped
+        if not header.startswith("a/") or " b/" not in header:
+            continue
+        new_path = header[header.rindex(" b/") + 3:]
+        patches[new_path] = f"diff --git {header}\n{body}".rstrip("\n")
+    return patches
+
+
+def list_tree(path: Path, rev: str) -> List[Tuple[str, str, int]]:
+    """
+    List the files of tree-ish `rev` below `path` with one `git ls-tree -r -z -l`
+    call, as (relative path, blob id, size) in path order.
+
+    Sizes come from the object store, so nothing in the working tree is
+    touched.  Symlinks and submodules are left out.
+    """
+    raw = _git_bytes(["ls-tree", "-r", "-z", "-l", "--end-of-options", rev], cwd=path)
+    files: List[Tuple[str, str, int]] = []
+    for line in raw.decode("utf-8", errors="surrogateescape").split("\0"):
+        if not line:
+            continue
+        meta, _, rel_path = line.partition("\t")
+        mode, object_type, object_id, size = meta.split()
+        if object_type != "blob" or mode == "120000":
+            continue
+        files.append((rel_path, object_id, int(size)))
+    return files
+
+
+class GitBlobReader:
+    """Read blobs through a single long-lived `git cat-file --batch` process.
+
+    Object names may be anything cat-file accepts, e.g. a blob id,
+    "HEAD:./src/app.py" (relative to `path`) or ":./src/app.py" for the
+    index, so one reader can serve any number of revisions.  Safe to share
+    between threads; use as a context manager so the process is reaped.
+    """
+
+    def __init__(self, path: Path):
+        cmd = ["cat-file", "--batch"]
+        _check_git_command(cmd)
+        self._process = subprocess.Popen(
+            ["git", *cmd], cwd=str(path),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "GitBlobReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._process.poll() is None:
+                self._process.stdin.close()
+                self._process.wait(timeout=30)
+
+    def cancel(self) -> None:
+        """Abort a read in progress (its caller gets an error) and stop the
+        process; the reader cannot be used afterwards."""
+        if self._process.poll() is None:
+            self._process.kill()
+
+    def read(self, object_name: str, max_bytes: Optional[int] = None) -> Tuple[bytes, int]:
+        """Return (data, size) for `object_name`, keeping at most `max_bytes`
+        (plus one, so callers can tell the blob was cut) of the data.
+
+        Raises KeyError if the object does not exist.
+        """
+        with self._lock:
+            self._process.stdin.write(object_name.encode("utf-8", errors="surrogateescape") + b"\n")
+            self._process.stdin.flush()
+            header = self._process.stdout.readline().decode("utf-8", errors="replace").split()
+            if len(header) != 3:
+                raise KeyError(object_name)
+            size = int(header[2])
+            keep = size if max_bytes is None else min(size, max_bytes + 1)
+            data = self._process.stdout.read(keep)
+            remaining = size - keep + 1  # rest of the blob plus its trailing newline
+            while remaining > 0:
+                chunk = self._process.stdout.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+            return data, size
@@ -0,0 +1,142 @@
+"""File ingestion: turn a discovered file into a record the renderers can consume."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from .io_utils import decode_text, is_binary_bytes
+
+
+DEFAULT_MAX_FILE_BYTES = 16_384
+
+
+@dataclass
+class FileRecord:
+    """A single ingested file.
+
+    - path: POSIX path relative to the pack root
+    - content: text that ends up in the pack (placeholders and notes included)
+    - size: size of the source file in bytes, or None when unknown
+    - lines: number of lines of real content (notes excluded)
+    - outlined: content was reduced to an outline; original_chars is its
+      length before that
+    - diff: unified diff hunks for the file in diff-scoped packs
+    - generated: why the file was detected as generated/minified/lockfile
+      and packed as a stub (see rcpack.generated)
+    - mtime_ns / blob: where the file came from, for manifests (see
+      rcpack.delta); sha256 caches the hash of the packed content
+    - spilled: (offset, length) of the content in a SpillStore segment file
+      while it is held on disk; content is empty meanwhile
+    """
+
+    path: str
+    content: str
+    size: Optional[int] = None
+    encoding: Optional[str] = None
+    truncated: bool = False
+    binary: bool = False
+    lines: int = 0
+    outlined: bool = False
+    original_chars: Optional[int] = None
+    diff: Optional[str] = None
+    spilled: Optional[Tuple[int, int]] = None
+    generated: Optional[str] = None
+    mtime_ns: Optional[int] = None
+    blob: Optional[str] = None
+    sha256: Optional[str] = None
+
+
+# Takes (rel_path, first bytes) and returns why the file is generated, or None
+ContentClassifier = Callable[[str, bytes], Optional[str]]
+
+
+def count_lines(content: str) -> int:
+    """Count lines the way the packager always has: a trailing partial line counts."""
+    return content.count("\n") + (1 if content and not content.endswith("\n") else 0)
+
+
+def _truncation_note(max_bytes: int) -> str:
+    return f"\n\n[... TRUNCATED to first {max_bytes} bytes ...]"
+
+
+def truncate_record(record: FileRecord, max_bytes: int) -> FileRecord:
+    """Cut a text record read past `max_bytes` back to that limit, in place,
+    as if it had been read with it (used when a wider read was not needed)."""
+    if record.binary or record.generated is not None:
+        return record
+    content = record.content
+    if record.truncated:
+        content = content[:content.rindex("\n\n[... TRUNCATED to first ")]
+    raw = content.encode(record.encoding or "utf-8", errors="replace")
+    if len(raw) <= max_bytes:
+        return record
+    content, encoding = decode_text(raw[:max_bytes])
+    record.content = content + _truncation_note(max_bytes)
+    record.encoding = encoding
+    record.truncated = True
+    record.lines = count_lines(content)
+    return record
+
+
+def generated_record(rel_path: str, size: Optional[int], reason: str) -> FileRecord:
+    """The one-line stub packed in place of a generated file."""
+    name = rel_path.rsplit("/", 1)[-1]
+    size_note = f", {size} bytes" if size is not None else ""
+    return FileRecord(
+        path=rel_path,
+        content=f"[Generated file skipped: {name}{size_note} ({reason})]",
+        size=size,
+        generated=reason,
+    )
+
+
+def read_file_record(path: Path, rel_path: str, max_bytes: int = DEFAULT_MAX_FILE_BYTES,
+                     classify: Optional[ContentClassifier] = None) -> FileRecord:
+    """Read `path` into a FileRecord, skipping binaries and truncating at `max_bytes`.
+
+    The file is read once; binary detection and `classify` look at its
+    first bytes.
+    """
+    stat = path.stat()
+    try:
+        with open(path, "rb") as fb:
+            raw = fb.read(max_bytes + 1)
+    except OSError:
+        # Unreadable files are treated like binaries
+        raw = b"\x00"
+    record = record_from_bytes(rel_path, raw, stat.st_size, max_bytes=max_bytes, classify=classify, name=path.name)
+    record.mtime_ns = stat.st_mtime_ns
+    return record
+
+
+def record_from_bytes(rel_path: str, raw: bytes, size: int, max_bytes: int = DEFAULT_MAX_FILE_BYTES,
+                      classify: Optional[ContentClassifier] = None, name: Optional[str] = None) -> FileRecord:
+    """Build a FileRecord from in-memory data that holds at least the first
+    `max_bytes + 1` bytes of a `size`-byte file (git blobs, archive members)."""
+    name = name or rel_path.rsplit("/", 1)[-1]
+    if is_binary_bytes(raw[:2048]):
+        return FileRecord(
+            path=rel_path,
+            content=f"[Binary file skipped: {name}, {size} bytes]",
+            size=size,
+            binary=True,
+        )
+    reason = classify(rel_path, raw) if classify is not None else None
+    if reason is not None:
+        return generated_record(rel_path, size, reason)
+
+    truncated = len(raw) > max_bytes
+    content, encoding = decode_text(raw[:max_bytes])
+    lines = count_lines(content)
+    if truncated:
+        content += _truncation_note(max_bytes)
+    return FileRecord(
+        path=rel_path,
+        content=content,
+        size=size,
+        encoding=encoding,
+        truncated=truncated,
+        lines=lines,
+    )
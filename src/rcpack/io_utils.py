@@ -1,7 +1,9 @@
 """I/O utilities for file operations."""
 
+import sys
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Tuple
+from typing import Iterator, Optional, TextIO, Tuple
 
 
 def write_output(output_path: str, content: str) -> None:
@@ -16,16 +18,34 @@ def write_output(output_path: str, content: str) -> None:
         f.write(content)
 
 
+@contextmanager
+def open_output(output_path: Optional[str] = None) -> Iterator[TextIO]:
+    """Open an output stream for incremental writing: a file, or stdout if no path is given."""
+    if not output_path:
+        yield sys.stdout
+        return
+
+    output_file = Path(output_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        yield f
+
+
+def is_binary_bytes(chunk: bytes) -> bool:
+    """Heuristically determine if a leading chunk of data is binary."""
+    if b"\x00" in chunk:
+        return True
+    # If the chunk has a lot of non-text bytes, consider it binary
+    text_byte_count = sum(32 <= b <= 126 or b in (9, 10, 13) for b in chunk)
+    return (len(chunk) - text_byte_count) > max(1, len(chunk) // 3)
+
+
 def is_binary_file(path: Path, sniff_bytes: int = 2048) -> bool:
     """Heuristically determine if a file is binary by scanning for NUL bytes."""
     try:
         with open(path, 'rb') as fb:
             chunk = fb.read(sniff_bytes)
-        if b"\x00" in chunk:
-            return True
-        # If the chunk has a lot of non-text bytes, consider it binary
-        text_byte_count = sum(32 <= b <= 126 or b in (9, 10, 13) for b in chunk)
-        return (len(chunk) - text_byte_count) > max(1, len(chunk) // 3)
+        return is_binary_bytes(chunk)
     except Exception:
         # If we cannot read, treat as binary to avoid further processing
         return True
@@ -44,12 +64,21 @@ def read_text_safely(path: Path, max_bytes: int = 16_384) -> Tuple[str, str, boo
         truncated = True
         raw = raw[:max_bytes]
 
+    text, enc = decode_text(raw)
+    return text, enc, truncated
+
+
+def decode_text(raw: bytes) -> Tuple[str, str]:
+    """Decode bytes with encoding fallbacks.
+
+    Returns (text, encoding_used).
+    """
     for enc in ("utf-8", "utf-16", "utf-16-le", "utf-16-be", "latin-1"):
         try:
             text = raw.decode(enc)
-            return text, enc, truncated
+            return text, enc
         except Exception:
             continue
     # Fallback: replace errors with utf-8
     text = raw.decode("utf-8", errors="replace")
-    return text, "utf-8", truncated
\ No newline at end of file
+    return text, "utf-8"
\ No newline at end of file
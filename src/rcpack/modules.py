@@ -0,0 +1,178 @@
+"""Module-aware discovery for superprojects with submodules and nested repos.
+
+A directory holding a `.git` entry (a directory for a nested repository, a
+file for a submodule checkout) is a module boundary.  Each module is handed
+to a worker thread that reads its git metadata and walks its files, stopping
+at the boundaries of the modules nested in it; those are handed to workers
+of their own as soon as their parent directory is listed.
+
+The walk of the pack root runs in the calling thread and yields files in
+pack order.  When it reaches a module it yields that module's files, waiting
+for its worker only if it has not finished yet, so the output is the same
+sorted path list as a plain walk while the modules are scanned side by side.
+
+`cancel()` (e.g. at a pack deadline) stops the walks in progress at their
+next entry and drops the modules still queued; those are reported by
+`unscanned()` and listed in `info()` with unscanned=True.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .discover import walk_directory
+from .gitinfo import get_git_info
+
+
+DEFAULT_MODULE_WORKERS = 4
+
+
+def is_module_root(path: Path) -> bool:
+    """True if `path` is the top of a git checkout (nested repo or submodule)."""
+    return os.path.lexists(path / ".git")
+
+
+class ModuleScanner:
+    """Discovers the files of a directory module by module, in parallel.
+
+    - root: the pack root (patterns are matched against paths relative to it)
+    - max_depth: modules nested deeper than this (a module directly inside
+      the root has depth 1) are walked as plain directories of their parent
+    - skip: glob patterns of module paths to leave out of the pack entirely
+
+    Use as a context manager so the worker threads are shut down.  After
+    discovery, `info` describes the modules found and `tree_roots` labels
+    their directories for the tree.  `cancel` may be called from any thread
+    to stop discovery early.
+    """
+
+    def __init__(self, root: Path, include_patterns: Optional[List[str]] = None,
+                 exclude_patterns: Optional[List[str]] = None, max_depth: Optional[int] = None,
+                 skip: Iterable[str] = (), index_dir: Optional[Path] = None,
+                 workers: int = DEFAULT_MODULE_WORKERS):
+        self.root = root
+        self._include = include_patterns or []
+        self._exclude = exclude_patterns or []
+        self.max_depth = max_depth
+        self._skip = list(skip)
+        self._index_dir = index_dir
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rcpack-module")
+        self._futures: Dict[str, Future] = {}
+        self._modules: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def __enter__(self) -> "ModuleScanner":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def cancel(self) -> None:
+        """Stop discovery: walks in progress end at their next entry and
+        queued modules are never scanned.  Does not wait for the workers."""
+        self._cancelled.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        # A cancelled scan is abandoned; its workers stop on their own
+        self._executor.shutdown(wait=not self._cancelled.is_set(), cancel_futures=True)
+
+    def _mark_unscanned(self, rel_dir: str, depth: int) -> None:
+        with self._lock:
+            self._modules[rel_dir] = {"path": rel_dir, "depth": depth, "unscanned": True}
+
+    def _boundary(self, depth: int) -> Callable[[str, Path], bool]:
+        """The boundary test for the walk of a module at `depth`."""
+
+        def boundary(rel_dir: str, path: Path) -> bool:
+            if self.max_depth is not None and depth >= self.max_depth:
+                return False
+            if not is_module_root(path):
+                return False
+            if any(fnmatch(rel_dir, pattern) for pattern in self._skip):
+                with self._lock:
+                    self._modules[rel_dir] = {"path": rel_dir, "depth": depth + 1, "skipped": True}
+                return True
+            # Listed as unscanned until its worker has walked it
+            self._mark_unscanned(rel_dir, depth + 1)
+            if self._cancelled.is_set():
+                return True
+            try:
+                future = self._executor.submit(self._scan, rel_dir, path, depth + 1)
+            except RuntimeError:
+                # cancel() shut the executor down in the meantime
+                return True
+            with self._lock:
+                self._futures[rel_dir] = future
+            return True
+
+        return boundary
+
+    def _scan(self, rel_dir: str, path: Path, depth: int) -> List[Tuple[str, Optional[Path]]]:
+        """Git metadata and file list of one module (worker thread)."""
+        repo_info = get_git_info(path)
+        items = []
+        for item in walk_directory(
+            path, self.root, self._include, self._exclude,
+            index_dir=self._index_dir, boundary=self._boundary(depth),
+        ):
+            if self._cancelled.is_set():
+                return items
+            items.append(item)
+        with self._lock:
+            self._modules[rel_dir] = {
+                "path": rel_dir,
+                "depth": depth,
+                "repo_info": repo_info,
+                "files": sum(1 for _, file_path in items if file_path is not None),
+            }
+        return items
+
+    def _expand(self, items: Iterable[Tuple[str, Optional[Path]]]) -> Iterator[Path]:
+        for rel_path, path in items:
+            if self._cancelled.is_set():
+                return
+            if path is not None:
+                yield path
+                continue
+            with self._lock:
+                future = self._futures.get(rel_path[:-1])
+            if future is not None:
+                try:
+                    module_items = future.result()
+                except CancelledError:
+                    return
+                yield from self._expand(module_items)
+
+    def iter_files(self) -> Iterator[Path]:
+        """Yield the files of the root and every module, in pack order."""
+        yield from self._expand(walk_directory(
+            self.root, self.root, self._include, self._exclude,
+            index_dir=self._index_dir, boundary=self._boundary(0),
+        ))
+
+    def info(self) -> List[Dict[str, Any]]:
+        """The modules found so far, in path order: path, depth and either
+        repo_info and a file count, skipped=True or unscanned=True."""
+        with self._lock:
+            return [self._modules[path] for path in sorted(self._modules)]
+
+    def unscanned(self) -> List[str]:
+        """Paths of the modules found but not (fully) scanned, e.g. after `cancel`."""
+        return [module["path"] for module in self.info() if module.get("unscanned")]
+
+    def tree_roots(self) -> Dict[str, str]:
+        """Tree labels for the module directories, e.g. "module @ 1a2b3c4d"."""
+        roots = {}
+        for module in self.info():
+            if module.get("skipped") or module.get("unscanned"):
+                continue
+            commit = module["repo_info"].get("commit")
+            roots[module["path"]] = f"module @ {commit[:8]}" if commit else "module"
+        return roots
@@ -0,0 +1,246 @@
+"""Outline extraction: reduce source files to their signatures.
+
+Python files are parsed with `ast` and reduced to the module docstring,
+decorators and class/function signatures.  Other languages known to
+`get_language_from_extension` fall back to a line-based regex outline.
+Parsing runs in a process pool and results are cached by content hash.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .ingest import FileRecord, count_lines
+from .utils import get_language_from_extension
+
+
+# Bump when the outline format changes so on-disk caches are not reused
+OUTLINE_VERSION = "2"
+
+# Outlines are small, so files are read well past the normal byte limit
+OUTLINE_MAX_FILE_BYTES = 1_048_576
+
+# Below this size a round trip to the process pool costs more than parsing
+_INLINE_CHARS = 4_096
+
+_DECLARATION = r"(?:export\s+)?(?:default\s+)?(?:declare\s+)?(?:abstract\s+)?(?:async\s+)?"
+
+_REGEX_OUTLINES = {
+    "python": r"^\s*(?:@|(?:async\s+)?def\s|class\s)",
+    "javascript": r"^\s*" + _DECLARATION + r"(?:function\b|class\b|(?:const|let|var)\s+\w+\s*=\s*(?:async\s*)?(?:function\b|\([^)]*\)\s*=>|\w+\s*=>))",
+    "typescript": r"^\s*" + _DECLARATION + r"(?:function\b|class\b|interface\b|type\s+\w+|enum\b|namespace\b|(?:const|let|var)\s+\w+\s*(?::[^=]+)?=\s*(?:async\s*)?(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|\w+\s*=>))",
+    "java": r"^\s*(?:@\w+|(?:(?:public|protected|private|static|final|abstract|sealed|synchronized|native|default)\s+)*(?:class|interface|enum|record)\b|(?:(?:public|protected|private|static|final|abstract|synchronized|native|default)\s+)+[\w<>\[\],.? ]+\s+\w+\s*\()",
+    "csharp": r"^\s*(?:\[\w+|(?:(?:public|protected|private|internal|static|sealed|abstract|partial|virtual|override|async)\s+)*(?:class|interface|struct|enum|record|namespace)\b|(?:(?:public|protected|private|internal|static|virtual|override|abstract|async)\s+)+[\w<>\[\],.? ]+\s+\w+\s*\()",
+    "kotlin": r"^\s*(?:@\w+|(?:\w+\s+)*(?:fun|class|interface|object)\b)",
+    "swift": r"^\s*(?:@\w+|(?:(?:public|private|internal|open|fileprivate|static|final|override|mutating)\s+)*(?:func|class|struct|enum|protocol|extension)\b)",
+    "go": r"^(?:func|type)\b",
+    "rust": r"^\s*(?:#\[|(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?(?:fn|struct|enum|trait|impl|mod|type)\b)",
+    "c": r"^(?:(?:typedef\s+)?(?:struct|union|enum)\b|#define\s|[A-Za-z_][\w \t\*]*\b\w+\s*\([^;]*$)",
+    "cpp": r"^\s*(?:template\s*<|(?:typedef\s+)?(?:class|struct|union|enum|namespace)\b|#define\s|[A-Za-z_][\w \t\*&:<>,~]*\b[\w~]+\s*\([^;]*$)",
+    "php": r"^\s*(?:(?:abstract|final|public|protected|private|static)\s+)*(?:function|class|interface|trait|enum)\b",
+    "ruby": r"^\s*(?:def|class|module)\b",
+    "bash": r"^\s*(?:function\s+\w+|\w+\s*\(\)\s*\{?)",
+    "fish": r"^\s*function\b",
+    "sql": r"(?i)^\s*(?:create|alter)\s+",
+    "markdown": r"^#{1,6}\s",
+}
+
+_COMPILED_OUTLINES = {language: re.compile(pattern) for language, pattern in _REGEX_OUTLINES.items()}
+
+
+def _outline_python_node(node: ast.AST, depth: int, out: List[str]) -> None:
+    pad = "    " * depth
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        for decorator in node.decorator_list:
+            out.append(f"{pad}@{ast.unparse(decorator)}")
+        keyword = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+        out.append(f"{pad}{keyword} {node.name}({ast.unparse(node.args)}){returns}: ...")
+    elif isinstance(node, ast.ClassDef):
+        for decorator in node.decorator_list:
+            out.append(f"{pad}@{ast.unparse(decorator)}")
+        bases = [ast.unparse(base) for base in node.bases]
+        bases += [
+            f"{kw.arg}={ast.unparse(kw.value)}" if kw.arg else f"**{ast.unparse(kw.value)}"
+            for kw in node.keywords
+        ]
+        out.append(f"{pad}class {node.name}({', '.join(bases)}):" if bases else f"{pad}class {node.name}:")
+        members = [
+            child for child in node.body
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+        ]
+        if not members:
+            out.append(f"{pad}    ...")
+        for child in members:
+            _outline_python_node(child, depth + 1, out)
+
+
+def outline_python(source: str) -> str:
+    """Return the docstring/decorator/signature outline of Python `source`.
+
+    Raises SyntaxError (or ValueError) if the source does not parse.
+    """
+    module = ast.parse(source)
+    out: List[str] = []
+    docstring = ast.get_docstring(module, clean=False)
+    if docstring is not None:
+        out.append(f'"""{docstring}"""')
+    for node in module.body:
+        _outline_python_node(node, 0, out)
+    return "\n".join(out)
+
+
+def outline_regex(source: str, language: str) -> Optional[str]:
+    """Return the lines of `source` that look like declarations, or None if
+    there is no outline pattern for `language`."""
+    pattern = _COMPILED_OUTLINES.get(language)
+    if pattern is None:
+        return None
+    return "\n".join(line.rstrip() for line in source.splitlines() if pattern.match(line))
+
+
+def outline_source(source: str, language: str) -> Optional[str]:
+    """Outline `source` written in `language`; None means "keep the full file".
+
+    An empty outline (no declarations found) also keeps the full file.
+    """
+    outline = None
+    if language == "python":
+        try:
+            outline = outline_python(source)
+        except (SyntaxError, ValueError):
+            pass
+    if outline is None:
+        outline = outline_regex(source, language)
+    return outline if outline and outline.strip() else None
+
+
+class Outliner:
+    """Outlines file records in a process pool, with a content-hash cache.
+
+    - processes: size of the process pool (default: CPU count); 1 parses inline
+    - cache_dir: optional directory to persist outlines across runs
+
+    Safe to call from several ingestion threads at once.  Use as a context
+    manager so the pool is shut down.
+    """
+
+    def __init__(self, processes: Optional[int] = None, cache_dir: Optional[Path] = None):
+        self.processes = processes or os.cpu_count() or 1
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._cache: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cancelled = False
+
+    def __enter__(self) -> "Outliner":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def cancel(self) -> None:
+        """Drop queued outline jobs without waiting for running ones; callers
+        waiting on a dropped job get an error."""
+        with self._lock:
+            self._cancelled = True
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._cancelled:
+                raise RuntimeError("Outliner was cancelled")
+            if self._executor is None:
+                # Ingestion runs on threads, so avoid fork()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _cache_path(self, key: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / key[:2] / key
+
+    def _lookup(self, key: str):
+        with self._lock:
+            if key in self._cache:
+                return True, self._cache[key]
+        cache_path = self._cache_path(key)
+        if cache_path is not None and cache_path.exists():
+            try:
+                raw = cache_path.read_text(encoding="utf-8")
+            except OSError:
+                return False, None
+            # A leading "0" marks a file without an outline
+            outline = raw[1:] if raw.startswith("1") else None
+            with self._lock:
+                self._cache[key] = outline
+            return True, outline
+        return False, None
+
+    def _store(self, key: str, outline: Optional[str]) -> None:
+        with self._lock:
+            self._cache[key] = outline
+        cache_path = self._cache_path(key)
+        if cache_path is not None:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                cache_path.write_text(("1" + outline) if outline is not None else "0", encoding="utf-8")
+            except OSError:
+                pass
+
+    @staticmethod
+    def supports(rel_path: str) -> bool:
+        """True if files at `rel_path` have a language with an outliner."""
+        language = get_language_from_extension(rel_path)
+        return language == "python" or language in _COMPILED_OUTLINES
+
+    def outline(self, rel_path: str, source: str) -> Optional[str]:
+        """Return the outline of `source`, or None if it should be kept whole."""
+        if not self.supports(rel_path):
+            return None
+        language = get_language_from_extension(rel_path)
+
+        digest = hashlib.sha256(f"{OUTLINE_VERSION}\0{language}\0{source}".encode("utf-8", "surrogatepass"))
+        key = digest.hexdigest()
+        found, outline = self._lookup(key)
+        if found:
+            return outline
+
+        if self.processes > 1 and len(source) >= _INLINE_CHARS:
+            outline = self._pool().submit(outline_source, source, language).result()
+        else:
+            outline = outline_source(source, language)
+        self._store(key, outline)
+        return outline
+
+    def apply(self, record: FileRecord) -> FileRecord:
+        """Replace the content of a text record with its outline, in place."""
+        if record.binary or record.generated is not None:
+            return record
+        outline = self.outline(record.path, record.content)
+        if outline is None:
+            return record
+        record.original_chars = len(record.content)
+        record.content = outline
+        record.lines = count_lines(outline)
+        record.outlined = True
+        return record
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
-import sys
+import time
+from contextlib import ExitStack
+from io import StringIO
 from pathlib import Path
-from typing import Iterable, Tuple
+from typing import Any, Dict, Iterator, Tuple
 
-from rcpack.discover import discover_files
-from rcpack.gitinfo import get_git_info, is_git_repo
-from rcpack.io_utils import read_text_safely, is_binary_file
-from rcpack.renderer import markdown as md_renderer
-from rcpack.renderer.jsonyaml import render_json, render_yaml
-from rcpack.treeview import render_tree
-from rcpack.utils import get_language_from_extension
+from rcpack.archive import archive_info, is_archive
+from rcpack.chunking import Chunker
+from rcpack.discover import iter_files
+from rcpack.delta import PackDelta
+from rcpack.generated import GeneratedDetector
+from rcpack.gitinfo import GitBlobReader, get_git_info, is_git_repo
+from rcpack.ingest import DEFAULT_MAX_FILE_BYTES
+from rcpack.modules import ModuleScanner
+from rcpack.outline import Outliner
+from rcpack.spill import SpillStore
+from rcpack.pipeline import archive_entries, filesystem_entries, get_writer, revision_entries, run_pipeline
 
 
 def _find_root(inputs: list[str]) -> Path:
@@ -28,7 +34,116 @@ def build_package(
     exclude_patterns: list[str] | None,
     max_file_bytes: int,
     fmt: str = "markdown",
+    outline: bool = False,
+    rev: str | None = None,
+    blob_reader: GitBlobReader | None = None,
+    max_memory: int | None = None,
+    deadline_ms: int | None = None,
+    skip_generated: bool = True,
+    since_pack: str | None = None,
+    manifest_only: bool = False,
+    chunker: Chunker | None = None,
+    modules: bool = False,
+    module_depth: int | None = None,
+    skip_modules: list[str] | None = None,
 ) -> Tuple[str, dict]:
+    """Pack `inputs` and return (text, stats).
+
+    With `rev`, the single directory input only locates the repository: its
+    files are taken from that commit or tree-ish through `git ls-tree` and a
+    `git cat-file --batch` process.  Pass `blob_reader` to share one such
+    process between several revisions.
+
+    With `max_memory`, file contents read ahead of the writer are kept within
+    that many bytes and the rest is spilled to a temporary file; the stats
+    then carry `spilled_bytes`.  This does not bound peak memory here: the
+    whole pack is still collected in memory and returned as one string.
+    Only the CLI, which streams the pack to its output, stays within it.
+
+    With `deadline_ms`, packing stops reading new files that many
+    milliseconds after the call and returns what was read in time; the
+    stats and the pack's summary then carry a `truncated` section listing
+    the omitted files.  A `blob_reader` passed in is never cancelled.
+
+    Generated, minified and lock files are packed as one-line stubs unless
+    `skip_generated` is False; the stats count them by reason.
+
+    With `since_pack` (an earlier JSON/YAML pack of a directory or
+    revision), only files added or modified since then are packed, along
+    with a "delta" section; `manifest_only` leaves contents out of JSON/YAML.
+    A delta needs a complete pass, so `since_pack` excludes `deadline_ms`.
+
+    `fmt="chunks"` writes JSONL chunks bounded by `chunker`; see `iter_chunks`
+    to consume them one at a time instead.
+
+    With `modules` (a single directory input), submodules and nested git
+    repositories are scanned in parallel and get their own "modules"
+    sections; `module_depth` and `skip_modules` are as in `ModuleScanner`.
+    """
+    if since_pack and deadline_ms is not None:
+        raise ValueError("since_pack= cannot be combined with deadline_ms=")
+    delta = PackDelta.from_pack(Path(since_pack)) if since_pack else None
+    deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms is not None else None
+    archives = [Path(input_path) for input_path in inputs if is_archive(Path(input_path))]
+    if modules and (archives or rev is not None):
+        raise ValueError("modules=True needs a directory input, not an archive or rev=")
+    if archives:
+        if len(inputs) != 1:
+            raise ValueError("An archive must be the only input")
+        if delta is not None:
+            raise ValueError("since_pack= needs a directory input, not an archive")
+        archive_path = archives[0].resolve()
+        buffer = StringIO()
+        with ExitStack() as stack:
+            outliner = stack.enter_context(Outliner()) if outline else None
+            spill = stack.enter_context(SpillStore(max_memory)) if max_memory is not None else None
+            stats = run_pipeline(
+                archive_entries(
+                    archive_path, include_patterns, exclude_patterns,
+                    max_file_bytes=max_file_bytes, outliner=outliner, spill=spill,
+                    detector=GeneratedDetector() if skip_generated else None,
+                ),
+                get_writer(fmt, buffer, delta=delta, manifest_only=manifest_only, chunker=chunker),
+                root=str(archive_path),
+                repo_info=archive_info(archive_path),
+                outline=outline,
+                spill=spill,
+                deadline=deadline,
+                on_deadline=[outliner.cancel] if outliner is not None else [],
+            )
+        return buffer.getvalue(), stats
+
+    if rev is not None:
+        if len(inputs) != 1 or not Path(inputs[0]).is_dir():
+            raise ValueError("rev= needs a single directory input inside the repository")
+        root_abs = Path(inputs[0]).resolve()
+        buffer = StringIO()
+        with ExitStack() as stack:
+            cancel_reads = []
+            if blob_reader is None:
+                blob_reader = stack.enter_context(GitBlobReader(root_abs))
+                cancel_reads.append(blob_reader.cancel)
+            outliner = stack.enter_context(Outliner()) if outline else None
+            if outliner is not None:
+                cancel_reads.append(outliner.cancel)
+            spill = stack.enter_context(SpillStore(max_memory)) if max_memory is not None else None
+            stats = run_pipeline(
+                revision_entries(
+                    root_abs, rev, blob_reader, include_patterns, exclude_patterns,
+                    max_file_bytes=max_file_bytes, outliner=outliner,
+                    detector=GeneratedDetector.for_revision(blob_reader, rev) if skip_generated else None,
+                    delta=delta,
+                ),
+                get_writer(fmt, buffer, delta=delta, manifest_only=manifest_only, chunker=chunker),
+                root=str(root_abs),
+                repo_info=get_git_info(root_abs, rev=rev),
+                outline=outline,
+                spill=spill,
+                deadline=deadline,
+                on_deadline=cancel_reads,
+            )
+        return buffer.getvalue(), stats
+
     root = _find_root(inputs)
     root_abs = root.resolve()
 
@@ -43,80 +158,93 @@ def build_package(
         }
     )
 
-    files = discover_files(
-        inputs=[Path(input_path) for input_path in inputs],
-        root=root_abs,
-        include_patterns=include_patterns or [],
-        exclude_patterns=exclude_patterns or [],
-    )
-    relative_files = [discovered_file.relative_to(root_abs) for discovered_file in files]
-
-    project_tree = render_tree([relative_path.as_posix() for relative_path in relative_files])
-
-    files_dict: dict[str, str] = {}
-    file_sizes: dict[str, int] = {}
-    total_lines = 0
-    total_chars = 0
-
-    for discovered_file in files:
-        relative_path = discovered_file.relative_to(root_abs).as_posix()
-        try:
-            if is_binary_file(discovered_file):
-                content = f"[binary file skipped: {discovered_file.name}, {discovered_file.stat().st_size} bytes]"
-                files_dict[relative_path] = content
-                file_sizes[relative_path] = discovered_file.stat().st_size
-                total_chars += len(content)
-                continue
-
-            content, used_encoding, truncated = read_text_safely(discovered_file, max_bytes=max_file_bytes)
-            total_lines += content.count("\n") + (1 if content and not content.endswith("\n") else 0)
-            total_chars += len(content)
-
-            if truncated:
-                truncation_note = f"\n\n[... TRUNCATED to first {max_file_bytes} bytes ...]"
-                content = content + truncation_note
-                total_chars += len(truncation_note)
-
-            files_dict[relative_path] = content
-            file_sizes[relative_path] = discovered_file.stat().st_size
-        except Exception as exc:
-            print(f"[rcpack] error reading {relative_path}: {exc}", file=sys.stderr)
-            continue
-
-    # render in chosen format
-    if fmt == "markdown":
-        out_text = md_renderer.render_markdown(
-            root=str(root_abs),
-            repo_info=repo_info,
-            tree_text=project_tree,
-            files=files_dict,
-            total_files=len(files_dict),
-            total_lines=total_lines,
-        )
-    elif fmt == "json":
-        out_text = render_json(
+    buffer = StringIO()
+    with ExitStack() as stack:
+        scanner = None
+        cancel_reads = []
+        if modules:
+            if len(inputs) != 1 or not Path(inputs[0]).is_dir():
+                raise ValueError("modules=True needs a single directory input")
+            scanner = stack.enter_context(ModuleScanner(
+                root_abs, include_patterns, exclude_patterns, max_depth=module_depth, skip=skip_modules or [],
+            ))
+            files = scanner.iter_files()
+            cancel_reads.append(scanner.cancel)
+        else:
+            files = iter_files(
+                inputs=[Path(input_path) for input_path in inputs],
+                root=root_abs,
+                include_patterns=include_patterns or [],
+                exclude_patterns=exclude_patterns or [],
+            )
+        outliner = stack.enter_context(Outliner()) if outline else None
+        if outliner is not None:
+            cancel_reads.append(outliner.cancel)
+        spill = stack.enter_context(SpillStore(max_memory)) if max_memory is not None else None
+        stats = run_pipeline(
+            filesystem_entries(
+                files, root_abs, max_file_bytes=max_file_bytes, outliner=outliner,
+                detector=GeneratedDetector.for_directory(root_abs) if skip_generated else None,
+                delta=delta,
+            ),
+            get_writer(fmt, buffer, delta=delta, manifest_only=manifest_only, chunker=chunker),
             root=str(root_abs),
             repo_info=repo_info,
-            tree_text=project_tree,
-            files=files_dict,
-            total_files=len(files_dict),
-            total_lines=total_lines,
-            recent_files=None,
-            file_sizes=file_sizes,
+            outline=outline,
+            spill=spill,
+            deadline=deadline,
+            on_deadline=cancel_reads,
+            modules=scanner,
         )
-    elif fmt == "yaml":
-        out_text = render_yaml(
-            root=str(root_abs),
-            repo_info=repo_info,
-            tree_text=project_tree,
-            files=files_dict,
-            total_files=len(files_dict),
-            total_lines=total_lines,
-            recent_files=None,
-            file_sizes=file_sizes,
-        )
-    else:
-        raise ValueError(f"Unsupported format: {fmt}")
+    return buffer.getvalue(), stats
 
-    stats = {"files": len(files_dict), "lines": total_lines, "chars": total_chars}
-    return out_text, stats
+
+def iter_chunks(
+    inputs: list[str],
+    include_patterns: list[str] | None = None,
+    exclude_patterns: list[str] | None = None,
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    chunker: Chunker | None = None,
+    rev: str | None = None,
+    skip_generated: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """Yield the chunks of `inputs` one at a time, as `fmt="chunks"` writes them.
+
+    Files are read lazily, one at a time, in pack order; closing the
+    generator early stops reading (and the `git cat-file` process of a `rev`).
+    """
+    chunker = chunker or Chunker()
+    with ExitStack() as stack:
+        archives = [Path(input_path) for input_path in inputs if is_archive(Path(input_path))]
+        if archives:
+            if len(inputs) != 1:
+                raise ValueError("An archive must be the only input")
+            entries = archive_entries(
+                archives[0].resolve(), include_patterns, exclude_patterns, max_file_bytes=max_file_bytes,
+                detector=GeneratedDetector() if skip_generated else None,
+            )
+        elif rev is not None:
+            if len(inputs) != 1 or not Path(inputs[0]).is_dir():
+                raise ValueError("rev= needs a single directory input inside the repository")
+            root_abs = Path(inputs[0]).resolve()
+            blob_reader = stack.enter_context(GitBlobReader(root_abs))
+            entries = revision_entries(
+                root_abs, rev, blob_reader, include_patterns, exclude_patterns, max_file_bytes=max_file_bytes,
+                detector=GeneratedDetector.for_revision(blob_reader, rev) if skip_generated else None,
+            )
+        else:
+            root_abs = _find_root(inputs).resolve()
+            files = iter_files(
+                inputs=[Path(input_path) for input_path in inputs],
+                root=root_abs,
+                include_patterns=include_patterns or [],
+                exclude_patterns=exclude_patterns or [],
+            )
+            entries = filesystem_entries(
+                files, root_abs, max_file_bytes=max_file_bytes,
+                detector=GeneratedDetector.for_directory(root_abs) if skip_generated else None,
+            )
+        for _, load in entries:
+            record = load()
+            if record is not None:
+                yield from chunker.chunks(record)
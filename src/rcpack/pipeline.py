@@ -0,0 +1,574 @@
+"""Pipelined packing engine shared by the CLI and the packager.
+
+Discovery, ingestion and rendering run as overlapping stages:
+
+- a discovery thread walks the inputs and hands paths to the readers,
+- a small pool of reader threads turns paths into FileRecords,
+- the calling thread streams header, tree, file sections and summary to the
+  writer, restoring discovery order as records arrive.
+
+The tree section needs the complete path list, so the writer emits the header
+immediately and the tree as soon as discovery finishes; file sections follow
+in order and the summary is a trailing section.  Once the tree is written, at
+most `window` records are in flight (being read, queued or waiting for their
+turn), which bounds memory independently of repository size.  While discovery
+is still running nothing can be written, so the readers may run further ahead
+as long as the records they hold stay within a byte budget (the SpillStore's,
+when there is one).
+"""
+
+from __future__ import annotations
+
+import queue
+import sys
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO, Tuple
+
+from .archive import iter_archive_records
+from .chunking import Chunker
+from .discover import make_path_filter
+from .gitinfo import GitBlobReader, list_tree
+from .delta import PackDelta
+from .generated import GeneratedDetector
+from .ingest import (
+    DEFAULT_MAX_FILE_BYTES, FileRecord, generated_record, read_file_record, record_from_bytes, truncate_record,
+)
+from .modules import ModuleScanner
+from .outline import OUTLINE_MAX_FILE_BYTES, Outliner
+from .renderer.chunks import ChunksWriter
+from .renderer.jsonyaml import JsonWriter, YamlWriter
+from .renderer.markdown import MarkdownWriter
+from .spill import SpillStore
+from .treeview import render_tree
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_WINDOW = 64
+# Bytes of content the readers may hold while the tree is still being discovered
+DEFAULT_READ_AHEAD_BYTES = 32 << 20
+
+# An entry is a relative POSIX path plus a zero-argument loader for its record
+Entry = Tuple[str, Callable[[], Optional[FileRecord]]]
+
+_DONE = object()
+
+
+class _ReadWindow:
+    """Admission control for the reader threads.
+
+    A reader claims a slot before each path and the slot is released when
+    the record is written.  Slots are limited to `window` once the tree is
+    known; before that, more may be claimed while the records read ahead
+    hold fewer than `max_bytes` characters of content.
+    """
+
+    def __init__(self, window: int, max_bytes: int):
+        self.window = window
+        self.max_bytes = max_bytes
+        self._claimed = 0
+        self._held = 0
+        self._tree_pending = True
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _open(self) -> bool:
+        return (self._closed or self._claimed < self.window
+                or (self._tree_pending and self._held < self.max_bytes))
+
+    def acquire(self) -> None:
+        with self._condition:
+            self._condition.wait_for(self._open)
+            self._claimed += 1
+
+    def hold(self, size: int) -> None:
+        with self._condition:
+            self._held += size
+
+    def release(self, size: int = 0) -> None:
+        with self._condition:
+            self._claimed -= 1
+            self._held -= size
+            self._condition.notify_all()
+
+    def tree_done(self) -> None:
+        with self._condition:
+            self._tree_pending = False
+
+    def close(self) -> None:
+        """Let every waiting reader through (they then see the stop flag)."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+def get_writer(fmt: str, out: TextIO, delta: Optional[PackDelta] = None, manifest_only: bool = False,
+               chunker: Optional[Chunker] = None):
+    """Return the streaming writer for `fmt` ("text"/"markdown", "json", "yaml" or "chunks").
+
+    `delta` makes it a delta pack; `manifest_only` (JSON/YAML) leaves file
+    contents out; `chunker` sets the chunk bounds of the chunks format.
+    """
+    if fmt in ("text", "markdown"):
+        if manifest_only:
+            raise ValueError("Manifest-only packs are JSON or YAML")
+        return MarkdownWriter(out, delta=delta)
+    if fmt == "json":
+        return JsonWriter(out, delta=delta, include_content=not manifest_only)
+    if fmt == "yaml":
+        return YamlWriter(out, delta=delta, include_content=not manifest_only)
+    if fmt == "chunks":
+        if manifest_only:
+            raise ValueError("Manifest-only packs are JSON or YAML")
+        return ChunksWriter(out, chunker=chunker)
+    if fmt == "sqlite":
+        raise ValueError("The sqlite format writes a database file; use SqliteWriter(path)")
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+class TeeWriter:
+    """Feeds one pack to several writers side by side.
+
+    Every section is handed to each writer in turn as it is produced, so the
+    repository is discovered and read once however many formats are written.
+    """
+
+    def __init__(self, writers: List[Any]):
+        self.writers = list(writers)
+
+    def begin(self, root: str, repo_info: Dict[str, Any]) -> None:
+        for writer in self.writers:
+            writer.begin(root, repo_info)
+
+    def structure(self, tree_text: str, recent_files: Optional[Dict[str, str]] = None,
+                  changes: Optional[Dict[str, Any]] = None,
+                  modules: Optional[List[Dict[str, Any]]] = None) -> None:
+        for writer in self.writers:
+            writer.structure(tree_text, recent_files, changes, modules=modules)
+
+    def file(self, record: FileRecord) -> None:
+        for writer in self.writers:
+            writer.file(record)
+
+    def finish(self, stats: Dict[str, Any]) -> None:
+        for writer in self.writers:
+            writer.finish(stats)
+
+
+def _read_limit(max_file_bytes: int, outliner: Optional[Outliner], rel_path: Optional[str] = None) -> int:
+    """How far to read a file: past `max_file_bytes` only for files that may
+    be outlined (`rel_path` None: any file, for archives read up front)."""
+    if outliner is None or (rel_path is not None and not outliner.supports(rel_path)):
+        return max_file_bytes
+    return max(max_file_bytes, OUTLINE_MAX_FILE_BYTES)
+
+
+def _classifier(detector: Optional[GeneratedDetector]):
+    return detector.classify_content if detector is not None else None
+
+
+def _load_file(path: Path, rel_path: str, max_file_bytes: int, verbose: bool,
+               outliner: Optional[Outliner], detector: Optional[GeneratedDetector] = None,
+               delta: Optional[PackDelta] = None) -> Optional[FileRecord]:
+    if delta is not None:
+        stat = path.stat()
+        if delta.unchanged(rel_path, size=stat.st_size, mtime_ns=stat.st_mtime_ns):
+            return None
+    reason = detector.classify_path(rel_path) if detector is not None else None
+    if reason is not None:
+        # Known by name: stubbed without opening the file
+        stat = path.stat()
+        record = generated_record(rel_path, stat.st_size, reason)
+        record.mtime_ns = stat.st_mtime_ns
+    else:
+        if verbose:
+            print(f"Reading file: {rel_path}", file=sys.stderr)
+        record = read_file_record(
+            path, rel_path, max_bytes=_read_limit(max_file_bytes, outliner, rel_path), classify=_classifier(detector),
+        )
+        record = _finish_record(record, outliner, max_file_bytes=max_file_bytes)
+    return delta.filter(record) if delta is not None else record
+
+
+def filesystem_entries(
+    paths: Iterable[Path],
+    root: Path,
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    verbose: bool = False,
+    outliner: Optional[Outliner] = None,
+    detector: Optional[GeneratedDetector] = None,
+    delta: Optional[PackDelta] = None,
+) -> Iterable[Entry]:
+    """Turn discovered absolute paths into pipeline entries relative to `root`.
+
+    With an `outliner`, supported source files are reduced to their outline.
+    With a `detector`, generated, minified and lock files become stubs.
+    With a `delta`, files unchanged since the previous pack are skipped
+    (without being read when their size and mtime match).
+    """
+    for path in paths:
+        rel_path = path.relative_to(root).as_posix()
+        if delta is not None:
+            delta.mark(rel_path)
+        yield rel_path, partial(_load_file, path, rel_path, max_file_bytes, verbose, outliner, detector, delta)
+
+
+def _load_changed_file(rel_path: str, repo_path: Path, target: Optional[str],
+                       blob_reader: Optional[GitBlobReader], max_file_bytes: int,
+                       diff: Optional[str], verbose: bool,
+                       outliner: Optional[Outliner],
+                       detector: Optional[GeneratedDetector] = None) -> FileRecord:
+    if target is None:
+        record = _load_file(repo_path / rel_path, rel_path, max_file_bytes, verbose, outliner, detector)
+    else:
+        if verbose:
+            print(f"Reading file: {target or 'index'}:{rel_path}", file=sys.stderr)
+        limit = _read_limit(max_file_bytes, outliner, rel_path)
+        reason = detector.classify_path(rel_path) if detector is not None else None
+        raw, size = blob_reader.read(f"{target}:./{rel_path}", max_bytes=0 if reason else limit)
+        if reason is not None:
+            record = generated_record(rel_path, size, reason)
+        else:
+            record = record_from_bytes(rel_path, raw, size, max_bytes=limit, classify=_classifier(detector))
+            record = _finish_record(record, outliner, max_file_bytes=max_file_bytes)
+    record.diff = diff
+    return record
+
+
+def diff_entries(
+    changes: Iterable[Dict[str, Any]],
+    repo_path: Path,
+    target: Optional[str],
+    blob_reader: Optional[GitBlobReader] = None,
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    patches: Optional[Dict[str, str]] = None,
+    verbose: bool = False,
+    outliner: Optional[Outliner] = None,
+    detector: Optional[GeneratedDetector] = None,
+) -> Iterable[Entry]:
+    """Pipeline entries for the files of a diff (see gitinfo.get_changed_files).
+
+    Contents come from the working tree when `target` is None, otherwise from
+    the git object store through `blob_reader` ("" is the index).  Deleted
+    files have no content and are skipped; `patches` attaches diff hunks.
+    """
+    for change in changes:
+        if change["status"] == "deleted":
+            continue
+        rel_path = change["path"]
+        diff = patches.get(rel_path) if patches else None
+        yield rel_path, partial(
+            _load_changed_file, rel_path, repo_path, target, blob_reader,
+            max_file_bytes, diff, verbose, outliner, detector,
+        )
+
+
+def _finish_record(record: FileRecord, outliner: Optional[Outliner],
+                   spill: Optional[SpillStore] = None,
+                   max_file_bytes: int = DEFAULT_MAX_FILE_BYTES) -> FileRecord:
+    if outliner is None:
+        return record
+    if spill is not None:
+        # Outlining needs the content; the smaller result is re-admitted
+        spill.release(spill.restore(record))
+    record = outliner.apply(record)
+    if not record.outlined:
+        # Read past the limit for an outline that did not happen
+        truncate_record(record, max_file_bytes)
+    return record
+
+
+def archive_entries(
+    archive_path: Path,
+    include_patterns: Optional[List[str]] = None,
+    exclude_patterns: Optional[List[str]] = None,
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    verbose: bool = False,
+    outliner: Optional[Outliner] = None,
+    spill: Optional[SpillStore] = None,
+    detector: Optional[GeneratedDetector] = None,
+) -> Iterable[Entry]:
+    """Pipeline entries for the files inside a tar/zip archive.
+
+    Members are filtered with the discovery rules and read while the archive
+    is streamed (nothing is extracted); paths are those extraction would
+    create.  Pass the pipeline's `spill` store to keep buffered tar members
+    within its budget.
+    """
+    accepts = make_path_filter(include_patterns or [], exclude_patterns or [])
+    limit = _read_limit(max_file_bytes, outliner)
+    for record in iter_archive_records(archive_path, accepts, limit, spill=spill, detector=detector):
+        if verbose:
+            print(f"Reading file: {archive_path.name}:{record.path}", file=sys.stderr)
+        yield record.path, partial(_finish_record, record, outliner, spill, max_file_bytes)
+
+
+def _load_blob(rel_path: str, object_id: str, size: int, blob_reader: GitBlobReader,
+               max_file_bytes: int, verbose: bool, outliner: Optional[Outliner],
+               detector: Optional[GeneratedDetector] = None,
+               delta: Optional[PackDelta] = None) -> Optional[FileRecord]:
+    if delta is not None and delta.unchanged(rel_path, blob=object_id):
+        return None
+    reason = detector.classify_path(rel_path) if detector is not None else None
+    if reason is not None:
+        # ls-tree already gave the size; the blob is never read
+        record = generated_record(rel_path, size, reason)
+    else:
+        if verbose:
+            print(f"Reading file: {rel_path} ({object_id[:12]})", file=sys.stderr)
+        limit = _read_limit(max_file_bytes, outliner, rel_path)
+        raw, size = blob_reader.read(object_id, max_bytes=limit)
+        record = record_from_bytes(rel_path, raw, size, max_bytes=limit, classify=_classifier(detector))
+        record = _finish_record(record, outliner, max_file_bytes=max_file_bytes)
+    record.blob = object_id
+    return delta.filter(record) if delta is not None else record
+
+
+def revision_entries(
+    repo_path: Path,
+    rev: str,
+    blob_reader: GitBlobReader,
+    include_patterns: Optional[List[str]] = None,
+    exclude_patterns: Optional[List[str]] = None,
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    verbose: bool = False,
+    outliner: Optional[Outliner] = None,
+    detector: Optional[GeneratedDetector] = None,
+    delta: Optional[PackDelta] = None,
+) -> Iterable[Entry]:
+    """Pipeline entries for the files of tree-ish `rev` below `repo_path`.
+
+    Files are listed with one `git ls-tree` call and read by blob id through
+    `blob_reader`, which may be shared between revisions; the working tree
+    is never read.  With a `delta`, blobs already in the previous pack are
+    not read.
+    """
+    accepts = make_path_filter(include_patterns or [], exclude_patterns or [])
+    for rel_path, object_id, size in list_tree(repo_path, rev):
+        if not accepts(rel_path):
+            continue
+        if delta is not None:
+            delta.mark(rel_path)
+        yield rel_path, partial(
+            _load_blob, rel_path, object_id, size, blob_reader, max_file_bytes, verbose, outliner,
+            detector, delta,
+        )
+
+
+def run_pipeline(
+    entries: Iterable[Entry],
+    writer,
+    *,
+    root: str,
+    repo_info: Dict[str, Any],
+    recent_files: Optional[Dict[str, str]] = None,
+    changes: Optional[Dict[str, Any]] = None,
+    outline: bool = False,
+    spill: Optional[SpillStore] = None,
+    deadline: Optional[float] = None,
+    on_deadline: Iterable[Callable[[], None]] = (),
+    modules: Optional[ModuleScanner] = None,
+    workers: int = DEFAULT_WORKERS,
+    window: int = DEFAULT_WINDOW,
+    read_ahead: int = DEFAULT_READ_AHEAD_BYTES,
+) -> Dict[str, Any]:
+    """Stream a pack of `entries` through `writer` and return its stats.
+
+    `entries` is consumed on a background thread, so it may be a lazy
+    generator that performs the discovery walk itself.  `recent_files` is
+    only read once `entries` is exhausted and may be filled in by it.
+    `changes` ({"range": ..., "files": [...]}) describes a diff-scoped pack.
+    With `outline`, the stats carry an "outline" section describing how
+    much outlining saved.  When files were packed as generated stubs,
+    "generated" counts them by reason.  With a `spill` store, records read ahead of the
+    writer are kept within its memory budget and the stats report
+    "spilled_bytes".
+
+    At most `window` records are in flight once the tree is written; while
+    discovery runs, readers keep going until the records waiting for it hold
+    `read_ahead` characters (the spill store's budget, with `spill`).
+
+    `deadline` is a `time.monotonic()` instant.  Once it passes, no new
+    entries are discovered or read, `on_deadline` callbacks are called to
+    abort reads in progress (e.g. `GitBlobReader.cancel`), the records already
+    read are written in pack order, and the stats carry a "truncated" section
+    listing every omitted path with the reason.
+
+    With `modules` (the ModuleScanner whose `iter_files` feeds `entries`),
+    the structure section lists the modules found, and their roots are
+    labelled in the tree.  Pass its `cancel` in `on_deadline`; modules left
+    unscanned at the deadline are listed as omitted directories.
+    """
+    workers = max(1, workers)
+    window = max(workers, window)
+
+    # Paths are retained for the tree anyway, so the hand-off to the readers
+    # is not bounded; the records (which hold file contents) are.
+    paths_queue: queue.Queue = queue.Queue()
+    records_queue: queue.Queue = queue.Queue()
+    slots = _ReadWindow(window, spill.max_memory if spill is not None else read_ahead)
+    stop = threading.Event()
+    discovery_done = threading.Event()
+    discovered: list[str] = []
+    discovered_lock = threading.Lock()
+    discovery_errors: list[BaseException] = []
+    started: set = set()
+
+    def remaining() -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def discover() -> None:
+        try:
+            for index, (rel_path, loader) in enumerate(entries):
+                with discovered_lock:
+                    if stop.is_set():
+                        break
+                    discovered.append(rel_path)
+                paths_queue.put((index, rel_path, loader))
+        except BaseException as exc:
+            discovery_errors.append(exc)
+        finally:
+            slots.tree_done()
+            discovery_done.set()
+            for _ in range(workers):
+                paths_queue.put(_DONE)
+
+    def ingest() -> None:
+        while True:
+            # Take a slot before a path so indices are claimed in order and
+            # the lowest outstanding index always has a slot.
+            slots.acquire()
+            item = paths_queue.get()
+            if item is _DONE or stop.is_set():
+                slots.release()
+                records_queue.put(_DONE)
+                return
+            index, rel_path, loader = item
+            started.add(index)
+            try:
+                record = loader()
+                if record is not None:
+                    slots.hold(len(record.content))
+                    if spill is not None:
+                        spill.admit(record)
+            except Exception as exc:
+                if stop.is_set():
+                    # Aborted at the deadline; reported as omitted instead
+                    continue
+                print(f"[rcpack] error reading {rel_path}: {exc}", file=sys.stderr)
+                record = None
+            records_queue.put((index, record))
+
+    threads = [threading.Thread(target=discover, name="rcpack-discover", daemon=True)]
+    threads += [
+        threading.Thread(target=ingest, name=f"rcpack-ingest-{n}", daemon=True)
+        for n in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    stats: Dict[str, Any] = {"files": 0, "lines": 0, "chars": 0}
+    if outline:
+        stats["outline"] = {"files": [], "original_chars": 0, "outline_chars": 0}
+    def emit(record: FileRecord) -> None:
+        if spill is not None:
+            spill.restore(record)
+        writer.file(record)
+        stats["files"] += 1
+        stats["lines"] += record.lines
+        stats["chars"] += len(record.content)
+        if record.generated is not None:
+            counts = stats.setdefault("generated", {})
+            counts[record.generated] = counts.get(record.generated, 0) + 1
+        if outline and record.outlined:
+            stats["outline"]["files"].append(record.path)
+            stats["outline"]["original_chars"] += record.original_chars
+            stats["outline"]["outline_chars"] += len(record.content)
+        if spill is not None:
+            spill.release(record)
+
+    def cut(reason: str) -> List[str]:
+        # Stop all new work and snapshot the paths discovered so far
+        with discovered_lock:
+            stop.set()
+            paths = list(discovered)
+        stats["truncated"] = {
+            "reason": reason,
+            "discovery_complete": discovery_done.is_set() and not discovery_errors,
+            "omitted": [],
+        }
+        for callback in on_deadline:
+            callback()
+        return paths
+
+    try:
+        writer.begin(root, repo_info)
+
+        paths = None
+        if discovery_done.wait(timeout=remaining()):
+            if discovery_errors:
+                raise discovery_errors[0]
+            paths = discovered
+        else:
+            paths = cut("deadline reached during discovery")
+        if modules is not None:
+            writer.structure(render_tree(paths, modules.tree_roots()), recent_files, changes, modules=modules.info())
+        else:
+            writer.structure(render_tree(paths), recent_files, changes)
+
+        pending: Dict[int, Optional[FileRecord]] = {}
+        next_index = 0
+        finished_workers = 0
+        while finished_workers < workers and "truncated" not in stats:
+            try:
+                item = records_queue.get(timeout=remaining())
+            except queue.Empty:
+                paths = cut("deadline reached while reading files")
+                break
+            if item is _DONE:
+                finished_workers += 1
+                continue
+            index, record = item
+            pending[index] = record
+            while next_index in pending:
+                record = pending.pop(next_index)
+                next_index += 1
+                size = 0
+                if record is not None:
+                    emit(record)
+                    size = len(record.content)
+                slots.release(size)
+
+        if "truncated" in stats:
+            # Write whatever was read in time, in pack order, and account for the rest
+            while True:
+                try:
+                    item = records_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _DONE:
+                    pending[item[0]] = item[1]
+            for index in range(next_index, len(paths)):
+                if index in pending:
+                    if pending[index] is not None:
+                        emit(pending[index])
+                    continue
+                reason = "read cancelled at deadline" if index in started else "not read before deadline"
+                stats["truncated"]["omitted"].append({"path": paths[index], "reason": reason})
+            if modules is not None:
+                for module_path in modules.unscanned():
+                    stats["truncated"]["omitted"].append(
+                        {"path": f"{module_path}/", "reason": "module not scanned before deadline"}
+                    )
+
+        if spill is not None:
+            stats["spilled_bytes"] = spill.spilled_bytes
+        writer.finish(stats)
+    finally:
+        stop.set()
+        # Unblock readers still waiting for a slot
+        slots.close()
+
+    return stats
@@ -0,0 +1,135 @@
+"""Random access to SQLite packs written with `--format sqlite`.
+
+    with open_pack("context.db") as pack:
+        record = pack.get("src/rcpack/cli.py")
+        for record in pack.glob("src/*.py"):
+            ...
+        for hit in pack.search("spill AND budget"):
+            print(hit["path"], hit["snippet"])
+
+Only the rows asked for are read; the pack is opened read-only.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from .ingest import FileRecord
+
+
+_FILE_COLUMNS = "path, content, size, encoding, truncated, binary, lines, outlined, diff"
+
+
+def _record(row: sqlite3.Row) -> FileRecord:
+    return FileRecord(
+        path=row["path"],
+        content=row["content"],
+        size=row["size"],
+        encoding=row["encoding"],
+        truncated=bool(row["truncated"]),
+        binary=bool(row["binary"]),
+        lines=row["lines"],
+        outlined=bool(row["outlined"]),
+        diff=row["diff"],
+    )
+
+
+class SqlitePack:
+    """A read-only handle on a SQLite pack."""
+
+    def __init__(self, path: Union[str, Path]):
+        path = Path(path)
+        if not path.is_file():
+            raise FileNotFoundError(f"Pack not found: {path}")
+        self._conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        self._conn.row_factory = sqlite3.Row
+
+    def __enter__(self) -> "SqlitePack":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _pack_value(self, key: str) -> Any:
+        row = self._conn.execute("SELECT value FROM pack WHERE key = ?", (key,)).fetchone()
+        return None if row is None else json.loads(row["value"])
+
+    @property
+    def root(self) -> str:
+        return self._pack_value("root")
+
+    @property
+    def structure(self) -> str:
+        return self._pack_value("structure")
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        return self._pack_value("summary")
+
+    @property
+    def modules(self) -> Optional[List[Dict[str, Any]]]:
+        """Module sections of a --modules pack, or None."""
+        return self._pack_value("modules")
+
+    def repo_info(self) -> Dict[str, Any]:
+        rows = self._conn.execute("SELECT key, value FROM repo_info")
+        if (self._pack_value("schema_version") or 1) < 2:
+            # Version 1 packs stored the values as plain strings
+            return {row["key"]: row["value"] for row in rows}
+        return {row["key"]: json.loads(row["value"]) for row in rows}
+
+    def paths(self) -> List[str]:
+        """All file paths in the pack, in path order."""
+        return [row["path"] for row in self._conn.execute("SELECT path FROM files ORDER BY path")]
+
+    def get(self, path: str) -> Optional[FileRecord]:
+        """The file at `path`, or None if the pack does not contain it."""
+        row = self._conn.execute(f"SELECT {_FILE_COLUMNS} FROM files WHERE path = ?", (path,)).fetchone()
+        return None if row is None else _record(row)
+
+    def glob(self, pattern: str) -> Iterator[FileRecord]:
+        """Files whose path matches `pattern`, in path order.
+
+        Patterns follow the same rules as --include/--exclude: `*` also
+        matches `/`, and matching is case-sensitive.
+        """
+        cursor = self._conn.execute(
+            f"SELECT {_FILE_COLUMNS} FROM files WHERE path GLOB ? ORDER BY path", (pattern,)
+        )
+        for row in cursor:
+            yield _record(row)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over paths and contents, best matches first.
+
+        `query` uses FTS5 query syntax (words, "phrases", AND/OR/NOT,
+        prefix*).  Returns dicts with "path", "snippet" and "rank".  Packs
+        written without FTS5 support fall back to a plain substring match.
+        """
+        if self._pack_value("fts"):
+            rows = self._conn.execute(
+                "SELECT files.path AS path,"
+                " snippet(files_fts, 1, '[', ']', '...', 16) AS snippet,"
+                " bm25(files_fts) AS rank"
+                " FROM files_fts JOIN files ON files.id = files_fts.rowid"
+                " WHERE files_fts MATCH ? ORDER BY rank LIMIT ?",
+                (query, limit),
+            )
+        else:
+            rows = self._conn.execute(
+                "SELECT path, substr(content, max(instr(content, ?) - 32, 1), 96) AS snippet,"
+                " 0.0 AS rank FROM files WHERE instr(content, ?) > 0 ORDER BY path LIMIT ?",
+                (query, query, limit),
+            )
+        return [dict(row) for row in rows]
+
+
+def open_pack(path: Union[str, Path]) -> SqlitePack:
+    """Open a SQLite pack for reading."""
+    return SqlitePack(path)
@@ -0,0 +1,39 @@
+"""JSONL chunk renderer: one retrieval-ready chunk per line (see rcpack.chunking)."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, TextIO
+
+from ..chunking import Chunker
+from ..ingest import FileRecord
+
+
+class ChunksWriter:
+    """Streaming chunk renderer.
+
+    Each file is chunked as soon as the pipeline hands it over and its chunks
+    are written straight away, one JSON object per line; the header, tree and
+    summary sections have no place in the output and are dropped.
+    """
+
+    def __init__(self, out: TextIO, chunker: Optional[Chunker] = None):
+        self.out = out
+        self.chunker = chunker or Chunker()
+        self.chunk_count = 0
+
+    def begin(self, root: str, repo_info: Dict[str, Any]) -> None:
+        pass
+
+    def structure(self, tree_text: str, recent_files: Optional[Dict[str, str]] = None,
+                  changes: Optional[Dict[str, Any]] = None,
+                  modules: Optional[List[Dict[str, Any]]] = None) -> None:
+        pass
+
+    def file(self, record: FileRecord) -> None:
+        for chunk in self.chunker.chunks(record):
+            self.out.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+            self.chunk_count += 1
+
+    def finish(self, stats: Dict[str, Any]) -> None:
+        pass
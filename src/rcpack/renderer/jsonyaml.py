@@ -1,6 +1,9 @@
 from __future__ import annotations
 import json
-from ..utils import build_repository_data
+from typing import Any, Dict, List, Optional, TextIO
+from ..delta import PackDelta, manifest_entry
+from ..ingest import FileRecord
+from ..utils import build_repository_data, summary_from_stats
 
 try:
     import yaml
@@ -8,7 +11,9 @@ except ImportError:
     yaml = None
 
 
-def render_json(root, repo_info, tree_text, files, total_files, total_lines,recent_files=None, file_sizes=None) -> str:
+def render_json(root, repo_info, tree_text, files, total_files, total_lines,recent_files=None, file_sizes=None, outline=None,
+                changes=None, diffs=None, truncated=None, generated=None, manifest=None, delta=None,
+                include_content=True, modules=None) -> str:
     data = build_repository_data(
         root=root,
         repo_info=repo_info,
@@ -17,12 +22,23 @@ def render_json(root, repo_info, tree_text, files, total_files, total_lines,rece
         total_files=total_files,
         total_lines=total_lines,
         recent_files=recent_files,
-        file_sizes=file_sizes
+        file_sizes=file_sizes,
+        outline=outline,
+        changes=changes,
+        diffs=diffs,
+        truncated=truncated,
+        generated=generated,
+        manifest=manifest,
+        delta=delta,
+        include_content=include_content,
+        modules=modules
     )
     return json.dumps(data, indent=2, ensure_ascii=False)
 
 
-def render_yaml(root, repo_info, tree_text, files, total_files, total_lines,recent_files=None, file_sizes=None) -> str:
+def render_yaml(root, repo_info, tree_text, files, total_files, total_lines,recent_files=None, file_sizes=None, outline=None,
+                changes=None, diffs=None, truncated=None, generated=None, manifest=None, delta=None,
+                include_content=True, modules=None) -> str:
     if yaml is None:
         raise RuntimeError("PyYAML not installed; run `pip install pyyaml`")
     data = build_repository_data(
@@ -33,6 +49,167 @@ def render_yaml(root, repo_info, tree_text, files, total_files, total_lines,rece
         total_files=total_files,
         total_lines=total_lines,
         recent_files=recent_files,
-        file_sizes=file_sizes
+        file_sizes=file_sizes,
+        outline=outline,
+        changes=changes,
+        diffs=diffs,
+        truncated=truncated,
+        generated=generated,
+        manifest=manifest,
+        delta=delta,
+        include_content=include_content,
+        modules=modules
     )
     return yaml.safe_dump(data, sort_keys=False, allow_unicode=True)
+
+
+def _member(key: str, value: Any, level: int) -> str:
+    """Dump `"key": value` exactly as json.dumps(indent=2) would at nesting `level`."""
+    dumped = json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n" + "  " * level)
+    return f"{json.dumps(key, ensure_ascii=False)}: {dumped}"
+
+
+class JsonWriter:
+    """Streaming JSON renderer producing the same bytes as `render_json`.
+
+    File contents are written one entry at a time; only the (small) size map
+    and manifest are held back until the end.  With `include_content` False
+    the "files" section is left out (a compact manifest pack); with a
+    `delta`, the manifest also covers the unchanged files it skipped.
+    """
+
+    def __init__(self, out: TextIO, delta: Optional[PackDelta] = None, include_content: bool = True):
+        self.out = out
+        self._delta = delta
+        self._include_content = include_content
+        self._file_count = 0
+        self._file_sizes: Dict[str, Any] = {}
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._diffs: Optional[Dict[str, str]] = None
+
+    def begin(self, root: str, repo_info: Dict[str, Any]) -> None:
+        self.out.write("{\n  " + _member("root", root, 1))
+        self.out.write(",\n  " + _member("repo_info", repo_info, 1))
+
+    def structure(self, tree_text: str, recent_files: Optional[Dict[str, str]] = None,
+                  changes: Optional[Dict[str, Any]] = None,
+                  modules: Optional[List[Dict[str, Any]]] = None) -> None:
+        if modules is not None:
+            self.out.write(",\n  " + _member("modules", modules, 1))
+        self.out.write(",\n  " + _member("structure", tree_text, 1))
+        self.out.write(",\n  " + _member("recent_changes", recent_files or {}, 1))
+        if changes is not None:
+            self.out.write(",\n  " + _member("changes", changes, 1))
+            self._diffs = {}
+        if self._include_content:
+            self.out.write(',\n  "files": {')
+
+    def file(self, record: FileRecord) -> None:
+        if self._include_content:
+            separator = "," if self._file_count else ""
+            self.out.write(f"{separator}\n    " + _member(record.path, record.content, 2))
+        self._file_count += 1
+        self._manifest[record.path] = manifest_entry(record)
+        if record.size is not None:
+            self._file_sizes[record.path] = record.size
+        if record.diff is not None and self._diffs is not None:
+            self._diffs[record.path] = record.diff
+
+    def finish(self, stats: Dict[str, Any]) -> None:
+        if self._include_content:
+            self.out.write("\n  }" if self._file_count else "}")
+        self.out.write(",\n  " + _member("file_sizes", self._file_sizes, 1))
+        manifest = self._delta.manifest(self._manifest) if self._delta is not None else self._manifest
+        self.out.write(",\n  " + _member("manifest", manifest, 1))
+        if "outline" in stats:
+            self.out.write(",\n  " + _member("outlined_files", stats["outline"]["files"], 1))
+        if self._diffs:
+            self.out.write(",\n  " + _member("diffs", self._diffs, 1))
+        if self._delta is not None:
+            self.out.write(",\n  " + _member("delta", self._delta.result(), 1))
+        self.out.write(",\n  " + _member("summary", summary_from_stats(stats), 1))
+        self.out.write("\n}")
+
+
+class YamlWriter:
+    """Streaming YAML renderer producing the same bytes as `render_yaml`.
+
+    The document is emitted as PyYAML events, so file contents are written
+    one entry at a time instead of being collected into one mapping.
+    `delta` and `include_content` work as for `JsonWriter`.
+    """
+
+    def __init__(self, out: TextIO, delta: Optional[PackDelta] = None, include_content: bool = True):
+        if yaml is None:
+            raise RuntimeError("PyYAML not installed; run `pip install pyyaml`")
+        self._dumper = yaml.SafeDumper(out, sort_keys=False, allow_unicode=True)
+        self._delta = delta
+        self._include_content = include_content
+        self._file_sizes: Dict[str, Any] = {}
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._diffs: Optional[Dict[str, str]] = None
+
+    def _value(self, data: Any) -> None:
+        # What Serializer.serialize() does for a document, minus its start/end
+        dumper = self._dumper
+        node = dumper.represent_data(data)
+        dumper.represented_objects = {}
+        dumper.object_keeper = []
+        dumper.alias_key = None
+        dumper.anchor_node(node)
+        dumper.serialize_node(node, None, None)
+        dumper.serialized_nodes = {}
+        dumper.anchors = {}
+
+    def _member(self, key: str, value: Any) -> None:
+        self._value(key)
+        self._value(value)
+
+    def _start_mapping(self) -> None:
+        self._dumper.emit(yaml.MappingStartEvent(anchor=None, tag=None, implicit=True, flow_style=False))
+
+    def begin(self, root: str, repo_info: Dict[str, Any]) -> None:
+        self._dumper.open()
+        self._dumper.emit(yaml.DocumentStartEvent(explicit=False))
+        self._start_mapping()
+        self._member("root", root)
+        self._member("repo_info", repo_info)
+
+    def structure(self, tree_text: str, recent_files: Optional[Dict[str, str]] = None,
+                  changes: Optional[Dict[str, Any]] = None,
+                  modules: Optional[List[Dict[str, Any]]] = None) -> None:
+        if modules is not None:
+            self._member("modules", modules)
+        self._member("structure", tree_text)
+        self._member("recent_changes", recent_files or {})
+        if changes is not None:
+            self._member("changes", changes)
+            self._diffs = {}
+        if self._include_content:
+            self._value("files")
+            self._start_mapping()
+
+    def file(self, record: FileRecord) -> None:
+        if self._include_content:
+            self._member(record.path, record.content)
+        self._manifest[record.path] = manifest_entry(record)
+        if record.size is not None:
+            self._file_sizes[record.path] = record.size
+        if record.diff is not None and self._diffs is not None:
+            self._diffs[record.path] = record.diff
+
+    def finish(self, stats: Dict[str, Any]) -> None:
+        if self._include_content:
+            self._dumper.emit(yaml.MappingEndEvent())
+        self._member("file_sizes", self._file_sizes)
+        self._member("manifest", self._delta.manifest(self._manifest) if self._delta is not None else self._manifest)
+        if "outline" in stats:
+            self._member("outlined_files", stats["outline"]["files"])
+        if self._diffs:
+            self._member("diffs", self._diffs)
+        if self._delta is not None:
+            self._member("delta", self._delta.result())
+        self._member("summary", summary_from_stats(stats))
+        self._dumper.emit(yaml.MappingEndEvent())
+        self._dumper.emit(yaml.DocumentEndEvent(explicit=False))
+        self._dumper.close()
@@ -1,70 +1,167 @@
 """Markdown renderer for repository context."""
 
-from typing import Dict, Any
-from ..utils import get_language_from_extension
+from io import StringIO
+from typing import Dict, Any, List, Optional, TextIO
+from ..ingest import FileRecord
+from ..utils import get_language_from_extension, summarize_outline
 
 
-def render_markdown(root: str, repo_info: Dict[str, Any], tree_text: str, 
-                   files: Dict[str, str], total_files: int, total_lines: int, recent_files=None, file_sizes=None) -> str:
-    """Render repository context as markdown."""
-    
-    lines = []
-    
-    # Header
-    lines.append(f"# Repository Context: {root}")
-    lines.append("")
-    
-    # Repository info
-    if repo_info.get("is_repo"):
-        lines.append("## Git Repository Information")
-        lines.append(f"- **Branch**: {repo_info.get('branch', 'N/A')}")
-        lines.append(f"- **Commit**: {repo_info.get('commit', 'N/A')}")
-        lines.append(f"- **Author**: {repo_info.get('author', 'N/A')}")
-        lines.append(f"- **Date**: {repo_info.get('date', 'N/A')}")
-    else:
-        lines.append("## Repository Information")
-        lines.append(f"- **Note**: {repo_info.get('note', 'Not a git repository')}")
-    lines.append("")
-    
-    # Summary
-    lines.append("## Summary")
-    lines.append(f"- **Total Files**: {total_files}")
-    lines.append(f"- **Total Lines**: {total_lines}")
-    lines.append("")
-    
-    # Directory structure
-    lines.append("## Directory Structure")
-    lines.append("```")
-    lines.append(tree_text)
-    lines.append("```")
-    lines.append("")
+def format_file_section(record: FileRecord) -> str:
+    """Format the Markdown section for one file (without the separating newline)."""
+    notes = []
+    if record.size is not None:
+        notes.append(f"{record.size} bytes")
+    if record.outlined:
+        notes.append("outline")
+    header = f"### {record.path} ({', '.join(notes)})" if notes else f"### {record.path}"
+    # Detect language for syntax highlighting
+    language = get_language_from_extension(record.path)
+    lines = [header, "", f"```{language}", record.content, "```", ""]
+    if record.diff:
+        lines += ["```diff", record.diff, "```", ""]
+    return "\n".join(lines)
 
-    # will produce recent files 
-    # Recent files (fixed)
-    if recent_files:
-        lines.append("## Recent Changes")
-        for file, age in recent_files.items():
-            lines.append(f"- {file} (modified {age})")
-        lines.append("")
-    
-    # File contents
-    lines.append("## File Contents")
-    lines.append("")
-    
-    for file_path, content in sorted(files.items()):
-        if file_sizes and file_path in file_sizes:
-            size_bytes = file_sizes[file_path]
-            lines.append(f"### {file_path} ({size_bytes} bytes)")
+
+class MarkdownWriter:
+    """Streaming Markdown renderer.
+
+    Sections are written to `out` as soon as they are known: the header first,
+    the directory structure (after any module sections) once discovery is
+    complete, every file as it is
+    ingested, and the summary as a trailing section.  With a `delta`
+    (rcpack.delta.PackDelta), the files added, modified and deleted since
+    the previous pack are listed before the summary.
+    """
+
+    def __init__(self, out: TextIO, delta=None):
+        self.out = out
+        self._delta = delta
+        self._started = False
+
+    def _emit(self, lines: List[str]) -> None:
+        self._emit_text("\n".join(lines))
+
+    def _emit_text(self, text: str) -> None:
+        # Equivalent to joining every emitted line with "\n"
+        if self._started:
+            self.out.write("\n")
+        self.out.write(text)
+        self._started = True
+
+    def begin(self, root: str, repo_info: Dict[str, Any]) -> None:
+        lines = [f"# Repository Context: {root}", ""]
+        if repo_info.get("is_repo"):
+            lines.append("## Git Repository Information")
+            lines.append(f"- **Branch**: {repo_info.get('branch', 'N/A')}")
+            lines.append(f"- **Commit**: {repo_info.get('commit', 'N/A')}")
+            lines.append(f"- **Author**: {repo_info.get('author', 'N/A')}")
+            lines.append(f"- **Date**: {repo_info.get('date', 'N/A')}")
+            if repo_info.get("note"):
+                lines.append(f"- **Note**: {repo_info['note']}")
         else:
-            lines.append(f"### {file_path}")
+            lines.append("## Repository Information")
+            lines.append(f"- **Note**: {repo_info.get('note', 'Not a git repository')}")
         lines.append("")
-        
-        # Detect language for syntax highlighting
-        language = get_language_from_extension(file_path)
-        
-        lines.append(f"```{language}")
-        lines.append(content)
-        lines.append("```")
+        self._emit(lines)
+
+    def structure(self, tree_text: str, recent_files: Optional[Dict[str, str]] = None,
+                  changes: Optional[Dict[str, Any]] = None,
+                  modules: Optional[List[Dict[str, Any]]] = None) -> None:
+        lines = []
+        if modules:
+            lines.append("## Modules")
+            lines.append("")
+            for module in modules:
+                if module.get("skipped"):
+                    lines.append(f"### {module['path']} (skipped)")
+                    lines.append("")
+                    continue
+                if module.get("unscanned"):
+                    lines.append(f"### {module['path']} (not scanned)")
+                    lines.append("")
+                    continue
+                info = module["repo_info"]
+                lines.append(f"### {module['path']}")
+                if info.get("is_repo"):
+                    lines.append(f"- **Branch**: {info.get('branch', 'N/A')}")
+                    lines.append(f"- **Commit**: {info.get('commit', 'N/A')}")
+                    lines.append(f"- **Author**: {info.get('author', 'N/A')}")
+                    lines.append(f"- **Date**: {info.get('date', 'N/A')}")
+                else:
+                    lines.append(f"- **Note**: {info.get('note', 'Not a git repository')}")
+                lines.append(f"- **Files**: {module['files']}")
+                lines.append("")
+        lines += ["## Directory Structure", "```", tree_text, "```", ""]
+        if recent_files:
+            lines.append("## Recent Changes")
+            for file, age in recent_files.items():
+                lines.append(f"- {file} (modified {age})")
+            lines.append("")
+        if changes is not None:
+            lines.append(f"## Changes ({changes['range']})")
+            for change in changes["files"]:
+                if change.get("old_path"):
+                    lines.append(f"- {change['status']}: {change['path']} (from {change['old_path']})")
+                else:
+                    lines.append(f"- {change['status']}: {change['path']}")
+            if not changes["files"]:
+                lines.append("- No changed files")
+            lines.append("")
+        lines.append("## File Contents")
         lines.append("")
-    
-    return "\n".join(lines)
+        self._emit(lines)
+
+    def file(self, record: FileRecord) -> None:
+        self._emit_text(format_file_section(record))
+
+    def finish(self, stats: Dict[str, Any]) -> None:
+        lines = []
+        if self._delta is not None:
+            delta = self._delta.result()
+            lines.append(f"## Delta (since {delta['since']})")
+            for status in ("added", "modified", "deleted"):
+                for path in delta[status]:
+                    lines.append(f"- {status}: {path}")
+            lines.append(f"- unchanged: {delta['unchanged']} files")
+            lines.append("")
+        lines += [
+            "## Summary",
+            f"- **Total Files**: {stats['files']}",
+            f"- **Total Lines**: {stats['lines']}",
+        ]
+        if "outline" in stats:
+            outline = summarize_outline(stats["outline"])
+            lines.append(
+                f"- **Outlined Files**: {outline['files']} "
+                f"({outline['original_chars']} -> {outline['outline_chars']} chars, "
+                f"{outline['reduction_percent']}% smaller)"
+            )
+        if stats.get("generated"):
+            counts = ", ".join(f"{reason}: {count}" for reason, count in sorted(stats["generated"].items()))
+            lines.append(f"- **Generated Files**: {sum(stats['generated'].values())} stubbed ({counts})")
+        if "truncated" in stats:
+            truncated = stats["truncated"]
+            notes = [f"{len(truncated['omitted'])} files omitted"]
+            if not truncated["discovery_complete"]:
+                notes.append("file discovery incomplete")
+            lines.append(f"- **Truncated**: {truncated['reason']} ({', '.join(notes)})")
+            for omitted in truncated["omitted"]:
+                lines.append(f"  - {omitted['path']}: {omitted['reason']}")
+        lines.append("")
+        self._emit(lines)
+
+
+def render_markdown(root: str, repo_info: Dict[str, Any], tree_text: str,
+                   files: Dict[str, str], total_files: int, total_lines: int, recent_files=None, file_sizes=None,
+                   changes=None, diffs=None) -> str:
+    """Render repository context as markdown."""
+    buffer = StringIO()
+    writer = MarkdownWriter(buffer)
+    writer.begin(root, repo_info)
+    writer.structure(tree_text, recent_files, changes)
+    for file_path, content in sorted(files.items()):
+        size = file_sizes.get(file_path) if file_sizes else None
+        diff = diffs.get(file_path) if diffs else None
+        writer.file(FileRecord(path=file_path, content=content, size=size, diff=diff))
+    writer.finish({"files": total_files, "lines": total_lines})
+    return buffer.getvalue()
@@ -0,0 +1,184 @@
+"""SQLite renderer: a pack as a database with a full-text index over file contents.
+
+Unlike the text formats, a SQLite pack supports random access: single files,
+globs and full-text searches can be pulled out of it with `rcpack.query`
+without reading the rest of the pack.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import posixpath
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..ingest import FileRecord
+from ..utils import get_language_from_extension, summary_from_stats
+
+
+SCHEMA_VERSION = 2
+
+# Rows are handed to executemany in batches of this many files
+BATCH_SIZE = 256
+
+_SCHEMA = """
+CREATE TABLE pack (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE repo_info (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER,
+    language TEXT,
+    encoding TEXT,
+    truncated INTEGER NOT NULL,
+    binary INTEGER NOT NULL,
+    outlined INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    diff TEXT
+);
+CREATE TABLE tree (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL
+);
+CREATE INDEX tree_parent ON tree (parent);
+"""
+
+# External-content table: the text lives once, in `files`
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE files_fts USING fts5(
+    path, content, content='files', content_rowid='id'
+);
+"""
+
+
+def fts5_available() -> bool:
+    """True if the linked SQLite library was built with FTS5."""
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+class SqliteWriter:
+    """Streaming SQLite renderer.
+
+    Has the same begin/structure/file/finish interface as the text writers
+    but writes to a database file at `path` instead of a text stream.  Every
+    row is written in one transaction, in batches, and the database is only
+    moved into place by `finish`; a pack that fails part way leaves no file
+    behind.  Use as a context manager so the connection is always closed.
+    """
+
+    def __init__(self, path: Union[str, Path], delta=None):
+        self.path = Path(path)
+        self._delta = delta
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        if self._tmp_path.exists():
+            self._tmp_path.unlink()
+        self._conn: Optional[sqlite3.Connection] = sqlite3.connect(str(self._tmp_path), isolation_level=None)
+        # A fresh file that is renamed into place on success needs no journal
+        self._conn.execute("PRAGMA journal_mode = OFF")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.execute("BEGIN")
+        # executescript() would commit; run the statements inside the transaction
+        for statement in _SCHEMA.split(";"):
+            if statement.strip():
+                self._conn.execute(statement)
+        self._fts = fts5_available()
+        if self._fts:
+            self._conn.execute(_FTS_SCHEMA)
+        self._batch: List[Tuple[Any, ...]] = []
+        self._dirs: set = set()
+        self._next_id = 1
+        self._finished = False
+
+    def __enter__(self) -> "SqliteWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if not self._finished and self._tmp_path.exists():
+            self._tmp_path.unlink()
+
+    def _set_pack(self, key: str, value: Any) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO pack VALUES (?, ?)", (key, json.dumps(value)))
+
+    def begin(self, root: str, repo_info: Dict[str, Any]) -> None:
+        self._set_pack("schema_version", SCHEMA_VERSION)
+        self._set_pack("root", root)
+        self._conn.executemany(
+            "INSERT INTO repo_info VALUES (?, ?)",
+            # JSON-encoded, like the pack table, so booleans and None round-trip
+            [(key, json.dumps(value)) for key, value in repo_info.items()],
+        )
+
+    def structure(self, tree_text: str, recent_files: Optional[Dict[str, str]] = None,
+                  changes: Optional[Dict[str, Any]] = None,
+                  modules: Optional[List[Dict[str, Any]]] = None) -> None:
+        if modules is not None:
+            self._set_pack("modules", modules)
+        self._set_pack("structure", tree_text)
+        self._set_pack("recent_changes", recent_files or {})
+        if changes is not None:
+            self._set_pack("changes", changes)
+
+    def _tree_rows(self, path: str) -> List[Tuple[str, Optional[str], str, str]]:
+        rows = []
+        parent = posixpath.dirname(path)
+        rows.append((path, parent or None, posixpath.basename(path), "file"))
+        while parent and parent not in self._dirs:
+            self._dirs.add(parent)
+            grandparent = posixpath.dirname(parent)
+            rows.append((parent, grandparent or None, posixpath.basename(parent), "dir"))
+            parent = grandparent
+        return rows
+
+    def file(self, record: FileRecord) -> None:
+        language = get_language_from_extension(record.path) or None
+        self._batch.append((
+            self._next_id, record.path, record.size, language, record.encoding,
+            int(record.truncated), int(record.binary), int(record.outlined),
+            record.lines, record.content, record.diff,
+        ))
+        self._next_id += 1
+        if len(self._batch) >= BATCH_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._batch:
+            return
+        self._conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._batch)
+        if self._fts:
+            self._conn.executemany(
+                "INSERT INTO files_fts (rowid, path, content) VALUES (?, ?, ?)",
+                [(row[0], row[1], row[9]) for row in self._batch],
+            )
+        tree_rows = []
+        for row in self._batch:
+            tree_rows.extend(self._tree_rows(row[1]))
+        self._conn.executemany("INSERT OR IGNORE INTO tree VALUES (?, ?, ?, ?)", tree_rows)
+        self._batch = []
+
+    def finish(self, stats: Dict[str, Any]) -> None:
+        self._flush()
+        self._set_pack("summary", summary_from_stats(stats))
+        self._set_pack("fts", self._fts)
+        if self._delta is not None:
+            self._set_pack("delta", self._delta.result())
+        self._conn.execute("COMMIT")
+        self._conn.close()
+        self._conn = None
+        os.replace(self._tmp_path, self.path)
+        self._finished = True
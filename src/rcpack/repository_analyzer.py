@@ -1,13 +1,18 @@
 """Repository analysis class that encapsulates repository data and operations."""
 
 import sys
+from contextlib import ExitStack
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime, timedelta
 
-from .gitinfo import get_git_info
-from .discover import discover_files
-from .io_utils import is_binary_file, read_text_safely
+from .gitinfo import GitBlobReader, get_git_info, get_changed_files
+from .discover import discover_files, iter_files, make_path_filter
+from .generated import GeneratedDetector
+from .ingest import DEFAULT_MAX_FILE_BYTES, FileRecord, read_file_record
+from .modules import ModuleScanner
+from .pipeline import filesystem_entries, revision_entries
 
 
 class RepositoryAnalyzer:
@@ -24,35 +29,119 @@ class RepositoryAnalyzer:
         if not self.repo_path.exists():
             raise ValueError(f"Repository path does not exist: {repo_path}")
     
-    def get_git_info(self) -> Dict[str, Any]:
-        """Get git repository information."""
-        return get_git_info(self.repo_path)
+    def get_git_info(self, rev: str = None) -> Dict[str, Any]:
+        """Get git repository information for HEAD, or for revision `rev`."""
+        return get_git_info(self.repo_path, rev=rev)
     
     def discover_files(self, include_patterns: List[str] = None, 
-                      exclude_patterns: List[str] = None) -> List[Path]:
-        """Discover files in the repository."""
+                      exclude_patterns: List[str] = None,
+                      index_dir: Path = None) -> List[Path]:
+        """Discover files in the repository.
+        
+        With `index_dir`, a persistent discovery index lets rescans skip
+        listing directories that have not changed.
+        """
         return discover_files(
             [self.repo_path], 
             self.repo_path, 
             include_patterns or [], 
-            exclude_patterns or []
+            exclude_patterns or [],
+            index_dir=index_dir
         )
     
+    def iter_files(self, include_patterns: List[str] = None,
+                   exclude_patterns: List[str] = None,
+                   recent_days: Optional[int] = None,
+                   limit: Optional[int] = None,
+                   index_dir: Path = None,
+                   modules: Optional[ModuleScanner] = None) -> Iterator[Path]:
+        """Yield discovered files lazily, in pack order (sorted POSIX paths).
+        
+        Directories are listed as the walk reaches them, so the first file
+        comes out after the first listing.  With `recent_days`, only files
+        modified in the last N days are yielded; `limit` stops after that
+        many files, and stopping early skips the rest of the walk.
+        
+        With `modules` (a ModuleScanner over this repository), files come
+        from its module-aware walk and the scanner's own patterns apply.
+        """
+        if modules is not None:
+            files = modules.iter_files()
+        else:
+            files = iter_files([self.repo_path], self.repo_path, include_patterns or [], exclude_patterns or [],
+                               index_dir=index_dir)
+        if recent_days is not None:
+            files = self._iter_recent(files, recent_days)
+        yield from islice(files, limit)
+    
+    def iter_records(self, include_patterns: List[str] = None,
+                     exclude_patterns: List[str] = None,
+                     recent_days: Optional[int] = None,
+                     limit: Optional[int] = None,
+                     max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+                     rev: str = None,
+                     skip_generated: bool = True,
+                     index_dir: Path = None,
+                     verbose: bool = False) -> Iterator[FileRecord]:
+        """Yield a FileRecord per discovered file, read lazily and in pack order.
+        
+        Takes the `iter_files` filters plus the pack's reading options.  With
+        `rev`, files come from that commit or tree-ish through one `git
+        cat-file --batch` process.  Files that cannot be read are skipped.
+        Closing the generator early (or breaking out of a for loop over it)
+        stops reading and reaps the git process; no file is left open
+        between records.
+        """
+        if rev is not None and recent_days is not None:
+            raise ValueError("recent_days cannot be combined with rev")
+        with ExitStack() as stack:
+            if rev is not None:
+                blob_reader = stack.enter_context(GitBlobReader(self.repo_path))
+                entries = islice(revision_entries(
+                    self.repo_path, rev, blob_reader, include_patterns, exclude_patterns,
+                    max_file_bytes=max_file_bytes, verbose=verbose,
+                    detector=GeneratedDetector.for_revision(blob_reader, rev) if skip_generated else None,
+                ), limit)
+            else:
+                entries = filesystem_entries(
+                    self.iter_files(include_patterns, exclude_patterns, recent_days, limit, index_dir),
+                    self.repo_path, max_file_bytes=max_file_bytes, verbose=verbose,
+                    detector=GeneratedDetector.for_directory(self.repo_path) if skip_generated else None,
+                )
+            for rel_path, load in entries:
+                try:
+                    record = load()
+                except Exception as exc:
+                    print(f"[rcpack] error reading {rel_path}: {exc}", file=sys.stderr)
+                    continue
+                if record is not None:
+                    yield record
+    
+    def get_changed_files(self, diff_range: str = None, staged: bool = False,
+                          include_patterns: List[str] = None,
+                          exclude_patterns: List[str] = None) -> List[Dict[str, Any]]:
+        """Get files changed by a git diff, filtered with the discovery rules.
+        
+        Uses a single `git diff --name-status -z` call instead of walking the tree.
+        """
+        accepts = make_path_filter(include_patterns or [], exclude_patterns or [])
+        changes = get_changed_files(self.repo_path, diff_range, staged)
+        return [change for change in changes if accepts(change["path"])]
+    
     def get_recent_files(self, files: List[Path], days: int = 7) -> List[Path]:
         """Filter files to only those modified in the last N days."""
+        return list(self._iter_recent(files, days))
+    
+    def _iter_recent(self, files, days: int) -> Iterator[Path]:
         cutoff_date = datetime.now() - timedelta(days=days)
-        recent_files = []
-        
         for file_path in files:
             try:
                 mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
                 if mtime >= cutoff_date:
-                    recent_files.append(file_path)
+                    yield file_path
             except Exception:
                 # Skip files we can't read
                 continue
-                
-        return recent_files
     
     def process_file(self, file_path: Path, verbose: bool = False) -> Tuple[str, str, str]:
         """Process a single file and return its data.
@@ -65,25 +154,16 @@ class RepositoryAnalyzer:
         
         if verbose:
             print(f"Reading file: {relative_path}", file=sys.stderr)
-            
-        file_size = file_path.stat().st_size
-        
-        # Check if file is binary first
-        if is_binary_file(file_path):
-            if verbose:
-                print(f"Skipping binary file: {relative_path}", file=sys.stderr)
-            content = f"[Binary file skipped: {file_path.name}, {file_size} bytes]"
-            return relative_path_str, content, str(file_size)
         
-        # Use robust text reading with encoding fallbacks
         try:
-            content, encoding_used, truncated = read_text_safely(file_path)
-            if truncated:
-                if verbose:
-                    print(f"File truncated: {relative_path}", file=sys.stderr)
-                content += f"\n\n[... TRUNCATED to first 16KB ...]"
-            return relative_path_str, content, str(file_size)
+            record = read_file_record(file_path, relative_path_str)
         except Exception:
             if verbose:
                 print(f"Error reading file: {relative_path}", file=sys.stderr)
-            raise  # Re-raise to handle in calling code
\ No newline at end of file
+            raise  # Re-raise to handle in calling code
+        
+        if verbose and record.binary:
+            print(f"Skipping binary file: {relative_path}", file=sys.stderr)
+        if verbose and record.truncated:
+            print(f"File truncated: {relative_path}", file=sys.stderr)
+        return relative_path_str, record.content, str(record.size)
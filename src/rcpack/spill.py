@@ -0,0 +1,93 @@
+"""Memory budget for ingested content, with spill-over to a temporary segment file."""
+
+from __future__ import annotations
+
+import re
+import tempfile
+import threading
+from typing import Dict
+
+from .ingest import FileRecord
+
+
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte size such as "65536", "512K", "256MB" or "2G"."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*", text.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {text!r} (expected e.g. 512M or 2G)")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit])
+
+
+class SpillStore:
+    """Keeps ingested file contents within `max_memory` bytes.
+
+    Records are admitted when they are read.  While the admitted contents fit
+    in the budget they stay in memory; past it, a record's content is appended
+    to an anonymous temporary segment file and read back only when the record
+    is rendered.  Safe to use from several threads; use as a context manager
+    so the segment file is closed.
+    """
+
+    def __init__(self, max_memory: int):
+        self.max_memory = max_memory
+        self.in_memory = 0
+        self.spilled_bytes = 0
+        self.spilled_files = 0
+        self._charged: Dict[int, int] = {}
+        self._segment = None
+        self._segment_end = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "SpillStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    def admit(self, record: FileRecord) -> None:
+        """Account for `record`, spilling its content if it does not fit."""
+        size = len(record.content)
+        with self._lock:
+            if record.spilled is not None or id(record) in self._charged:
+                return
+            if self.in_memory + size <= self.max_memory:
+                self.in_memory += size
+                self._charged[id(record)] = size
+                return
+            if self._segment is None:
+                self._segment = tempfile.TemporaryFile(prefix="rcpack-spill-")
+            data = record.content.encode("utf-8", errors="surrogatepass")
+            self._segment.seek(self._segment_end)
+            self._segment.write(data)
+            record.spilled = (self._segment_end, len(data))
+            record.content = ""
+            self._segment_end += len(data)
+            self.spilled_bytes += len(data)
+            self.spilled_files += 1
+
+    def restore(self, record: FileRecord) -> FileRecord:
+        """Bring a spilled record's content back from the segment file."""
+        if record.spilled is None:
+            return record
+        offset, length = record.spilled
+        with self._lock:
+            self._segment.seek(offset)
+            data = self._segment.read(length)
+        record.content = data.decode("utf-8", errors="surrogatepass")
+        record.spilled = None
+        return record
+
+    def release(self, record: FileRecord) -> None:
+        """Forget a rendered record; its memory no longer counts against the budget."""
+        with self._lock:
+            self.in_memory -= self._charged.pop(id(record), 0)
@@ -1,7 +1,7 @@
 """Tree view generation for repository structure."""
 
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 def create_tree_view(repo_path: Path, files_data: Dict[str, str]) -> str:
@@ -10,8 +10,12 @@ def create_tree_view(repo_path: Path, files_data: Dict[str, str]) -> str:
     return render_tree(paths)
 
 
-def render_tree(paths: List[str]) -> str:
-    """Render a tree view from a list of relative POSIX paths."""
+def render_tree(paths: List[str], roots: Optional[Dict[str, str]] = None) -> str:
+    """Render a tree view from a list of relative POSIX paths.
+
+    `roots` maps directory paths (e.g. module roots) to a label shown in
+    brackets after the directory name.
+    """
     tree_structure: dict = {}
 
     for file_path in paths:
@@ -24,15 +28,17 @@ def render_tree(paths: List[str]) -> str:
         if path_parts:
             current_level[path_parts[-1]] = None
 
-    def _render(structure: dict, prefix: str = "") -> str:
+    def _render(structure: dict, prefix: str = "", parent: str = "") -> str:
         lines = []
         items = sorted(structure.items(), key=lambda x: (x[1] is None, x[0]))
         for i, (name, subtree) in enumerate(items):
             is_last = i == len(items) - 1
-            lines.append(f"{prefix}{'└── ' if is_last else '├── '}{name}")
+            label = roots.get(parent + name) if roots and subtree is not None else None
+            shown = f"{name} [{label}]" if label else name
+            lines.append(f"{prefix}{'└── ' if is_last else '├── '}{shown}")
             if subtree is not None:
                 extension = ("    " if is_last else "│   ")
-                lines.append(_render(subtree, prefix + extension))
+                lines.append(_render(subtree, prefix + extension, parent + name + "/"))
         return "\n".join(filter(None, lines))
 
     if not tree_structure:
@@ -1,6 +1,6 @@
 """Utility functions shared across the rcpack package."""
 
-from typing import Dict, Any, Optional, Set
+from typing import Dict, Any, List, Optional, Set
 
 
 # Shared constants for file discovery and processing
@@ -26,6 +26,22 @@ SKIP_DIRECTORY_NAMES = {
 }
 
 
+# Comprehensive language mapping combining both existing mappings
+LANGUAGE_BY_EXTENSION = {
+    'py': 'python', 'js': 'javascript', 'ts': 'typescript',
+    'jsx': 'javascript', 'tsx': 'typescript',
+    'java': 'java', 'cpp': 'cpp', 'c': 'c', 'h': 'c',
+    'cs': 'csharp', 'php': 'php', 'rb': 'ruby',
+    'go': 'go', 'rs': 'rust', 'swift': 'swift', 'kt': 'kotlin',
+    'html': 'html', 'css': 'css', 'scss': 'scss', 'sass': 'sass',
+    'json': 'json', 'yaml': 'yaml', 'yml': 'yaml',
+    'toml': 'toml', 'xml': 'xml', 'sql': 'sql', 'sh': 'bash',
+    'bash': 'bash', 'zsh': 'bash', 'fish': 'fish',
+    'md': 'markdown', 'txt': 'text',
+    'dockerfile': 'dockerfile', 'makefile': 'makefile'
+}
+
+
 def get_language_from_extension(file_path_or_ext: str) -> str:
     """Get the language identifier for syntax highlighting from a file path or extension.
     
@@ -43,22 +59,7 @@ def get_language_from_extension(file_path_or_ext: str) -> str:
         # It's already an extension, clean it up
         ext = file_path_or_ext.lower().lstrip(".")
     
-    # Comprehensive language mapping combining both existing mappings
-    language_map = {
-        'py': 'python', 'js': 'javascript', 'ts': 'typescript',
-        'jsx': 'javascript', 'tsx': 'typescript',
-        'java': 'java', 'cpp': 'cpp', 'c': 'c', 'h': 'c',
-        'cs': 'csharp', 'php': 'php', 'rb': 'ruby',
-        'go': 'go', 'rs': 'rust', 'swift': 'swift', 'kt': 'kotlin',
-        'html': 'html', 'css': 'css', 'scss': 'scss', 'sass': 'sass',
-        'json': 'json', 'yaml': 'yaml', 'yml': 'yaml',
-        'toml': 'toml', 'xml': 'xml', 'sql': 'sql', 'sh': 'bash',
-        'bash': 'bash', 'zsh': 'bash', 'fish': 'fish',
-        'md': 'markdown', 'txt': 'text',
-        'dockerfile': 'dockerfile', 'makefile': 'makefile'
-    }
-    
-    return language_map.get(ext, '')
+    return LANGUAGE_BY_EXTENSION.get(ext, '')
 
 
 def build_repository_data(
@@ -69,7 +70,16 @@ def build_repository_data(
     total_files: int,
     total_lines: int,
     recent_files: Optional[Dict[str, str]] = None,
-    file_sizes: Optional[Dict[str, str]] = None
+    file_sizes: Optional[Dict[str, str]] = None,
+    outline: Optional[Dict[str, Any]] = None,
+    changes: Optional[Dict[str, Any]] = None,
+    diffs: Optional[Dict[str, str]] = None,
+    truncated: Optional[Dict[str, Any]] = None,
+    generated: Optional[Dict[str, int]] = None,
+    manifest: Optional[Dict[str, Dict[str, Any]]] = None,
+    delta: Optional[Dict[str, Any]] = None,
+    include_content: bool = True,
+    modules: Optional[List[Dict[str, Any]]] = None
 ) -> Dict[str, Any]:
     """Build the standard repository data structure used by all renderers.
     
@@ -82,18 +92,90 @@ def build_repository_data(
         total_lines: Total number of lines
         recent_files: Optional dict of recently modified files
         file_sizes: Optional dict of file sizes
+        outline: Optional outline stats (files, original_chars, outline_chars)
+            from an --outline run
+        changes: Optional diff description ({"range", "files"}) for diff-scoped packs
+        diffs: Optional dict of file paths to unified diff hunks
+        truncated: Optional truncation details from a --deadline run (reason,
+            discovery_complete, and the omitted paths with their reasons)
+        generated: Optional counts, by reason, of files packed as generated stubs
+        manifest: Optional per-file sha256/size/mtime_ns/blob entries (see rcpack.delta)
+        delta: Optional added/modified/deleted lists of a --since-pack delta pack
+        include_content: False for a compact manifest pack without "files"
+        modules: Optional per-module sections (path, depth, repo_info, files)
+            of a --modules pack
         
     Returns:
         Standardized data dictionary for rendering
     """
-    return {
+    data = {
         "root": root,
         "repo_info": repo_info,
-        "structure": tree_text,
-        "recent_changes": recent_files or {},
-        "files": files,
-        "file_sizes": file_sizes or {},
-        "summary": {"total_files": total_files, "total_lines": total_lines},
+    }
+    if modules is not None:
+        data["modules"] = modules
+    data["structure"] = tree_text
+    data["recent_changes"] = recent_files or {}
+    if changes is not None:
+        data["changes"] = changes
+    if include_content:
+        data["files"] = files
+    data["file_sizes"] = file_sizes or {}
+    if manifest is not None:
+        data["manifest"] = manifest
+    summary: Dict[str, Any] = {"total_files": total_files, "total_lines": total_lines}
+    if outline is not None:
+        data["outlined_files"] = list(outline["files"])
+        summary["outline"] = summarize_outline(outline)
+    if diffs is not None:
+        data["diffs"] = diffs
+    if delta is not None:
+        data["delta"] = delta
+    if generated:
+        summary["generated"] = generated
+    if truncated is not None:
+        summary["truncated"] = truncated
+    data["summary"] = summary
+    return data
+
+
+def summary_from_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the "summary" section of a pack from pipeline stats.
+    
+    Args:
+        stats: Stats returned by the packing pipeline
+        
+    Returns:
+        Summary dictionary, as in `build_repository_data`
+    """
+    summary: Dict[str, Any] = {"total_files": stats["files"], "total_lines": stats["lines"]}
+    if "outline" in stats:
+        summary["outline"] = summarize_outline(stats["outline"])
+    if stats.get("generated"):
+        summary["generated"] = stats["generated"]
+    if "truncated" in stats:
+        summary["truncated"] = stats["truncated"]
+    return summary
+
+
+def summarize_outline(outline: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarize outline stats as counts plus the size reduction in percent.
+    
+    Args:
+        outline: Outline stats with the outlined file paths and their
+            character counts before and after outlining
+        
+    Returns:
+        Dictionary with files, original_chars, outline_chars and reduction_percent
+    """
+    original_chars = outline["original_chars"]
+    outline_chars = outline["outline_chars"]
+    reduction = 100.0 * (original_chars - outline_chars) / original_chars if original_chars else 0.0
+    return {
+        "files": len(outline["files"]),
+        "original_chars": original_chars,
+        "outline_chars": outline_chars,
+        "reduction_percent": round(reduction, 1),
     }
 
 
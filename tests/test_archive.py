@@ -0,0 +1,62 @@
+import io
+import json
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from rcpack import packager
+from rcpack.archive import is_archive
+
+
+def _make_tree(root: Path) -> None:
+    (root / "src").mkdir()
+    (root / "node_modules").mkdir()
+    (root / "src" / "app.py").write_text("print('hi')\n", encoding="utf-8")
+    (root / "src" / "big.txt").write_text("x" * 100, encoding="utf-8")
+    (root / "src" / "blob.json").write_bytes(b"\x00\x01\x02")
+    (root / "node_modules" / "dep.js").write_text("x\n", encoding="utf-8")
+    (root / "README.md").write_text("# hi\n", encoding="utf-8")
+
+
+def _pack(path: Path) -> dict:
+    out, _ = packager.build_package([str(path)], None, ["*.md"], 64, fmt="json")
+    return json.loads(out)
+
+
+@pytest.mark.parametrize("suffix", [".tar.gz", ".zip"])
+def test_archive_pack_matches_extracted_directory(tmp_path: Path, suffix: str):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    archive_path = tmp_path / f"snapshot{suffix}"
+    members = sorted(p for p in tree.rglob("*") if p.is_file())
+    if suffix == ".zip":
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            # Reverse order: packs must not depend on member order
+            for path in reversed(members):
+                archive.write(path, path.relative_to(tree).as_posix())
+    else:
+        with tarfile.open(archive_path, "w:gz") as archive:
+            for path in reversed(members):
+                archive.add(path, "./" + path.relative_to(tree).as_posix())
+
+    assert is_archive(archive_path)
+    from_dir = _pack(tree)
+    from_archive = _pack(archive_path)
+    assert list(from_archive["files"]) == ["src/app.py", "src/big.txt", "src/blob.json"]
+    for key in ("structure", "files", "file_sizes", "summary"):
+        assert from_archive[key] == from_dir[key]
+    assert from_archive["repo_info"]["note"] == f"Archive: snapshot{suffix}"
+
+
+def test_archive_skips_members_outside_extraction_dir(tmp_path: Path):
+    archive_path = tmp_path / "evil.tar"
+    with tarfile.open(archive_path, "w") as archive:
+        for name in ("../escape.py", "/abs.py", "ok.py"):
+            info = tarfile.TarInfo(name)
+            info.size = 2
+            archive.addfile(info, io.BytesIO(b"x\n"))
+
+    assert list(_pack(archive_path)["files"]) == ["ok.py"]
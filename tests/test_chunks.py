@@ -0,0 +1,85 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from rcpack import cli, packager
+from rcpack.chunking import Chunker, chunk_id, estimate_tokens
+from rcpack.ingest import FileRecord
+
+
+def _source(count: int) -> str:
+    return "".join(f"def function_{i}(value):\n    return value * {i}\n\n" for i in range(count))
+
+
+def test_chunks_are_bounded_line_aligned_and_cover_the_file():
+    content = _source(200)
+    lines = content.splitlines(keepends=True)
+    chunker = Chunker(max_chars=400, overlap=2)
+    chunks = list(chunker.chunks(FileRecord(path="src/mod.py", content=content)))
+
+    assert len(chunks) > 5
+    assert [chunk["chunk"] for chunk in chunks] == list(range(len(chunks)))
+    covered = 0
+    for chunk in chunks:
+        assert len(chunk["content"]) <= 400
+        assert chunk["content"] == "".join(lines[chunk["start_line"] - 1:chunk["end_line"]])
+        assert chunk["path"] == "src/mod.py" and chunk["language"] == "python"
+        # each chunk starts at most `overlap` lines before the previous one ended
+        assert covered - 2 <= chunk["start_line"] - 1 <= covered
+        covered = chunk["end_line"]
+    assert covered == len(lines)
+
+
+def test_chunk_ids_survive_edits_elsewhere_in_the_file():
+    chunker = Chunker(max_chars=400, overlap=1)
+    before = list(chunker.chunks(FileRecord(path="mod.py", content=_source(200))))
+    edited = "import os\n" + _source(200)
+    after = list(chunker.chunks(FileRecord(path="mod.py", content=edited)))
+
+    assert [chunk["id"] for chunk in chunker.chunks(FileRecord(path="mod.py", content=_source(200)))] == \
+        [chunk["id"] for chunk in before]
+    kept = {chunk["id"] for chunk in before} & {chunk["id"] for chunk in after}
+    # only the chunks around the edit change
+    assert len(kept) >= len(before) - 2
+    assert chunk_id("mod.py", "x\n") != chunk_id("other.py", "x\n")
+
+
+def test_token_bounds_and_long_lines():
+    chunker = Chunker(max_tokens=50, overlap=0)
+    record = FileRecord(path="data.txt", content="short\n" + "y" * 1000 + "\nlast\n")
+    chunks = list(chunker.chunks(record))
+    assert all(estimate_tokens(chunk["content"]) <= 50 for chunk in chunks)
+    assert "".join(chunk["content"] for chunk in chunks) == record.content
+    pieces = [chunk for chunk in chunks if "y" in chunk["content"]]
+    assert len(pieces) > 1 and all(chunk["start_line"] == chunk["end_line"] == 2 for chunk in pieces)
+
+    words = Chunker(max_tokens=10, overlap=0, count_tokens=lambda text: len(text.split()))
+    assert all(len(c["content"].split()) <= 10 for c in words.chunks(FileRecord(path="a.txt", content="a b c\n" * 20)))
+    assert list(chunker.chunks(FileRecord(path="x.bin", content="[Binary file]", binary=True))) == []
+    with pytest.raises(ValueError):
+        Chunker(max_chars=100, max_tokens=100)
+
+
+def test_chunks_format_and_generator_agree(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "a.py").write_text(_source(40), encoding="utf-8")
+    (repo / "b.md").write_text("# Title\n\nSome text.\n", encoding="utf-8")
+    (repo / "package-lock.json").write_text("{}\n", encoding="utf-8")
+
+    chunker = Chunker(max_chars=300)
+    text, _ = packager.build_package([str(repo)], None, None, 16_384, fmt="chunks", chunker=chunker)
+    written = [json.loads(line) for line in text.splitlines()]
+    assert written == list(packager.iter_chunks([str(repo)], chunker=chunker))
+    assert {chunk["path"] for chunk in written} == {"a.py", "b.md"}
+
+    generator = packager.iter_chunks([str(repo)], chunker=chunker)
+    assert next(generator)["path"] == "a.py"
+    generator.close()
+
+    output = tmp_path / "chunks.jsonl"
+    monkeypatch.setattr(sys, "argv", ["rcpack", str(repo), "-f", "chunks", "--chunk-size", "300", "-o", str(output)])
+    cli.main()
+    assert output.read_text(encoding="utf-8") == text
@@ -1,8 +1,11 @@
-from rcpack import cli
+from rcpack import cli, pipeline
 from datetime import datetime, timedelta
+import argparse
 import io
 import sys
 
+import pytest
+
 
 def test_log_verbose_when_enabled():
     captured_output = io.StringIO()
@@ -68,3 +71,46 @@ def test_human_readable_age_singular_hour():
     one_hour_ago = datetime.now() - timedelta(hours=1, minutes=0)
     result = cli.human_readable_age(one_hour_ago)
     assert result == "1 hour ago"
+
+
+def test_parse_formats_and_resolve_outputs():
+    assert cli.parse_formats("text, json") == ["text", "json"]
+    for bad in ("text,bogus", "json,json", ""):
+        with pytest.raises(argparse.ArgumentTypeError):
+            cli.parse_formats(bad)
+
+    assert cli.resolve_outputs(["text"]) == [None]
+    assert cli.resolve_outputs(["text", "json"], ["a.md", "b.json"]) == ["a.md", "b.json"]
+    assert cli.resolve_outputs(["text", "sqlite"], template="out/pack.{ext}") == ["out/pack.md", "out/pack.db"]
+    with pytest.raises(ValueError):
+        cli.resolve_outputs(["text", "json"])
+    with pytest.raises(ValueError):
+        cli.resolve_outputs(["text", "json"], ["a.md"])
+    with pytest.raises(ValueError):
+        cli.resolve_outputs(["text", "json"], template="pack.out")
+
+
+def test_several_formats_from_one_pass(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "main.py").write_text("print('hi')\n", encoding="utf-8")
+    (repo / "README.md").write_text("# hi\n", encoding="utf-8")
+    out_dir = tmp_path / "out"
+
+    reads = []
+    read_file_record = pipeline.read_file_record
+
+    def counting_read(path, *args, **kwargs):
+        reads.append(path.name)
+        return read_file_record(path, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "read_file_record", counting_read)
+    monkeypatch.setattr(sys, "argv", ["rcpack", str(repo), "-f", "text,json,yaml", "--output-template", f"{out_dir}/pack.{{ext}}"])
+    cli.main()
+    # Every format was rendered from a single read of each file
+    assert sorted(reads) == ["README.md", "main.py"]
+    for fmt, ext in (("text", "md"), ("json", "json"), ("yaml", "yaml")):
+        single = tmp_path / f"single.{ext}"
+        monkeypatch.setattr(sys, "argv", ["rcpack", str(repo), "-f", fmt, "-o", str(single)])
+        cli.main()
+        assert (out_dir / f"pack.{ext}").read_text(encoding="utf-8") == single.read_text(encoding="utf-8")
@@ -0,0 +1,112 @@
+import json
+import sys
+import threading
+import time
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from rcpack import cli, packager
+from rcpack.ingest import FileRecord, count_lines
+from rcpack.pipeline import run_pipeline
+from rcpack.renderer.jsonyaml import JsonWriter
+from rcpack.renderer.markdown import MarkdownWriter
+
+
+def _loader(path: str, release: threading.Event = None):
+    def load():
+        if release is not None and not release.wait(timeout=5):
+            raise TimeoutError(path)
+        content = f"# {path}\n"
+        return FileRecord(path=path, content=content, size=len(content), lines=count_lines(content))
+    return load
+
+
+def test_deadline_writes_files_read_in_time(tmp_path: Path):
+    release = threading.Event()
+    entries = [
+        ("a.py", _loader("a.py")),
+        ("b.py", _loader("b.py", release)),
+        ("c.py", _loader("c.py")),
+    ] + [(f"z{i}.py", _loader(f"z{i}.py", release)) for i in range(10)]
+    cancelled = []
+
+    buffer = StringIO()
+    stats = run_pipeline(
+        entries, JsonWriter(buffer), root="/repo", repo_info={"is_repo": False},
+        deadline=time.monotonic() + 0.3, on_deadline=[lambda: cancelled.append(True)],
+        workers=2, window=2,
+    )
+    release.set()
+
+    data = json.loads(buffer.getvalue())
+    # c.py was read after the blocked b.py and is still written, in pack order
+    assert list(data["files"]) == ["a.py", "c.py"]
+    truncated = data["summary"]["truncated"]
+    assert truncated == stats["truncated"]
+    assert truncated["discovery_complete"] is True
+    reasons = {item["path"]: item["reason"] for item in truncated["omitted"]}
+    assert reasons["b.py"] == "read cancelled at deadline"
+    assert reasons["z9.py"] == "not read before deadline"
+    assert len(reasons) + stats["files"] == 13
+    assert cancelled == [True]
+
+
+def test_deadline_during_discovery():
+    def entries():
+        yield "a.py", _loader("a.py")
+        time.sleep(2)
+        yield "b.py", _loader("b.py")
+
+    buffer = StringIO()
+    start = time.monotonic()
+    stats = run_pipeline(entries(), MarkdownWriter(buffer), root="/repo", repo_info={"is_repo": False},
+                         deadline=time.monotonic() + 0.2)
+    assert time.monotonic() - start < 1.5
+    assert stats["truncated"]["discovery_complete"] is False
+    assert stats["truncated"]["reason"] == "deadline reached during discovery"
+    assert "- **Truncated**: deadline reached during discovery" in buffer.getvalue()
+
+
+def test_build_package_within_deadline_is_complete(tmp_path: Path):
+    (tmp_path / "a.py").write_text("x = 1\n", encoding="utf-8")
+    out, stats = packager.build_package([str(tmp_path)], None, None, 16_384, fmt="json", deadline_ms=60_000)
+    assert "truncated" not in stats
+    assert out == packager.build_package([str(tmp_path)], None, None, 16_384, fmt="json")[0]
+
+
+def test_cli_exit_code_when_truncated(tmp_path: Path, monkeypatch, capsys):
+    def slow_discovery(analyzer, recent, recent_files_info, verbose, index_dir=None, modules=None):
+        yield analyzer.repo_path / "a.py"
+        time.sleep(2)
+        yield analyzer.repo_path / "b.py"
+
+    (tmp_path / "a.py").write_text("x = 1\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text("y = 2\n", encoding="utf-8")
+    monkeypatch.setattr(cli, "iter_discovered_files", slow_discovery)
+    monkeypatch.setattr(sys, "argv", ["rcpack", str(tmp_path), "--deadline", "200", "-o", str(tmp_path / "out.md")])
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main()
+    assert exit_info.value.code == cli.EXIT_TRUNCATED
+    assert "Pack truncated" in capsys.readouterr().err
+    assert "### a.py" in (tmp_path / "out.md").read_text(encoding="utf-8")
+
+
+def test_files_are_read_ahead_while_discovery_runs():
+    def entries():
+        for i in range(500):
+            yield f"f{i:03}.py", _loader(f"f{i:03}.py")
+        time.sleep(0.5)
+
+    buffer = StringIO()
+    stats = run_pipeline(entries(), JsonWriter(buffer), root="/repo", repo_info={"is_repo": False},
+                         deadline=time.monotonic() + 0.3)
+    # The whole tree was read while its last directory was still being walked
+    assert stats["files"] == 500
+    assert [item["reason"] for item in stats["truncated"]["omitted"]] == []
+    assert stats["truncated"]["discovery_complete"] is False
+
+    stats = run_pipeline(entries(), JsonWriter(StringIO()), root="/repo", repo_info={"is_repo": False},
+                         deadline=time.monotonic() + 0.3, read_ahead=100)
+    assert 0 < stats["files"] < 500
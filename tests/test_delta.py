@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+from rcpack import cli, packager, pipeline
+from rcpack.delta import content_hash
+from test_gitinfo import run_git
+
+
+def _make_repo(root: Path) -> None:
+    (root / "src").mkdir()
+    (root / "src" / "keep.py").write_text("keep = 1\n", encoding="utf-8")
+    (root / "src" / "touch.py").write_text("touch = 1\n", encoding="utf-8")
+    (root / "src" / "edit.py").write_text("edit = 1\n", encoding="utf-8")
+    (root / "gone.py").write_text("gone = 1\n", encoding="utf-8")
+
+
+def test_json_pack_carries_manifest(tmp_path: Path):
+    _make_repo(tmp_path)
+    data = json.loads(packager.build_package([str(tmp_path)], None, None, 16_384, fmt="json")[0])
+    entry = data["manifest"]["src/keep.py"]
+    assert entry["sha256"] == content_hash("keep = 1\n")
+    assert entry["size"] == 9
+    assert entry["mtime_ns"] == (tmp_path / "src" / "keep.py").stat().st_mtime_ns
+    assert list(data["manifest"]) == list(data["files"])
+
+    compact = yaml.safe_load(packager.build_package([str(tmp_path)], None, None, 16_384, fmt="yaml", manifest_only=True)[0])
+    assert "files" not in compact
+    assert compact["manifest"] == data["manifest"]
+
+
+@pytest.mark.parametrize("previous_fmt", ["json", "yaml"])
+def test_delta_pack_since_previous(tmp_path: Path, monkeypatch, previous_fmt: str):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _make_repo(repo)
+    previous = tmp_path / f"previous.{previous_fmt}"
+    previous.write_text(
+        packager.build_package([str(repo)], None, None, 16_384, fmt=previous_fmt, manifest_only=True)[0],
+        encoding="utf-8",
+    )
+
+    (repo / "src" / "edit.py").write_text("edit = 2\n", encoding="utf-8")
+    stat = (repo / "src" / "touch.py").stat()
+    os.utime(repo / "src" / "touch.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+    (repo / "gone.py").unlink()
+    (repo / "new.py").write_text("new = 1\n", encoding="utf-8")
+
+    read = []
+    real_read = pipeline.read_file_record
+
+    def counting_read(path, rel_path, *args, **kwargs):
+        read.append(rel_path)
+        return real_read(path, rel_path, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "read_file_record", counting_read)
+    out, stats = packager.build_package([str(repo)], None, None, 16_384, fmt="json", since_pack=str(previous))
+    data = json.loads(out)
+
+    assert data["files"] == {"new.py": "new = 1\n", "src/edit.py": "edit = 2\n"}
+    assert data["delta"] == {
+        "since": previous.name, "since_commit": None,
+        "added": ["new.py"], "modified": ["src/edit.py"], "deleted": ["gone.py"], "unchanged": 2,
+    }
+    # keep.py is skipped on size+mtime; touch.py is read but its content is unchanged
+    assert sorted(read) == ["new.py", "src/edit.py", "src/touch.py"]
+    assert list(data["manifest"]) == ["new.py", "src/edit.py", "src/keep.py", "src/touch.py"]
+    assert "gone.py" not in data["structure"] and "keep.py" in data["structure"]
+    assert stats["files"] == 2
+
+    md, _ = packager.build_package([str(repo)], None, None, 16_384, fmt="markdown", since_pack=str(previous))
+    assert "## Delta (since previous." in md and "- deleted: gone.py" in md
+
+
+def test_delta_pack_of_revisions_uses_blob_ids(tmp_path: Path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    run_git(repo, "init", "-q")
+    _make_repo(repo)
+    run_git(repo, "add", ".")
+    run_git(repo, "commit", "-qm", "first")
+    (repo / "src" / "edit.py").write_text("edit = 2\n", encoding="utf-8")
+    run_git(repo, "commit", "-qam", "second")
+
+    previous = tmp_path / "previous.json"
+    previous.write_text(packager.build_package([str(repo)], None, None, 16_384, fmt="json", rev="HEAD~1")[0], encoding="utf-8")
+    assert json.loads(previous.read_text(encoding="utf-8"))["manifest"]["gone.py"]["blob"] == run_git(repo, "rev-parse", "HEAD~1:gone.py")
+
+    data = json.loads(packager.build_package([str(repo)], None, None, 16_384, fmt="json", rev="HEAD", since_pack=str(previous))[0])
+    assert data["files"] == {"src/edit.py": "edit = 2\n"}
+    assert data["delta"]["unchanged"] == 3
+    assert data["delta"]["since_commit"] == run_git(repo, "rev-parse", "HEAD~1")
+
+
+def test_delta_pack_rejects_a_deadline(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _make_repo(repo)
+    previous = tmp_path / "previous.json"
+    previous.write_text(packager.build_package([str(repo)], None, None, 16_384, fmt="json")[0], encoding="utf-8")
+
+    with pytest.raises(ValueError, match="deadline"):
+        packager.build_package([str(repo)], None, None, 16_384, fmt="json", since_pack=str(previous), deadline_ms=60)
+
+    monkeypatch.setattr(sys, "argv", ["rcpack", str(repo), "-f", "json", "--since-pack", str(previous), "--deadline", "60"])
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main()
+    assert exit_info.value.code == cli.EXIT_ERROR
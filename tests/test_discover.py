@@ -0,0 +1,96 @@
+import os
+from pathlib import Path
+
+from rcpack import discover
+
+
+def _backdate(*paths: Path) -> None:
+    # Index entries are only trusted for directories not modified right
+    # before the index was saved
+    for path in paths:
+        os.utime(path, ns=(1_000_000_000_000_000_000, 1_000_000_000_000_000_000))
+
+
+def _make_tree(root: Path) -> None:
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "node_modules" / "dep").mkdir(parents=True)
+    (root / "src" / "pkg" / "mod.py").write_text("x = 1\n", encoding="utf-8")
+    (root / "src" / "main.py").write_text("x = 1\n", encoding="utf-8")
+    (root / "src" / "image.png").write_bytes(b"\x89PNG")
+    (root / "node_modules" / "dep" / "index.js").write_text("x\n", encoding="utf-8")
+    (root / "README.md").write_text("# hi\n", encoding="utf-8")
+
+
+def _relative(files, root: Path):
+    return [path.relative_to(root).as_posix() for path in files]
+
+
+def test_discover_files_filters_and_sorts(tmp_path: Path):
+    _make_tree(tmp_path)
+    files = discover.discover_files([tmp_path], tmp_path, [], [])
+    assert _relative(files, tmp_path) == ["README.md", "src/main.py", "src/pkg/mod.py"]
+
+    files = discover.discover_files([tmp_path], tmp_path, ["src/*"], ["*/pkg/*"])
+    assert _relative(files, tmp_path) == ["src/image.png", "src/main.py"]
+
+
+def test_discovery_index_reuses_unchanged_directories(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _make_tree(repo)
+    index_dir = tmp_path / "index"
+    _backdate(repo, repo / "src", repo / "src" / "pkg")
+
+    first = discover.discover_files([repo], repo, [], [], index_dir=index_dir)
+    assert any(index_dir.iterdir())
+
+    listed = []
+    real_scandir = os.scandir
+
+    def counting_scandir(path):
+        listed.append(Path(path).relative_to(repo).as_posix())
+        return real_scandir(path)
+
+    monkeypatch.setattr(discover.os, "scandir", counting_scandir)
+    assert discover.discover_files([repo], repo, [], [], index_dir=index_dir) == first
+    assert listed == []
+
+    # A new file changes its directory's mtime, so only that directory is re-listed
+    (repo / "src" / "pkg" / "extra.py").write_text("y = 2\n", encoding="utf-8")
+    files = discover.discover_files([repo], repo, [], [], index_dir=index_dir)
+    assert "src/pkg/extra.py" in _relative(files, repo)
+    assert listed == ["src/pkg"]
+
+
+def test_discovery_index_invalidated_by_patterns(tmp_path: Path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _make_tree(repo)
+    index_dir = tmp_path / "index"
+    _backdate(repo, repo / "src", repo / "src" / "pkg")
+
+    discover.discover_files([repo], repo, [], [], index_dir=index_dir)
+    files = discover.discover_files([repo], repo, ["*.png"], [], index_dir=index_dir)
+    assert _relative(files, repo) == ["src/image.png"]
+
+
+def test_iter_files_streams_in_sorted_order(tmp_path: Path, monkeypatch):
+    # Names that sort differently as whole paths than as bare names
+    for rel in ("a.py", "a-b.py", "a0.py", "a/z.py", "a/b/c.py", "ab/x.py", "b.py", "B.py", "a/b.py"):
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text("x = 1\n", encoding="utf-8")
+    expected = sorted(
+        path.relative_to(tmp_path).as_posix() for path in tmp_path.rglob("*.py")
+    )
+    assert _relative(discover.iter_files([tmp_path], tmp_path, [], []), tmp_path) == expected
+
+    # Overlapping inputs are merged in order and each file comes out once
+    inputs = [tmp_path / "a", tmp_path, tmp_path / "b.py", tmp_path / "a" / "b"]
+    assert _relative(discover.discover_files(inputs, tmp_path, [], []), tmp_path) == expected
+
+    listed = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(discover.os, "scandir", lambda path: listed.append(path) or real_scandir(path))
+    files = discover.iter_files([tmp_path], tmp_path, [], [])
+    assert next(files) == tmp_path / "B.py"
+    assert len(listed) == 1
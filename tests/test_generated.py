@@ -0,0 +1,97 @@
+import base64
+import json
+import os
+from pathlib import Path
+
+from rcpack import packager
+from rcpack.generated import GeneratedDetector, byte_entropy
+
+
+def test_classify_path():
+    detector = GeneratedDetector("vendor/** linguist-generated\nkeep.min.js -linguist-generated\n")
+    assert detector.classify_path("web/package-lock.json") == "lockfile"
+    assert detector.classify_path("static/app.min.js") == "minified"
+    assert detector.classify_path("static/app.js.map") == "source-map"
+    assert detector.classify_path("api/service_pb2.py") == "generated-code"
+    assert detector.classify_path("vendor/lib/util.py") == "linguist-generated"
+    assert detector.classify_path("keep.min.js") is None
+    assert detector.classify_path("src/app.py") is None
+
+
+def test_classify_content():
+    detector = GeneratedDetector()
+    assert detector.classify_content("a.go", b"// Code generated by protoc-gen-go. DO NOT EDIT.\npackage a\n") == "generated-header"
+    assert detector.classify_content("a.py", b'"""Notes on @generated markers."""\n') is None
+    assert detector.classify_content("a.js", b"var a=1;" * 300) == "minified-content"
+    blob = base64.b64encode(os.urandom(3000))
+    lines = b"\n".join(blob[i:i + 120] for i in range(0, len(blob), 120))
+    assert byte_entropy(lines) > 5.5
+    assert detector.classify_content("data.json", lines) == "high-entropy"
+    source = b"def f(x):\n    return x + 1\n\n" * 100
+    assert detector.classify_content("a.py", source) is None
+
+
+def test_build_package_stubs_generated_files(tmp_path: Path):
+    (tmp_path / "app.py").write_text("print('hi')\n", encoding="utf-8")
+    (tmp_path / "package-lock.json").write_text('{"lockfileVersion": 3}\n', encoding="utf-8")
+    (tmp_path / "bundle.js").write_text("var a=1;" * 300, encoding="utf-8")
+    (tmp_path / "gen").mkdir()
+    (tmp_path / "gen" / "model.py").write_text("x = 1\n", encoding="utf-8")
+    (tmp_path / ".gitattributes").write_text("gen/** linguist-generated=true\n", encoding="utf-8")
+
+    out, stats = packager.build_package([str(tmp_path)], None, None, 16_384, fmt="json")
+    data = json.loads(out)
+    assert data["files"]["app.py"] == "print('hi')\n"
+    assert data["files"]["package-lock.json"] == "[Generated file skipped: package-lock.json, 23 bytes (lockfile)]"
+    assert data["files"]["bundle.js"].endswith("(minified-content)]")
+    assert data["files"]["gen/model.py"].endswith("(linguist-generated)]")
+    assert stats["generated"] == data["summary"]["generated"] == {
+        "lockfile": 1, "minified-content": 1, "linguist-generated": 1,
+    }
+    # Stubs do not count as lines; app.py and .gitattributes do
+    assert stats["lines"] == 2
+
+    out, stats = packager.build_package([str(tmp_path)], None, None, 16_384, fmt="markdown", skip_generated=False)
+    assert "generated" not in stats
+    assert '"lockfileVersion": 3' in out
+
+    out, _ = packager.build_package([str(tmp_path)], None, None, 16_384, fmt="markdown")
+    assert "- **Generated Files**: 3 stubbed (linguist-generated: 1, lockfile: 1, minified-content: 1)" in out
+
+
+def test_generated_header_needs_a_canonical_marker_in_the_leading_comments():
+    detector = GeneratedDetector()
+    headers = [
+        b"# -*- coding: utf-8 -*-\n# Generated by the protocol buffer compiler.  DO NOT EDIT!\nimport x\n",
+        b"/*\n * Copyright 2024\n *\n * @generated\n */\nint x;\n",
+        b"#!/usr/bin/env python\n\n# This file was automatically generated by tool.py\nx = 1\n",
+        b"<!-- This file is auto-generated; edit the template instead -->\n<html></html>\n",
+    ]
+    for header in headers:
+        assert detector.classify_content("f.txt", header) == "generated-header", header
+
+    hand_written = [
+        # comments that talk about generated things
+        b"# The following was generated by hand-tuning\nx = 1\n",
+        b"import os\n\n# version.py is auto-generated at build time\nfrom .version import v\n",
+        b'"""Core module."""\n# is generated\n',
+        b"def f():\n    # This file was generated, DO NOT EDIT (quoted in an error message)\n    pass\n",
+        b"x = 1\n# @generated\n",
+        b"# License header\n" * 12 + b"# @generated\n",
+    ]
+    for source in hand_written:
+        assert detector.classify_content("f.py", source) is None, source
+
+
+def test_prose_is_never_judged_by_line_length_or_entropy():
+    detector = GeneratedDetector()
+    paragraph = b"This project packs a repository into one file for review. " * 19
+    readme = b"# Project\n\n" + paragraph + b"\n\n" + paragraph + b"\n"
+    assert len(paragraph) > 1_100
+    for name in ("README.md", "docs/index.rst", "NOTES.txt"):
+        assert detector.classify_content(name, readme) is None, name
+    assert detector.classify_content("app.js", readme) == "minified-content"
+
+    blob = base64.b64encode(os.urandom(3000))
+    lines = b"\n".join(blob[i:i + 120] for i in range(0, len(blob), 120))
+    assert detector.classify_content("key.txt", lines) is None
@@ -0,0 +1,138 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from rcpack import cli, gitinfo, packager
+
+
+GIT_ENV = {
+    **os.environ,
+    "GIT_AUTHOR_NAME": "Test", "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Test", "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+def run_git(repo: Path, *args: str) -> str:
+    out = subprocess.check_output(["git", *args], cwd=str(repo), env=GIT_ENV)
+    return out.decode("utf-8").strip()
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    run_git(tmp_path, "init", "-q")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("print('v1')\n", encoding="utf-8")
+    (tmp_path / "old.py").write_text("x = 1\n" * 20, encoding="utf-8")
+    (tmp_path / "gone.py").write_text("y = 2\n", encoding="utf-8")
+    run_git(tmp_path, "add", ".")
+    run_git(tmp_path, "commit", "-qm", "first")
+
+    (tmp_path / "src" / "app.py").write_text("print('v2')\n", encoding="utf-8")
+    run_git(tmp_path, "mv", "old.py", "renamed.py")
+    run_git(tmp_path, "rm", "-q", "gone.py")
+    (tmp_path / "new file.py").write_text("z = 3\n", encoding="utf-8")
+    run_git(tmp_path, "add", ".")
+    run_git(tmp_path, "commit", "-qm", "second")
+    return tmp_path
+
+
+def test_git_command_allowlist(tmp_path: Path):
+    with pytest.raises(ValueError):
+        gitinfo._git(["push"], cwd=tmp_path)
+
+
+def test_get_changed_files_between_revisions(repo: Path):
+    changes = gitinfo.get_changed_files(repo, "HEAD~1..HEAD")
+    by_path = {change["path"]: change for change in changes}
+    assert by_path["src/app.py"]["status"] == "modified"
+    assert by_path["gone.py"]["status"] == "deleted"
+    assert by_path["new file.py"]["status"] == "added"
+    assert by_path["renamed.py"]["status"] == "renamed"
+    assert by_path["renamed.py"]["old_path"] == "old.py"
+
+    # Paths are relative to a subdirectory, and limited to it
+    assert gitinfo.get_changed_files(repo / "src", "HEAD~1..HEAD") == [
+        {"status": "modified", "path": "app.py", "old_path": None}
+    ]
+
+
+def test_diff_target_and_patches(repo: Path):
+    assert gitinfo.diff_target("HEAD~1..HEAD") == "HEAD"
+    assert gitinfo.diff_target("main...") == "HEAD"
+    assert gitinfo.diff_target("HEAD~1") is None
+    assert gitinfo.diff_target(None, staged=True) == ""
+    with pytest.raises(ValueError):
+        gitinfo.diff_target("a..b", staged=True)
+
+    patches = gitinfo.get_diff_patches(repo, "HEAD~1..HEAD")
+    assert "+print('v2')" in patches["src/app.py"]
+    assert patches["src/app.py"].startswith("diff --git a/src/app.py b/src/app.py\n")
+
+
+def test_git_blob_reader(repo: Path):
+    with gitinfo.GitBlobReader(repo / "src") as reader:
+        assert reader.read("HEAD~1:./app.py") == (b"print('v1')\n", 12)
+        data, size = reader.read("HEAD:renamed.py", max_bytes=4)
+        assert (data, size) == (b"x = 1", 120)
+        # The stream stays in sync after a partial read
+        assert reader.read("HEAD:./app.py")[0] == b"print('v2')\n"
+        with pytest.raises(KeyError):
+            reader.read("HEAD:./missing.py")
+
+
+def test_list_tree_and_rev_info(repo: Path, capfd):
+    files = gitinfo.list_tree(repo, "HEAD~1")
+    assert [(path, size) for path, _, size in files] == [("gone.py", 6), ("old.py", 120), ("src/app.py", 12)]
+    assert [path for path, _, _ in gitinfo.list_tree(repo / "src", "HEAD")] == ["app.py"]
+
+    info = gitinfo.get_git_info(repo, rev="HEAD~1")
+    assert info["is_repo"] is True
+    assert info["branch"] == "HEAD~1"
+    assert info["commit"] == run_git(repo, "rev-parse", "HEAD~1")
+    assert gitinfo.get_git_info(repo, rev="no-such-rev")["is_repo"] is False
+
+    tree = run_git(repo, "rev-parse", "HEAD:src")
+    capfd.readouterr()
+    for rev in ("HEAD:src", tree):
+        info = gitinfo.get_git_info(repo, rev=rev)
+        assert info["is_repo"] is True
+        assert (info["commit"], info["branch"], info["note"]) == (None, rev, f"Tree {tree}")
+    assert capfd.readouterr().err == ""
+    out, _ = packager.build_package([str(repo)], None, None, 16_384, rev="HEAD:src")
+    assert f"- **Branch**: HEAD:src\n" in out
+    assert f"- **Note**: Tree {tree}\n" in out
+    assert "### app.py" in out
+
+
+def test_build_package_rev_shares_blob_reader(repo: Path):
+    (repo / "src" / "app.py").write_text("print('dirty')\n", encoding="utf-8")
+    with gitinfo.GitBlobReader(repo) as reader:
+        old_out, old_stats = packager.build_package([str(repo)], None, None, 16_384, fmt="json", rev="HEAD~1", blob_reader=reader)
+        new_out, _ = packager.build_package([str(repo)], None, None, 16_384, fmt="json", rev="HEAD", blob_reader=reader)
+
+    old, new = json.loads(old_out), json.loads(new_out)
+    assert old["files"]["src/app.py"] == "print('v1')\n"
+    assert new["files"]["src/app.py"] == "print('v2')\n"
+    assert "gone.py" in old["files"] and "gone.py" not in new["files"]
+    assert old["file_sizes"]["old.py"] == 120
+    assert old["repo_info"]["commit"] == run_git(repo, "rev-parse", "HEAD~1")
+    assert old_stats["files"] == 3
+
+
+def test_diff_header_describes_the_target_revision(repo: Path, monkeypatch):
+    first = run_git(repo, "rev-parse", "HEAD~1")
+    (repo / "later.py").write_text("w = 4\n", encoding="utf-8")
+    run_git(repo, "add", ".")
+    run_git(repo, "commit", "-qm", "third")
+
+    out = repo.parent / "diff.json"
+    monkeypatch.setattr(sys, "argv", ["rcpack", str(repo), "--diff", f"{first}..HEAD~1", "-f", "json", "-o", str(out)])
+    cli.main()
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert data["repo_info"]["branch"] == "HEAD~1"
+    assert data["repo_info"]["commit"] == run_git(repo, "rev-parse", "HEAD~1")
+    assert "later.py" not in data["files"]
@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from rcpack import modules, packager
+from rcpack.treeview import render_tree
+from test_gitinfo import run_git
+
+
+def _repo(path: Path, files: dict) -> str:
+    path.mkdir(parents=True)
+    run_git(path, "init", "-q")
+    for rel, text in files.items():
+        (path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (path / rel).write_text(text, encoding="utf-8")
+    run_git(path, "add", ".")
+    run_git(path, "commit", "-qm", "init")
+    return run_git(path, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def superproject(tmp_path: Path) -> dict:
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("app = 1\n", encoding="utf-8")
+    (tmp_path / "libs-notes.md").write_text("# Notes\n", encoding="utf-8")
+    commits = {
+        "libs/core": _repo(tmp_path / "libs" / "core", {"core.py": "core = 1\n"}),
+        "libs/core/vendor/inner": _repo(tmp_path / "libs" / "core" / "vendor" / "inner", {"inner.py": "inner = 1\n"}),
+        "third_party/big": _repo(tmp_path / "third_party" / "big", {"big.py": "big = 1\n"}),
+    }
+    return {"root": tmp_path, "commits": commits}
+
+
+def _pack(root: Path, **options) -> dict:
+    return json.loads(packager.build_package([str(root)], None, None, 16_384, fmt="json", **options)[0])
+
+
+def test_modules_get_their_own_sections(superproject):
+    root, commits = superproject["root"], superproject["commits"]
+    plain = _pack(root)
+    data = _pack(root, modules=True)
+
+    assert "modules" not in plain
+    assert data["files"] == plain["files"]
+    assert list(data["files"]) == [
+        "libs-notes.md", "libs/core/core.py", "libs/core/vendor/inner/inner.py", "src/app.py",
+        "third_party/big/big.py",
+    ]
+    assert [(module["path"], module["depth"], module["files"]) for module in data["modules"]] == [
+        ("libs/core", 1, 1), ("libs/core/vendor/inner", 2, 1), ("third_party/big", 1, 1),
+    ]
+    for module in data["modules"]:
+        assert module["repo_info"]["commit"] == commits[module["path"]]
+    assert f"core [module @ {commits['libs/core'][:8]}]" in data["structure"]
+    assert f"big [module @ {commits['third_party/big'][:8]}]" in data["structure"]
+
+    markdown, _ = packager.build_package([str(root)], None, None, 16_384, modules=True)
+    assert markdown.index("## Modules") < markdown.index("## Directory Structure")
+    assert f"### libs/core/vendor/inner\n- **Branch**: " in markdown
+
+
+def test_module_depth_and_skip(superproject):
+    root = superproject["root"]
+    data = _pack(root, modules=True, module_depth=1, skip_modules=["third_party/*"])
+    assert [module["path"] for module in data["modules"]] == ["libs/core", "third_party/big"]
+    assert data["modules"][0]["files"] == 2
+    assert data["modules"][1] == {"path": "third_party/big", "depth": 1, "skipped": True}
+    assert "third_party/big/big.py" not in data["files"]
+    assert "libs/core/vendor/inner/inner.py" in data["files"]
+
+    assert _pack(root, modules=True, module_depth=0)["modules"] == []
+    with pytest.raises(ValueError):
+        packager.build_package([str(root)], None, None, 16_384, modules=True, rev="HEAD")
+
+
+def test_render_tree_labels_roots():
+    tree = render_tree(["a/b/c.py", "a/d.py"], roots={"a/b": "module"})
+    assert tree.splitlines() == ["└── a", "    ├── b [module]", "    │   └── c.py", "    └── d.py"]
+
+
+def test_deadline_cancels_module_scans(superproject, monkeypatch):
+    release = threading.Event()
+
+    def slow_git_info(path, rev=None):
+        release.wait(timeout=10)
+        return {"is_repo": False, "note": "slow"}
+
+    monkeypatch.setattr(modules, "get_git_info", slow_git_info)
+    try:
+        started = time.monotonic()
+        data = _pack(superproject["root"], modules=True, deadline_ms=200)
+        elapsed = time.monotonic() - started
+    finally:
+        release.set()
+
+    assert elapsed < 5
+    truncated = data["summary"]["truncated"]
+    assert truncated["reason"] == "deadline reached during discovery"
+    omitted = {entry["path"]: entry["reason"] for entry in truncated["omitted"]}
+    assert omitted["libs/core/"] == "module not scanned before deadline"
+    assert {"path": "libs/core", "depth": 1, "unscanned": True} in data["modules"]
+    assert "libs/core/core.py" not in data["files"]
@@ -0,0 +1,115 @@
+import json
+from pathlib import Path
+
+from rcpack import outline, packager
+from rcpack.utils import get_language_from_extension
+
+
+PY_SOURCE = '''"""Module doc."""
+
+import os
+
+
+@decorator(1)
+class Thing(Base, metaclass=Meta):
+    """Class doc."""
+
+    def method(self, a: int, *args, b=2, **kw) -> str:
+        return str(a)
+
+    async def fetch(self):
+        await other()
+
+
+def helper(x):
+    def inner():
+        pass
+    return inner
+'''
+
+
+def test_outline_python_keeps_signatures_only():
+    result = outline.outline_python(PY_SOURCE)
+    assert result.splitlines() == [
+        '"""Module doc."""',
+        "@decorator(1)",
+        "class Thing(Base, metaclass=Meta):",
+        "    def method(self, a: int, *args, b=2, **kw) -> str: ...",
+        "    async def fetch(self): ...",
+        "def helper(x): ...",
+    ]
+
+
+def test_outline_source_falls_back_to_regex():
+    js = "import x from 'y';\nexport async function load(a) {\n  return a;\n}\nconst add = (a, b) => a + b;\n"
+    assert outline.outline_source(js, "javascript") == "export async function load(a) {\nconst add = (a, b) => a + b;"
+    # Python that does not parse still gets a regex outline
+    assert outline.outline_source("def broken(:\n    pass\n", "python") == "def broken(:"
+    # Languages without an outline keep the whole file
+    assert outline.outline_source('{"a": 1}', "json") is None
+
+
+def test_outliner_caches_by_content_hash(tmp_path: Path):
+    with outline.Outliner(processes=1, cache_dir=tmp_path) as outliner:
+        assert outliner.outline("a.py", PY_SOURCE) == outline.outline_python(PY_SOURCE)
+    cached = list(tmp_path.rglob("*"))
+    assert any(path.is_file() for path in cached)
+
+    with outline.Outliner(processes=1, cache_dir=tmp_path) as outliner:
+        outliner_source = outline.outline_source
+        try:
+            outline.outline_source = None  # a cache hit must not parse again
+            assert outliner.outline("b.py", PY_SOURCE) == outline.outline_python(PY_SOURCE)
+        finally:
+            outline.outline_source = outliner_source
+
+
+def test_build_package_outline_marks_files_and_reports_reduction(tmp_path: Path):
+    (tmp_path / "big.py").write_text(PY_SOURCE + "\n# padding\n" * 600, encoding="utf-8")
+    (tmp_path / "conf.json").write_text('{"a": 1}', encoding="utf-8")
+
+    out_json, stats = packager.build_package([str(tmp_path)], None, None, 16_384, fmt="json", outline=True)
+    data = json.loads(out_json)
+    assert data["outlined_files"] == ["big.py"]
+    assert data["files"]["big.py"] == outline.outline_python(PY_SOURCE)
+    assert data["files"]["conf.json"] == '{"a": 1}'
+    assert data["summary"]["outline"]["files"] == 1
+    assert data["summary"]["outline"]["reduction_percent"] > 90
+
+    out_md, _ = packager.build_package([str(tmp_path)], None, None, 16_384, outline=True)
+    assert "### big.py (" in out_md and "bytes, outline)" in out_md
+    assert "- **Outlined Files**: 1 (" in out_md
+
+
+def test_outline_keeps_the_byte_limit_for_files_without_an_outline(tmp_path: Path):
+    (tmp_path / "data.json").write_text("[\n" + ",\n".join(f'  {{"id": {i}}}' for i in range(20_000)) + "\n]\n", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("note\n" * 1_000, encoding="utf-8")
+
+    plain = json.loads(packager.build_package([str(tmp_path)], None, None, 1_024, fmt="json")[0])
+    data = json.loads(packager.build_package([str(tmp_path)], None, None, 1_024, fmt="json", outline=True)[0])
+    assert data["files"] == plain["files"]
+    assert data["files"]["data.json"].endswith("[... TRUNCATED to first 1024 bytes ...]")
+    assert data["summary"]["total_lines"] == plain["summary"]["total_lines"]
+
+    # Archives are read up front with the wider limit and cut back afterwards
+    import tarfile
+    archive = tmp_path.parent / "pack.tar"
+    with tarfile.open(archive, "w") as tar:
+        tar.add(tmp_path / "data.json", arcname="data.json")
+    packed = json.loads(packager.build_package([str(archive)], None, None, 1_024, fmt="json", outline=True)[0])
+    assert packed["files"]["data.json"] == plain["files"]["data.json"]
+
+
+def test_outline_keeps_files_without_declarations_whole(tmp_path: Path):
+    files = {
+        "README.md": "Just a paragraph of notes.\n\nAnd another one.\n",
+        "script.py": "import sys\n\nprint(sys.argv)\nvalue = 1\n",
+        "run.sh": "set -e\necho building\nmake all\n",
+    }
+    for name, text in files.items():
+        (tmp_path / name).write_text(text, encoding="utf-8")
+        assert outline.outline_source(text, get_language_from_extension(name)) is None
+
+    data = json.loads(packager.build_package([str(tmp_path)], None, None, 16_384, fmt="json", outline=True)[0])
+    assert data["files"] == files
+    assert data["outlined_files"] == []
@@ -0,0 +1,48 @@
+import json
+from pathlib import Path
+
+from rcpack import packager
+from rcpack.renderer.jsonyaml import render_json
+from rcpack.renderer.markdown import render_markdown
+
+
+def _make_repo(root: Path) -> None:
+    (root / "pkg").mkdir()
+    (root / "pkg" / "mod.py").write_text("def f():\n    return 1\n", encoding="utf-8")
+    (root / "pkg.txt").write_text("sibling of pkg/\n", encoding="utf-8")
+    (root / "README.md").write_text("# Title\nünïcode\n", encoding="utf-8")
+    (root / "data.json").write_text('{"a": 1}', encoding="utf-8")
+
+
+def test_build_package_streams_same_bytes_as_renderers(tmp_path: Path):
+    _make_repo(tmp_path)
+
+    out_json, stats = packager.build_package([str(tmp_path)], None, None, 16_384, fmt="json")
+    data = json.loads(out_json)
+    assert list(data["files"]) == ["README.md", "data.json", "pkg.txt", "pkg/mod.py"]
+    assert stats["files"] == 4
+    assert stats["lines"] == 6
+
+    expected_json = render_json(
+        data["root"], data["repo_info"], data["structure"], data["files"],
+        stats["files"], stats["lines"], recent_files=None, file_sizes=data["file_sizes"],
+        manifest=data["manifest"],
+    )
+    assert out_json == expected_json
+
+    out_md, _ = packager.build_package([str(tmp_path)], None, None, 16_384, fmt="markdown")
+    expected_md = render_markdown(
+        data["root"], data["repo_info"], data["structure"], data["files"],
+        stats["files"], stats["lines"], file_sizes=data["file_sizes"],
+    )
+    assert out_md == expected_md
+    assert out_md.rstrip().endswith("- **Total Lines**: 6")
+
+
+def test_build_package_empty_directory(tmp_path: Path):
+    out_json, stats = packager.build_package([str(tmp_path)], None, None, 16_384, fmt="json")
+    data = json.loads(out_json)
+    assert data["files"] == {}
+    assert data["structure"] == "No files found"
+    assert stats == {"files": 0, "lines": 0, "chars": 0}
+
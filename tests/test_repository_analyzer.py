@@ -0,0 +1,76 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from rcpack.repository_analyzer import RepositoryAnalyzer
+from test_gitinfo import run_git
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "b.py").write_text("b = 1\n", encoding="utf-8")
+    (tmp_path / "src" / "a.py").write_text("a = 1\n", encoding="utf-8")
+    (tmp_path / "README.md").write_text("# Title\n", encoding="utf-8")
+    (tmp_path / "notes.bin").write_bytes(b"\0\1")
+    old = time.time() - 30 * 86400
+    os.utime(tmp_path / "README.md", (old, old))
+    return tmp_path
+
+
+def test_iter_files_is_ordered_and_filtered(repo: Path):
+    analyzer = RepositoryAnalyzer(repo)
+    files = analyzer.iter_files()
+    assert next(files) == repo / "README.md"
+    assert [path.relative_to(repo).as_posix() for path in files] == ["src/a.py", "src/b.py"]
+
+    assert list(analyzer.iter_files(recent_days=7)) == [repo / "src" / "a.py", repo / "src" / "b.py"]
+    assert list(analyzer.iter_files(limit=1)) == [repo / "README.md"]
+    assert list(analyzer.iter_files(include_patterns=["src/b*"])) == [repo / "src" / "b.py"]
+
+
+def test_iter_records_reads_lazily(repo: Path, monkeypatch):
+    from rcpack import pipeline
+
+    read = []
+    real_read = pipeline.read_file_record
+    monkeypatch.setattr(pipeline, "read_file_record", lambda path, rel, *a, **k: read.append(rel) or real_read(path, rel, *a, **k))
+
+    records = RepositoryAnalyzer(repo).iter_records(max_file_bytes=3)
+    first = next(records)
+    assert (first.path, first.truncated) == ("README.md", True)
+    assert read == ["README.md"]
+    records.close()
+    assert read == ["README.md"]
+
+    assert [record.path for record in RepositoryAnalyzer(repo).iter_records(recent_days=7, limit=1)] == ["src/a.py"]
+
+
+def test_iter_records_of_a_revision_reaps_git(repo: Path, monkeypatch):
+    from rcpack import repository_analyzer
+
+    readers = []
+
+    class RecordingReader(repository_analyzer.GitBlobReader):
+        def __init__(self, path):
+            super().__init__(path)
+            readers.append(self)
+
+    monkeypatch.setattr(repository_analyzer, "GitBlobReader", RecordingReader)
+    run_git(repo, "init", "-q")
+    run_git(repo, "add", ".")
+    run_git(repo, "commit", "-qm", "first")
+    (repo / "src" / "a.py").write_text("a = 2\n", encoding="utf-8")
+
+    records = RepositoryAnalyzer(repo).iter_records(rev="HEAD")
+    assert next(records).path == "README.md"
+    assert readers[0]._process.poll() is None
+    records.close()
+    assert readers[0]._process.poll() is not None
+
+    contents = {record.path: record.content for record in RepositoryAnalyzer(repo).iter_records(rev="HEAD")}
+    assert contents == {"README.md": "# Title\n", "src/a.py": "a = 1\n", "src/b.py": "b = 1\n"}
+    with pytest.raises(ValueError):
+        next(RepositoryAnalyzer(repo).iter_records(rev="HEAD", recent_days=7))
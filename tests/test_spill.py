@@ -0,0 +1,81 @@
+import json
+import tarfile
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from rcpack import packager
+from rcpack.delta import content_hash
+from rcpack.ingest import FileRecord
+from rcpack.renderer.jsonyaml import YamlWriter, render_yaml
+from rcpack.spill import SpillStore, parse_size
+
+
+def _make_tree(root: Path) -> None:
+    (root / "src").mkdir()
+    for i in range(20):
+        (root / "src" / f"mod{i:02}.py").write_text(f"value = {i}  # é\n" * 50, encoding="utf-8")
+
+
+def test_parse_size():
+    assert parse_size("65536") == 65536
+    assert parse_size("512K") == 512 * 1024
+    assert parse_size("256mb") == 256 * 1024 ** 2
+    assert parse_size("1.5G") == 3 * 1024 ** 3 // 2
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_spill_store_round_trip():
+    with SpillStore(max_memory=10) as spill:
+        small = FileRecord("a.py", "x = 1\n")
+        large = FileRecord("b.py", "naïve = True\n" * 3)
+        spill.admit(small)
+        spill.admit(large)
+        assert small.spilled is None and spill.in_memory == 6
+        assert large.content == "" and large.spilled is not None
+        assert spill.restore(large).content == "naïve = True\n" * 3
+        spill.release(small)
+        spill.release(large)
+        assert spill.in_memory == 0
+        assert spill.spilled_files == 1
+
+
+@pytest.mark.parametrize("fmt", ["markdown", "json", "yaml"])
+def test_max_memory_output_unchanged(tmp_path: Path, fmt: str):
+    _make_tree(tmp_path)
+    expected, _ = packager.build_package([str(tmp_path)], None, None, 16_384, fmt=fmt)
+    out, stats = packager.build_package([str(tmp_path)], None, None, 16_384, fmt=fmt, max_memory=1024)
+    assert out == expected
+    assert stats["spilled_bytes"] > 0
+
+
+def test_max_memory_spills_buffered_tar_members(tmp_path: Path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    archive_path = tmp_path / "snapshot.tar.gz"
+    with tarfile.open(archive_path, "w:gz") as archive:
+        archive.add(tree / "src", "src")
+
+    expected, _ = packager.build_package([str(archive_path)], None, None, 16_384, fmt="json")
+    out, stats = packager.build_package([str(archive_path)], None, None, 16_384, fmt="json", max_memory=0)
+    assert out == expected
+    assert stats["spilled_bytes"] >= sum(len(c.encode("utf-8")) for c in json.loads(out)["files"].values())
+
+
+def test_yaml_writer_matches_render_yaml():
+    buffer = StringIO()
+    writer = YamlWriter(buffer)
+    writer.begin("/repo", {"is_repo": False, "note": "Not a git repository"})
+    writer.structure("src/\n  a.py\n", {"a.py": "1 day ago"})
+    writer.file(FileRecord("a.py", "def f():\n    return 'ü'\n", size=24))
+    writer.finish({"files": 1, "lines": 2})
+
+    assert buffer.getvalue() == render_yaml(
+        "/repo", {"is_repo": False, "note": "Not a git repository"}, "src/\n  a.py\n",
+        {"a.py": "def f():\n    return 'ü'\n"}, 1, 2,
+        recent_files={"a.py": "1 day ago"}, file_sizes={"a.py": 24},
+        manifest={"a.py": {"sha256": content_hash("def f():\n    return 'ü'\n"), "size": 24}},
+    )
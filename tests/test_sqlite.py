@@ -0,0 +1,94 @@
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+from rcpack import cli, packager
+from rcpack.discover import discover_files
+from rcpack.pipeline import filesystem_entries, run_pipeline
+from rcpack.query import open_pack
+from rcpack.renderer.sqlite import SqliteWriter
+
+
+def _make_repo(root: Path) -> None:
+    (root / "pkg" / "sub").mkdir(parents=True)
+    (root / "pkg" / "mod.py").write_text("def spill_budget():\n    return 1\n", encoding="utf-8")
+    (root / "pkg" / "sub" / "deep.py").write_text("x = 'needle'\n", encoding="utf-8")
+    (root / "README.md").write_text("# Title\nünïcode\n", encoding="utf-8")
+    (root / "big.txt").write_text("y" * 100, encoding="utf-8")
+
+
+def _write_pack(root: Path, db_path: Path) -> dict:
+    files = discover_files([root], root, [], [])
+    with SqliteWriter(db_path) as writer:
+        return run_pipeline(
+            filesystem_entries(files, root, max_file_bytes=64), writer,
+            root=str(root), repo_info={
+                "is_repo": False, "commit": None, "branch": None, "author": None, "date": None,
+                "note": "Not a git repository",
+            },
+        )
+
+
+def test_sqlite_pack_matches_json_pack(tmp_path: Path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _make_repo(repo)
+    stats = _write_pack(repo, tmp_path / "pack.db")
+    expected = json.loads(packager.build_package([str(repo)], None, None, 64, fmt="json")[0])
+
+    with open_pack(tmp_path / "pack.db") as pack:
+        assert pack.paths() == list(expected["files"])
+        assert pack.structure == expected["structure"]
+        assert pack.summary == expected["summary"] == {"total_files": stats["files"], "total_lines": stats["lines"]}
+        assert pack.repo_info() == expected["repo_info"]
+        assert pack.repo_info()["is_repo"] is False
+        for path, content in expected["files"].items():
+            record = pack.get(path)
+            assert record.content == content
+            assert record.size == expected["file_sizes"][path]
+        assert pack.get("big.txt").truncated
+        assert pack.get("missing.py") is None
+        assert [record.path for record in pack.glob("pkg/*.py")] == ["pkg/mod.py", "pkg/sub/deep.py"]
+
+    conn = sqlite3.connect(str(tmp_path / "pack.db"))
+    tree = dict(conn.execute("SELECT path, kind FROM tree"))
+    assert tree["pkg"] == tree["pkg/sub"] == "dir"
+    assert tree["pkg/sub/deep.py"] == "file"
+    assert conn.execute("SELECT language FROM files WHERE path = 'pkg/mod.py'").fetchone() == ("python",)
+
+
+def test_sqlite_pack_search(tmp_path: Path):
+    (tmp_path / "repo").mkdir()
+    _make_repo(tmp_path / "repo")
+    _write_pack(tmp_path / "repo", tmp_path / "pack.db")
+    with open_pack(tmp_path / "pack.db") as pack:
+        hits = pack.search("needle")
+        assert [hit["path"] for hit in hits] == ["pkg/sub/deep.py"]
+        assert "[needle]" in hits[0]["snippet"]
+        assert pack.search("spill_budget OR needle", limit=1)[0]["path"] in ("pkg/mod.py", "pkg/sub/deep.py")
+
+
+def test_sqlite_writer_leaves_no_file_on_failure(tmp_path: Path):
+    db_path = tmp_path / "pack.db"
+    with pytest.raises(RuntimeError):
+        with SqliteWriter(db_path) as writer:
+            writer.begin("/repo", {})
+            raise RuntimeError("interrupted")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cli_sqlite_needs_output(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["rcpack", str(tmp_path), "-f", "sqlite"])
+    with pytest.raises(SystemExit):
+        cli.main()
+    assert "needs an output file" in capsys.readouterr().err
+
+    _make_repo(tmp_path)
+    db_path = tmp_path / "out" / "pack.db"
+    monkeypatch.setattr(sys, "argv", ["rcpack", str(tmp_path), "-f", "sqlite", "-o", str(db_path)])
+    cli.main()
+    with open_pack(db_path) as pack:
+        assert "README.md" in pack.paths()